@@ -0,0 +1,136 @@
+from sqlalchemy import select, func, case, and_, union_all
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from . import models
+from .crud import visible_to
+from .permissions import PermissionContext
+
+# Evaluates budgets against spending in their own period (daily ... yearly) for the
+# current period and `history` earlier ones. Spend for every budget and period comes
+# from one aggregate statement: expenses are assigned to a period index with a CASE
+# over precomputed period starts and grouped by (budget key, period index).
+#
+# A budget covers the expenses of its project, else of its group, else its owner's own
+# expenses, whose expense type has the same name as the budget's category.
+
+PERIODS = ("daily", "weekly", "monthly", "quarterly", "yearly")
+DEFAULT_PERIOD = "monthly"
+
+def _add_months(moment: datetime, months: int) -> datetime:
+    month = moment.year * 12 + moment.month - 1 + months
+    return moment.replace(year=month // 12, month=month % 12 + 1, day=1)
+
+def period_start(period: str, moment: datetime) -> datetime:
+    day = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if period == "daily":
+        return day
+    if period == "weekly":
+        return day - timedelta(days=day.weekday())
+    if period == "monthly":
+        return day.replace(day=1)
+    if period == "quarterly":
+        return day.replace(month=(day.month - 1) // 3 * 3 + 1, day=1)
+    return day.replace(month=1, day=1)
+
+def shift(period: str, start: datetime, steps: int) -> datetime:
+    if period == "daily":
+        return start + timedelta(days=steps)
+    if period == "weekly":
+        return start + timedelta(weeks=steps)
+    return _add_months(start, steps * {"monthly": 1, "quarterly": 3, "yearly": 12}[period])
+
+def period_windows(period: str, as_of: datetime, history: int) -> List[Tuple[datetime, datetime]]:
+    """[start, end) of the current period followed by `history` earlier ones, newest first."""
+    current = period_start(period, as_of)
+    return [(shift(period, current, -index), shift(period, current, 1 - index)) for index in range(history + 1)]
+
+def normalized_period():
+    # NULL or unrecognised periods are evaluated as monthly
+    return case((models.Budget.period.in_(PERIODS), models.Budget.period), else_=DEFAULT_PERIOD)
+
+def _by_period(period_column, values: Dict[str, object]):
+    return case(*[(period_column == period, value) for period, value in values.items()])
+
+def budget_keys(budget_criteria: list):
+    # Budgets with the same period, category and scope always have the same spend, so the
+    # aggregate runs once per distinct key rather than once per budget
+    budget = models.Budget
+    personal = and_(budget.project_id.is_(None), budget.group_id.is_(None))
+    return select(
+        normalized_period().label("period"),
+        budget.category_id.label("category_id"),
+        budget.project_id.label("project_id"),
+        case((budget.project_id.is_(None), budget.group_id)).label("group_id"),
+        case((personal, budget.user_id)).label("owner_id"),
+    ).where(*budget_criteria).distinct().subquery()
+
+def spend_statement(budget_criteria: list, windows: Dict[str, List[Tuple[datetime, datetime]]]):
+    keys, expense = budget_keys(budget_criteria), models.Expense
+    period_index = _by_period(keys.c.period, {
+        name: case(*[(expense.date >= start, index) for index, (start, _) in enumerate(spans)])
+        for name, spans in windows.items()
+    })
+    window_start = _by_period(keys.c.period, {name: spans[-1][0] for name, spans in windows.items()})
+    window_end = _by_period(keys.c.period, {name: spans[0][1] for name, spans in windows.items()})
+    key_columns = [keys.c.period, keys.c.category_id, keys.c.project_id, keys.c.group_id, keys.c.owner_id]
+
+    def branch(scope):
+        # One branch per scope keeps each join on a single indexed expense column
+        return select(*key_columns, period_index.label("period_index"), expense.amount.label("amount")).select_from(keys).join(
+            models.BudgetCategory, models.BudgetCategory.id == keys.c.category_id
+        ).join(
+            models.ExpenseType, models.ExpenseType.name == models.BudgetCategory.name
+        ).join(
+            expense, and_(expense.type_id == models.ExpenseType.id, expense.deleted_at.is_(None), scope)
+        ).where(expense.date >= window_start, expense.date < window_end)
+
+    spends = union_all(
+        branch(expense.project_id == keys.c.project_id),
+        branch(expense.group_id == keys.c.group_id),
+        branch(expense.user_id == keys.c.owner_id),
+    ).subquery()
+    grouping = [spends.c.period, spends.c.category_id, spends.c.project_id, spends.c.group_id, spends.c.owner_id, spends.c.period_index]
+    return select(*grouping, func.sum(spends.c.amount)).group_by(*grouping)
+
+def evaluate_budgets(db: Session, perms: PermissionContext, history: int = 5, as_of: Optional[datetime] = None, group_id: Optional[int] = None, project_id: Optional[int] = None) -> List[dict]:
+    as_of = as_of or datetime.utcnow()
+    criteria = [visible_to(models.Budget, perms), models.Budget.deleted_at.is_(None)]
+    if group_id:
+        criteria.append(models.Budget.group_id == group_id)
+    if project_id:
+        criteria.append(models.Budget.project_id == project_id)
+    budgets = db.execute(select(
+        models.Budget.id, models.Budget.category_id, models.BudgetCategory.name, models.Budget.amount,
+        normalized_period(), models.Budget.group_id, models.Budget.project_id, models.Budget.user_id
+    ).outerjoin(models.BudgetCategory, models.BudgetCategory.id == models.Budget.category_id).where(*criteria).order_by(models.Budget.id)).all()
+    if not budgets:
+        return []
+
+    windows = {period: period_windows(period, as_of, history) for period in PERIODS}
+    spent = {}
+    for period, category_id, budget_project_id, budget_group_id, owner_id, index, total in db.execute(spend_statement(criteria, windows)):
+        if index is not None:
+            spent[(period, category_id, budget_project_id, budget_group_id, owner_id, index)] = total or 0.0
+
+    # Plain dicts serialized straight to JSON by http_cache.fast_response: no per-period model is built or
+    # validated, so the keys and value types here must match schemas.BudgetEvaluation by construction
+    evaluations = []
+    for budget_id, category_id, category, amount, period, budget_group_id, budget_project_id, user_id in budgets:
+        amount = amount or 0.0
+        key = (period, category_id, budget_project_id, None if budget_project_id else budget_group_id, None if budget_project_id or budget_group_id else user_id)
+        statuses = []
+        for index, (start, end) in enumerate(windows[period]):
+            spend = spent.get(key + (index,), 0.0)
+            statuses.append({"start": start, "end": end, "spent": spend, "remaining": amount - spend, "utilisation": spend / amount if amount else None})
+        evaluations.append({
+            "budget_id": budget_id,
+            "category_id": category_id,
+            "category": category,
+            "amount": amount,
+            "period": period,
+            "group_id": budget_group_id,
+            "project_id": budget_project_id,
+            "periods": statuses,
+        })
+    return evaluations
\ No newline at end of file
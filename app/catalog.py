@@ -0,0 +1,94 @@
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from . import models, schemas
+from .http_cache import make_etag
+from .metrics import catalog_cache
+import os
+import threading
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# TTL bounds staleness across workers; writes in this process invalidate immediately
+CATALOG_TTL_SECONDS = float(os.getenv("CATALOG_TTL_SECONDS", "300"))
+# Entries kept per worker: one per kind for the defaults plus one per kind for each active user
+CATALOG_CACHE_SIZE = int(os.getenv("CATALOG_CACHE_SIZE", "10000"))
+
+KINDS = {
+    "income": (models.IncomeType, schemas.IncomeType),
+    "expense": (models.ExpenseType, schemas.ExpenseType),
+    "budget": (models.BudgetCategory, schemas.BudgetCategory),
+}
+
+class _Entry:
+    __slots__ = ("items", "by_id", "etag", "expires_at")
+
+    def __init__(self, items: list, ttl: float):
+        self.items = items
+        self.by_id = {item.id: item for item in items}
+        self.etag = make_etag(*((item.id, item.name) for item in items))
+        self.expires_at = time.monotonic() + ttl
+
+class TypeCatalog:
+    """Income/expense types and budget categories, cached as the shared defaults
+    (user_id NULL) plus one overlay of custom entries per user, in a bounded LRU."""
+
+    def __init__(self, ttl: float, maxsize: int = CATALOG_CACHE_SIZE):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Tuple[str, Optional[int]], _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _entry(self, db: Session, kind: str, user_id: Optional[int]) -> _Entry:
+        key = (kind, user_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                else:
+                    del self._entries[key]
+                    entry = None
+        if entry is not None:
+            catalog_cache.inc(result="hit")
+            return entry
+        catalog_cache.inc(result="miss")
+        model, schema = KINDS[kind]
+        owner = model.user_id.is_(None) if user_id is None else model.user_id == user_id
+        rows = db.execute(select(model).where(owner, model.deleted_at.is_(None)).order_by(model.id)).scalars().all()
+        entry = _Entry([schema.model_validate(row) for row in rows], self.ttl)
+        if self.maxsize > 0:
+            with self._lock:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return entry
+
+    def listing(self, db: Session, kind: str, user_id: int) -> Tuple[List, str]:
+        """All entries visible to the user and an ETag for that exact list."""
+        defaults, custom = self._entry(db, kind, None), self._entry(db, kind, user_id)
+        return defaults.items + custom.items, make_etag(defaults.etag, custom.etag)
+
+    def get(self, db: Session, kind: str, type_id: int, user_id: int):
+        return self._entry(db, kind, None).by_id.get(type_id) or self._entry(db, kind, user_id).by_id.get(type_id)
+
+    def ids(self, db: Session, kind: str, user_id: int) -> set:
+        return set(self._entry(db, kind, None).by_id) | set(self._entry(db, kind, user_id).by_id)
+
+    def invalidate(self, kind: str, user_id: Optional[int] = None):
+        with self._lock:
+            self._entries.pop((kind, user_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+catalog = TypeCatalog(CATALOG_TTL_SECONDS)
\ No newline at end of file
@@ -1,19 +1,21 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import func, select, insert, or_, and_, union_all
 from fastapi import HTTPException
-from . import models, schemas
-from passlib.context import CryptContext
+from . import models, schemas, rollups, passwords, mailer, versions, search, push
+from .permissions import PermissionContext, load_permissions
+from .principal_cache import principals
+from .catalog import catalog
 from datetime import datetime, timedelta
 from typing import Optional, List
+import base64
+import json
 import uuid
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return passwords.hash_password(password)
 
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return passwords.verify_password(plain_password, hashed_password)[0]
 
 def get_user(db: Session, user_id: int):
     return db.query(models.User).filter(models.User.id == user_id, models.User.deleted_at.is_(None)).first()
@@ -37,13 +39,17 @@ def soft_delete_user(db: Session, user_id: int):
     if user:
         user.deleted_at = datetime.utcnow()
         db.commit()
+        principals.invalidate(user.username)
     return user
 
-def create_reset_token(db: Session, user_id: int):
+def create_reset_token(db: Session, user_id: int, email: Optional[str] = None):
     token = str(uuid.uuid4())
     expires_at = datetime.utcnow() + timedelta(hours=1)
     db_token = models.ResetToken(user_id=user_id, token=token, expires_at=expires_at)
     db.add(db_token)
+    if email:
+        # Queued in the same transaction, so a token is never stored without its email (or vice versa)
+        mailer.enqueue(db, email, "Password Reset Request", f"Use this token to reset your password: {token}\nIt expires in 1 hour.")
     db.commit()
     db.refresh(db_token)
     return token
@@ -62,6 +68,7 @@ def create_income_type(db: Session, income_type: schemas.IncomeTypeCreate, user_
     db.add(db_income_type)
     db.commit()
     db.refresh(db_income_type)
+    catalog.invalidate("income", user_id)
     return db_income_type
 
 def update_income_type(db: Session, income_type_id: int, income_type: schemas.IncomeTypeUpdate, user_id: int):
@@ -71,6 +78,7 @@ def update_income_type(db: Session, income_type_id: int, income_type: schemas.In
     db_income_type.name = income_type.name
     db.commit()
     db.refresh(db_income_type)
+    catalog.invalidate("income", user_id)
     return db_income_type
 
 def soft_delete_income_type(db: Session, income_type_id: int, user_id: int):
@@ -78,6 +86,7 @@ def soft_delete_income_type(db: Session, income_type_id: int, user_id: int):
     if db_income_type:
         db_income_type.deleted_at = datetime.utcnow()
         db.commit()
+        catalog.invalidate("income", user_id)
     return db_income_type
 
 def get_income_type(db: Session, income_type_id: int, user_id: Optional[int] = None):
@@ -103,6 +112,7 @@ def create_expense_type(db: Session, expense_type: schemas.ExpenseTypeCreate, us
     db.add(db_expense_type)
     db.commit()
     db.refresh(db_expense_type)
+    catalog.invalidate("expense", user_id)
     return db_expense_type
 
 def update_expense_type(db: Session, expense_type_id: int, expense_type: schemas.ExpenseTypeUpdate, user_id: int):
@@ -112,6 +122,7 @@ def update_expense_type(db: Session, expense_type_id: int, expense_type: schemas
     db_expense_type.name = expense_type.name
     db.commit()
     db.refresh(db_expense_type)
+    catalog.invalidate("expense", user_id)
     return db_expense_type
 
 def soft_delete_expense_type(db: Session, expense_type_id: int, user_id: int):
@@ -119,6 +130,7 @@ def soft_delete_expense_type(db: Session, expense_type_id: int, user_id: int):
     if db_expense_type:
         db_expense_type.deleted_at = datetime.utcnow()
         db.commit()
+        catalog.invalidate("expense", user_id)
     return db_expense_type
 
 def get_expense_type(db: Session, expense_type_id: int, user_id: Optional[int] = None):
@@ -130,7 +142,7 @@ def get_expense_type(db: Session, expense_type_id: int, user_id: Optional[int] =
 def get_expense_type_by_name(db: Session, name: str, user_id: Optional[int] = None):
     query = db.query(models.ExpenseType).filter(models.ExpenseType.name == name, models.ExpenseType.deleted_at.is_(None))
     if user_id:
-        query = query.filter((models.ExpenseType.user_id == user_id) | (models.Expensetype.user_id.is_(None)))
+        query = query.filter((models.ExpenseType.user_id == user_id) | (models.ExpenseType.user_id.is_(None)))
     return query.first()
 
 def get_expense_types(db: Session, user_id: Optional[int] = None):
@@ -144,6 +156,7 @@ def create_budget_category(db: Session, budget_category: schemas.BudgetCategoryC
     db.add(db_budget_category)
     db.commit()
     db.refresh(db_budget_category)
+    catalog.invalidate("budget", user_id)
     return db_budget_category
 
 def update_budget_category(db: Session, budget_category_id: int, budget_category: schemas.BudgetCategoryUpdate, user_id: int):
@@ -153,6 +166,7 @@ def update_budget_category(db: Session, budget_category_id: int, budget_category
     db_budget_category.name = budget_category.name
     db.commit()
     db.refresh(db_budget_category)
+    catalog.invalidate("budget", user_id)
     return db_budget_category
 
 def soft_delete_budget_category(db: Session, budget_category_id: int, user_id: int):
@@ -160,6 +174,7 @@ def soft_delete_budget_category(db: Session, budget_category_id: int, user_id: i
     if db_budget_category:
         db_budget_category.deleted_at = datetime.utcnow()
         db.commit()
+        catalog.invalidate("budget", user_id)
     return db_budget_category
 
 def get_budget_category(db: Session, budget_category_id: int, user_id: Optional[int] = None):
@@ -180,7 +195,9 @@ def get_budget_categories(db: Session, user_id: Optional[int] = None):
         query = query.filter((models.BudgetCategory.user_id == user_id) | (models.BudgetCategory.user_id.is_(None)))
     return query.all()
 
-def check_group_permission(db: Session, group_id: int, user_id: int, required_permission: str = "view") -> bool:
+def check_group_permission(db: Session, group_id: int, user_id: int, required_permission: str = "view", perms: Optional[PermissionContext] = None) -> bool:
+    if perms is not None and perms.user_id == user_id:
+        return perms.has(group_id, required_permission)
     group = db.query(models.Group).filter(models.Group.id == group_id, models.Group.deleted_at.is_(None)).first()
     if not group:
         return False
@@ -192,120 +209,300 @@ def check_group_permission(db: Session, group_id: int, user_id: int, required_pe
     user_in_group = db.query(models.user_group).filter(models.user_group.c.group_id == group_id, models.user_group.c.user_id == user_id).first()
     return bool(user_in_group)  # Group members have edit access by default
 
-def create_user_income(db: Session, income: schemas.IncomeCreate, user_id: int):
-    type_obj = get_income_type(db, income.type_id, user_id)
+def get_authorized_project(db: Session, project_id: int, user_id: int, required_permission: str = "edit", perms: Optional[PermissionContext] = None):
+    project = db.query(models.Project).filter(models.Project.id == project_id, models.Project.deleted_at.is_(None)).first()
+    if not project or (project.user_id != user_id and not (project.group_id and check_group_permission(db, project.group_id, user_id, required_permission, perms))):
+        return None
+    return project
+
+def encode_cursor(date: Optional[datetime], row_id: int) -> str:
+    payload = json.dumps([date.isoformat() if date else None, row_id]).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+def decode_cursor(cursor: str):
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        date, row_id = json.loads(payload)
+        return (datetime.fromisoformat(date) if date else None), int(row_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid pagination cursor")
+
+def visible_to(model, perms: PermissionContext):
+    # Own rows plus rows of every group the user can view, as a single predicate
+    return or_(model.user_id == perms.user_id, model.group_id.in_(perms.group_ids))
+
+# Past this many groups the group branches of a page collapse into one IN-list branch
+SCOPE_BRANCHES = 20
+
+def visibility_scopes(model, perms: PermissionContext) -> List[list]:
+    # visible_to split into disjoint scopes, each an equality on the leading column of a
+    # (user_id | group_id, deleted_at, ...) index; group rows the user wrote are in the personal scope
+    scopes = [[model.user_id == perms.user_id]]
+    group_ids = sorted(perms.group_ids)
+    others = model.user_id != perms.user_id
+    if len(group_ids) <= SCOPE_BRANCHES:
+        scopes.extend([model.group_id == group_id, others] for group_id in group_ids)
+    else:
+        scopes.append([model.group_id.in_(group_ids), others])
+    return scopes
+
+def transaction_filters(model, type_id: int = None, start_date: datetime = None, end_date: datetime = None, project_id: int = None):
+    criteria = [model.deleted_at.is_(None)]
+    if type_id:
+        criteria.append(model.type_id == type_id)
+    if start_date:
+        criteria.append(model.date >= start_date)
+    if end_date:
+        criteria.append(model.date <= end_date)
+    if project_id:
+        criteria.append(model.project_id == project_id)
+    return criteria
+
+# Keyset pagination: newest first, keyed on (date, id); models without a date column page on id alone
+def keyset_keys(model) -> List[str]:
+    return ["date", "id"] if hasattr(model, "date") else ["id"]
+
+def keyset_criteria(model, cursor: Optional[str]):
+    if not cursor:
+        return []
+    date, row_id = decode_cursor(cursor)
+    if not hasattr(model, "date"):
+        return [model.id < row_id]
+    # NULL dates sort last in DESC order on MySQL and SQLite, so they come after every dated row
+    if date is None:
+        return [model.date.is_(None), model.id < row_id]
+    return [or_(model.date < date, and_(model.date == date, model.id < row_id), model.date.is_(None))]
+
+def keyset_order(model):
+    return [getattr(model, key).desc() for key in keyset_keys(model)]
+
+def split_page(model, rows, limit: int):
+    # Rows are fetched with limit + 1 so a full page knows whether another one follows
+    rows = list(rows)
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(getattr(rows[-1], "date", None), rows[-1].id)
+
+def row_columns(schema) -> List[str]:
+    return list(schema.model_fields)
+
+def page_statement(model, perms: PermissionContext, criteria: list, skip: int, limit: int, cursor: Optional[str] = None, columns: Optional[List[str]] = None):
+    """One page of the rows visible to perms, as model instances or, given columns, plain column tuples.
+
+    Each visibility scope is its own UNION ALL branch with the keyset bound, order and limit, so
+    every branch walks its index in page order and stops early; the outer select merges at most
+    limit + 1 rows per branch. A single OR across the scopes made the planner OR two indexes and
+    sort everything that matched.
+    """
+    offset = skip if skip and not cursor else 0
+    scopes = visibility_scopes(model, perms)
+    where = [*criteria, *keyset_criteria(model, cursor)]
+    if len(scopes) == 1:
+        entities = [getattr(model, column) for column in columns] if columns else [model]
+        return select(*entities).where(*scopes[0], *where).order_by(*keyset_order(model)).offset(offset or None).limit(limit + 1)
+    branch_columns = [getattr(model, column) for column in columns] if columns else list(model.__table__.c)
+    pages = union_all(*[
+        select(*branch_columns).where(*scope, *where).order_by(*keyset_order(model)).limit(offset + limit + 1).subquery().select()
+        for scope in scopes
+    ]).subquery()
+    entities = [pages.c[column] for column in columns] if columns else [aliased(model, pages)]
+    return select(*entities).order_by(*[pages.c[key].desc() for key in keyset_keys(model)]).offset(offset or None).limit(limit + 1)
+
+def rows_statement(model, columns: List[str], perms: PermissionContext, criteria: list, skip: int, limit: int, cursor: Optional[str] = None):
+    # Plain column tuples for the fast response path: no ORM identity map, no per-row model validation
+    return page_statement(model, perms, criteria, skip, limit, cursor, columns)
+
+def rows_page(model, columns: List[str], rows, limit: int):
+    rows, next_cursor = split_page(model, rows, limit)
+    return [dict(zip(columns, row)) for row in rows], next_cursor
+
+def _keyset_page(db: Session, model, perms: PermissionContext, criteria: list, skip: int, limit: int, cursor: Optional[str] = None):
+    return split_page(model, db.execute(page_statement(model, perms, criteria, skip, limit, cursor)).scalars().all(), limit)
+
+def create_user_income(db: Session, income: schemas.IncomeCreate, user_id: int, perms: Optional[PermissionContext] = None):
+    type_obj = catalog.get(db, "income", income.type_id, user_id)
     if not type_obj:
         raise ValueError(f"Income type ID '{income.type_id}' does not exist or not authorized")
-    if income.group_id and not check_group_permission(db, income.group_id, user_id, "edit"):
+    if income.group_id and not check_group_permission(db, income.group_id, user_id, "edit", perms):
         raise ValueError(f"Not authorized to add income to group ID '{income.group_id}'")
-    if income.project_id:
-        project = db.query(models.Project).filter(models.Project.id == income.project_id, models.Project.deleted_at.is_(None)).first()
-        if not project or (project.user_id != user_id and not (project.group_id and check_group_permission(db, project.group_id, user_id, "edit"))):
-            raise ValueError(f"Project ID '{income.project_id}' does not exist or not authorized")
+    if income.project_id and not get_authorized_project(db, income.project_id, user_id, "edit", perms):
+        raise ValueError(f"Project ID '{income.project_id}' does not exist or not authorized")
     db_income = models.Income(
         amount=income.amount,
         type_id=income.type_id,
         description=income.description,
-        date=income.date,
+        date=income.date or datetime.utcnow(),
         group_id=income.group_id,
         project_id=income.project_id,
         user_id=user_id
     )
     db.add(db_income)
+    rollups.record(db, "income", db_income)
     db.commit()
     db.refresh(db_income)
     return db_income
 
-def get_incomes(db: Session, user_id: int, skip: int = 0, limit: int = 100, type_id: int = None, start_date: datetime = None, end_date: datetime = None, project_id: int = None):
-    query = db.query(models.Income).filter(models.Income.user_id == user_id, models.Income.deleted_at.is_(None))
-    if type_id:
-        query = query.filter(models.Income.type_id == type_id)
-    if start_date:
-        query = query.filter(models.Income.date >= start_date)
-    if end_date:
-        query = query.filter(models.Income.date <= end_date)
-    if project_id:
-        query = query.filter(models.Income.project_id == project_id)
-    incomes = query.offset(skip).limit(limit).all()
-    for group in db.query(models.user_group).filter(models.user_group.c.user_id == user_id).all():
-        if check_group_permission(db, group.group_id, user_id, "view"):
-            group_incomes = db.query(models.Income).filter(models.Income.group_id == group.group_id, models.Income.deleted_at.is_(None))
-            if project_id:
-                group_incomes = group_incomes.filter(models.Income.project_id == project_id)
-            incomes += [i for i in group_incomes.all() if i.user_id != user_id]
-    return incomes
-
-def soft_delete_income(db: Session, income_id: int, user_id: int):
+def get_incomes(db: Session, user_id: int, skip: int = 0, limit: int = 100, type_id: int = None, start_date: datetime = None, end_date: datetime = None, project_id: int = None, cursor: Optional[str] = None, perms: Optional[PermissionContext] = None):
+    perms = perms or load_permissions(db, user_id)
+    return _keyset_page(db, models.Income, perms, transaction_filters(models.Income, type_id, start_date, end_date, project_id), skip, limit, cursor)
+
+def get_income_rows(db: Session, perms: PermissionContext, skip: int = 0, limit: int = 100, type_id: int = None, start_date: datetime = None, end_date: datetime = None, project_id: int = None, cursor: Optional[str] = None):
+    columns = row_columns(schemas.Income)
+    statement = rows_statement(models.Income, columns, perms, transaction_filters(models.Income, type_id, start_date, end_date, project_id), skip, limit, cursor)
+    return rows_page(models.Income, columns, db.execute(statement).all(), limit)
+
+def soft_delete_income(db: Session, income_id: int, user_id: int, perms: Optional[PermissionContext] = None):
     income = db.query(models.Income).filter(models.Income.id == income_id, models.Income.user_id == user_id, models.Income.deleted_at.is_(None)).first()
-    if income and income.group_id and not check_group_permission(db, income.group_id, user_id, "edit"):
+    if income and income.group_id and not check_group_permission(db, income.group_id, user_id, "edit", perms):
         raise HTTPException(status_code=403, detail="Not authorized to delete this income")
     if income:
         income.deleted_at = datetime.utcnow()
+        rollups.record(db, "income", income, -1)
         db.commit()
     return income
 
-def create_user_expense(db: Session, expense: schemas.ExpenseCreate, user_id: int):
-    type_obj = get_expense_type(db, expense.type_id, user_id)
+def create_user_expense(db: Session, expense: schemas.ExpenseCreate, user_id: int, perms: Optional[PermissionContext] = None):
+    type_obj = catalog.get(db, "expense", expense.type_id, user_id)
     if not type_obj:
         raise ValueError(f"Expense type ID '{expense.type_id}' does not exist or not authorized")
-    if expense.group_id and not check_group_permission(db, expense.group_id, user_id, "edit"):
+    if expense.group_id and not check_group_permission(db, expense.group_id, user_id, "edit", perms):
         raise ValueError(f"Not authorized to add expense to group ID '{expense.group_id}'")
-    if expense.project_id:
-        project = db.query(models.Project).filter(models.Project.id == expense.project_id, models.Project.deleted_at.is_(None)).first()
-        if not project or (project.user_id != user_id and not (project.group_id and check_group_permission(db, project.group_id, user_id, "edit"))):
-            raise ValueError(f"Project ID '{expense.project_id}' does not exist or not authorized")
+    if expense.project_id and not get_authorized_project(db, expense.project_id, user_id, "edit", perms):
+        raise ValueError(f"Project ID '{expense.project_id}' does not exist or not authorized")
     db_expense = models.Expense(
         amount=expense.amount,
         type_id=expense.type_id,
         description=expense.description,
-        date=expense.date,
+        date=expense.date or datetime.utcnow(),
         group_id=expense.group_id,
         project_id=expense.project_id,
         user_id=user_id
     )
     db.add(db_expense)
+    rollups.record(db, "expense", db_expense)
     db.commit()
     db.refresh(db_expense)
     return db_expense
 
-def get_expenses(db: Session, user_id: int, skip: int = 0, limit: int = 100, type_id: int = None, start_date: datetime = None, end_date: datetime = None, project_id: int = None):
-    query = db.query(models.Expense).filter(models.Expense.user_id == user_id, models.Expense.deleted_at.is_(None))
-    if type_id:
-        query = query.filter(models.Expense.type_id == type_id)
-    if start_date:
-        query = query.filter(models.Expense.date >= start_date)
-    if end_date:
-        query = query.filter(models.Expense.date <= end_date)
-    if project_id:
-        query = query.filter(models.Expense.project_id == project_id)
-    expenses = query.offset(skip).limit(limit).all()
-    for group in db.query(models.user_group).filter(models.user_group.c.user_id == user_id).all():
-        if check_group_permission(db, group.group_id, user_id, "view"):
-            group_expenses = db.query(models.Expense).filter(models.Expense.group_id == group.group_id, models.Expense.deleted_at.is_(None))
-            if project_id:
-                group_expenses = group_expenses.filter(models.Expense.project_id == project_id)
-            expenses += [e for e in group_expenses.all() if e.user_id != user_id]
-    return expenses
-
-def soft_delete_expense(db: Session, expense_id: int, user_id: int):
+def get_expenses(db: Session, user_id: int, skip: int = 0, limit: int = 100, type_id: int = None, start_date: datetime = None, end_date: datetime = None, project_id: int = None, cursor: Optional[str] = None, perms: Optional[PermissionContext] = None):
+    perms = perms or load_permissions(db, user_id)
+    return _keyset_page(db, models.Expense, perms, transaction_filters(models.Expense, type_id, start_date, end_date, project_id), skip, limit, cursor)
+
+def get_expense_rows(db: Session, perms: PermissionContext, skip: int = 0, limit: int = 100, type_id: int = None, start_date: datetime = None, end_date: datetime = None, project_id: int = None, cursor: Optional[str] = None):
+    columns = row_columns(schemas.Expense)
+    statement = rows_statement(models.Expense, columns, perms, transaction_filters(models.Expense, type_id, start_date, end_date, project_id), skip, limit, cursor)
+    return rows_page(models.Expense, columns, db.execute(statement).all(), limit)
+
+def soft_delete_expense(db: Session, expense_id: int, user_id: int, perms: Optional[PermissionContext] = None):
     expense = db.query(models.Expense).filter(models.Expense.id == expense_id, models.Expense.user_id == user_id, models.Expense.deleted_at.is_(None)).first()
-    if expense and expense.group_id and not check_group_permission(db, expense.group_id, user_id, "edit"):
+    if expense and expense.group_id and not check_group_permission(db, expense.group_id, user_id, "edit", perms):
         raise HTTPException(status_code=403, detail="Not authorized to delete this expense")
     if expense:
         expense.deleted_at = datetime.utcnow()
+        rollups.record(db, "expense", expense, -1)
         db.commit()
     return expense
 
-def create_user_budget(db: Session, budget: schemas.BudgetCreate, user_id: int):
-    category_obj = get_budget_category(db, budget.category_id, user_id)
+# Rows per multi-row INSERT on dialects without executemany RETURNING: 1000 rows of a
+# transaction table stay well under MySQL's 65535 and SQLite's 32766 bound parameters
+BULK_INSERT_CHUNK = 1000
+
+def _first_inserted_id(conn, result, count: int) -> int:
+    # MySQL's LAST_INSERT_ID() is the first id a multi-row INSERT generated; SQLite's last_insert_rowid() the last
+    if conn.dialect.name == "sqlite":
+        return result.lastrowid - count + 1
+    return result.lastrowid
+
+def _insert_returning_ids(db: Session, table, rows: List[dict]) -> List[int]:
+    # Core insert on the table, without ORM bookkeeping. Where the dialect can, SQLAlchemy batches the
+    # executemany into multi-row INSERT ... RETURNING. Otherwise (MySQL) each chunk is one multi-row
+    # INSERT whose ids are lastrowid .. lastrowid + rowcount - 1: InnoDB gives a simple multi-row INSERT
+    # a consecutive block of auto-increment values under innodb_autoinc_lock_mode 0 or 1 ("consecutive",
+    # the default before MySQL 8.0; set it on servers running the interleaved mode 2), and SQLite
+    # serializes writers. Reading ids back as "above the old max(id)" could pick up another request's rows.
+    conn = db.connection()
+    if conn.dialect.insert_executemany_returning:
+        return list(conn.execute(insert(table).returning(table.c.id, sort_by_parameter_order=True), rows).scalars())
+    ids = []
+    for start in range(0, len(rows), BULK_INSERT_CHUNK):
+        chunk = rows[start:start + BULK_INSERT_CHUNK]
+        result = conn.execute(insert(table).values(chunk))
+        if result.rowcount != len(chunk):
+            raise RuntimeError(f"Bulk insert into {table.name} wrote {result.rowcount} of {len(chunk)} rows")
+        first = _first_inserted_id(conn, result, len(chunk))
+        ids.extend(range(first, first + len(chunk)))
+    return ids
+
+def _bulk_create_transactions(db: Session, kind: str, model, items: list, user_id: int, perms: Optional[PermissionContext] = None) -> schemas.BulkResult:
+    # Referenced types, groups and projects are validated once per distinct id, valid rows
+    # go out as one executemany INSERT and the whole batch commits in a single transaction.
+    perms = perms or load_permissions(db, user_id)
+    valid_types = catalog.ids(db, kind, user_id)
+    project_ids = {item.project_id for item in items if item.project_id}
+    valid_projects = {
+        project_id for project_id, owner_id, group_id in db.execute(select(models.Project.id, models.Project.user_id, models.Project.group_id).where(
+            models.Project.id.in_(project_ids), models.Project.deleted_at.is_(None)
+        ))
+        if owner_id == user_id or (group_id and perms.has(group_id, "edit"))
+    }
+    results = []
+    rows = []
+    row_indexes = []
+    for index, item in enumerate(items):
+        if item.type_id not in valid_types:
+            error = f"{kind.capitalize()} type ID '{item.type_id}' does not exist or not authorized"
+        elif item.group_id and not perms.has(item.group_id, "edit"):
+            error = f"Not authorized to add {kind} to group ID '{item.group_id}'"
+        elif item.project_id and item.project_id not in valid_projects:
+            error = f"Project ID '{item.project_id}' does not exist or not authorized"
+        else:
+            rows.append({
+                "amount": item.amount,
+                "type_id": item.type_id,
+                "description": item.description,
+                "date": item.date or datetime.utcnow(),
+                "group_id": item.group_id,
+                "project_id": item.project_id,
+                "user_id": user_id,
+            })
+            row_indexes.append(index)
+            continue
+        results.append(schemas.BulkItemResult(index=index, created=False, error=error))
+    if rows:
+        for row, row_id in zip(rows, _insert_returning_ids(db, model.__table__, rows)):
+            row["id"] = row_id
+        search.index_new(db.connection(), kind, rows)
+        buckets = {}
+        for row in rows:
+            key = (row["user_id"], row["group_id"], row["project_id"], row["type_id"], rollups.month_key(row["date"]))
+            bucket = buckets.setdefault(key, [0, 0])
+            bucket[0] += row["amount"]
+            bucket[1] += 1
+        for key, (total, count) in buckets.items():
+            rollups.add(db, kind, *key, total, count)
+        scopes = [("user", user_id)] + [("group", row["group_id"]) for row in rows if row["group_id"]]
+        versions.bump(db.connection(), scopes)
+        push.queue(db, scopes, {"type": "bulk_created", "kind": kind + "s", "count": len(rows), "at": datetime.utcnow().isoformat()})
+        db.commit()
+        results.extend(schemas.BulkItemResult(index=index, created=True) for index in row_indexes)
+    results.sort(key=lambda result: result.index)
+    return schemas.BulkResult(created=len(rows), failed=len(items) - len(rows), results=results)
+
+def bulk_create_user_incomes(db: Session, incomes: List[schemas.IncomeCreate], user_id: int, perms: Optional[PermissionContext] = None) -> schemas.BulkResult:
+    return _bulk_create_transactions(db, "income", models.Income, incomes, user_id, perms)
+
+def bulk_create_user_expenses(db: Session, expenses: List[schemas.ExpenseCreate], user_id: int, perms: Optional[PermissionContext] = None) -> schemas.BulkResult:
+    return _bulk_create_transactions(db, "expense", models.Expense, expenses, user_id, perms)
+
+def create_user_budget(db: Session, budget: schemas.BudgetCreate, user_id: int, perms: Optional[PermissionContext] = None):
+    category_obj = catalog.get(db, "budget", budget.category_id, user_id)
     if not category_obj:
         raise ValueError(f"Budget category ID '{budget.category_id}' does not exist or not authorized")
-    if budget.group_id and not check_group_permission(db, budget.group_id, user_id, "edit"):
+    if budget.group_id and not check_group_permission(db, budget.group_id, user_id, "edit", perms):
         raise ValueError(f"Not authorized to add budget to group ID '{budget.group_id}'")
-    if budget.project_id:
-        project = db.query(models.Project).filter(models.Project.id == budget.project_id, models.Project.deleted_at.is_(None)).first()
-        if not project or (project.user_id != user_id and not (project.group_id and check_group_permission(db, project.group_id, user_id, "edit"))):
-            raise ValueError(f"Project ID '{budget.project_id}' does not exist or not authorized")
+    if budget.project_id and not get_authorized_project(db, budget.project_id, user_id, "edit", perms):
+        raise ValueError(f"Project ID '{budget.project_id}' does not exist or not authorized")
     db_budget = models.Budget(
         category_id=budget.category_id,
         amount=budget.amount,
@@ -319,30 +516,24 @@ def create_user_budget(db: Session, budget: schemas.BudgetCreate, user_id: int):
     db.refresh(db_budget)
     return db_budget
 
-def get_budgets(db: Session, user_id: int, skip: int = 0, limit: int = 100, project_id: int = None):
-    query = db.query(models.Budget).filter(models.Budget.user_id == user_id, models.Budget.deleted_at.is_(None))
+def get_budgets(db: Session, user_id: int, skip: int = 0, limit: int = 100, project_id: int = None, cursor: Optional[str] = None, perms: Optional[PermissionContext] = None):
+    perms = perms or load_permissions(db, user_id)
+    criteria = [models.Budget.deleted_at.is_(None)]
     if project_id:
-        query = query.filter(models.Budget.project_id == project_id)
-    budgets = query.offset(skip).limit(limit).all()
-    for group in db.query(models.user_group).filter(models.user_group.c.user_id == user_id).all():
-        if check_group_permission(db, group.group_id, user_id, "view"):
-            group_budgets = db.query(models.Budget).filter(models.Budget.group_id == group.group_id, models.Budget.deleted_at.is_(None))
-            if project_id:
-                group_budgets = group_budgets.filter(models.Budget.project_id == project_id)
-            budgets += [b for b in group_budgets.all() if b.user_id != user_id]
-    return budgets
-
-def soft_delete_budget(db: Session, budget_id: int, user_id: int):
+        criteria.append(models.Budget.project_id == project_id)
+    return _keyset_page(db, models.Budget, perms, criteria, skip, limit, cursor)
+
+def soft_delete_budget(db: Session, budget_id: int, user_id: int, perms: Optional[PermissionContext] = None):
     budget = db.query(models.Budget).filter(models.Budget.id == budget_id, models.Budget.user_id == user_id, models.Budget.deleted_at.is_(None)).first()
-    if budget and budget.group_id and not check_group_permission(db, budget.group_id, user_id, "edit"):
+    if budget and budget.group_id and not check_group_permission(db, budget.group_id, user_id, "edit", perms):
         raise HTTPException(status_code=403, detail="Not authorized to delete this budget")
     if budget:
         budget.deleted_at = datetime.utcnow()
         db.commit()
     return budget
 
-def create_user_project(db: Session, project: schemas.ProjectCreate, user_id: int):
-    if project.group_id and not check_group_permission(db, project.group_id, user_id, "edit"):
+def create_user_project(db: Session, project: schemas.ProjectCreate, user_id: int, perms: Optional[PermissionContext] = None):
+    if project.group_id and not check_group_permission(db, project.group_id, user_id, "edit", perms):
         raise ValueError(f"Not authorized to add project to group ID '{project.group_id}'")
     db_project = models.Project(
         name=project.name,
@@ -358,18 +549,14 @@ def create_user_project(db: Session, project: schemas.ProjectCreate, user_id: in
     db.refresh(db_project)
     return db_project
 
-def get_projects(db: Session, user_id: int, skip: int = 0, limit: int = 100):
-    query = db.query(models.Project).filter(models.Project.user_id == user_id, models.Project.deleted_at.is_(None))
-    projects = query.offset(skip).limit(limit).all()
-    for group in db.query(models.user_group).filter(models.user_group.c.user_id == user_id).all():
-        if check_group_permission(db, group.group_id, user_id, "view"):
-            group_projects = db.query(models.Project).filter(models.Project.group_id == group.group_id, models.Project.deleted_at.is_(None))
-            projects += [p for p in group_projects.all() if p.user_id != user_id]
-    return projects
+def get_projects(db: Session, user_id: int, skip: int = 0, limit: int = 100, perms: Optional[PermissionContext] = None):
+    perms = perms or load_permissions(db, user_id)
+    query = db.query(models.Project).filter(visible_to(models.Project, perms), models.Project.deleted_at.is_(None))
+    return query.order_by(models.Project.id).offset(skip).limit(limit).all()
 
-def soft_delete_project(db: Session, project_id: int, user_id: int):
+def soft_delete_project(db: Session, project_id: int, user_id: int, perms: Optional[PermissionContext] = None):
     project = db.query(models.Project).filter(models.Project.id == project_id, models.Project.user_id == user_id, models.Project.deleted_at.is_(None)).first()
-    if project and project.group_id and not check_group_permission(db, project.group_id, user_id, "edit"):
+    if project and project.group_id and not check_group_permission(db, project.group_id, user_id, "edit", perms):
         raise HTTPException(status_code=403, detail="Not authorized to delete this project")
     if project:
         project.deleted_at = datetime.utcnow()
@@ -421,9 +608,8 @@ def update_project_task(db: Session, task_id: int, project_id: int, task: schema
     db.refresh(db_task)
     return db_task
 
-def get_tasks(db: Session, project_id: int, user_id: int):
-    project = db.query(models.Project).filter(models.Project.id == project_id, models.Project.deleted_at.is_(None)).first()
-    if not project or (project.user_id != user_id and not (project.group_id and check_group_permission(db, project.group_id, user_id, "view"))):
+def get_tasks(db: Session, project_id: int, user_id: int, perms: Optional[PermissionContext] = None):
+    if not get_authorized_project(db, project_id, user_id, "view", perms):
         raise HTTPException(status_code=403, detail="Not authorized")
     return db.query(models.Task).filter(models.Task.project_id == project_id, models.Task.deleted_at.is_(None)).all()
 
@@ -441,6 +627,7 @@ def create_group(db: Session, group: schemas.GroupCreate, owner_id: int):
     db.refresh(db_group)
     # Add owner as a member
     db.execute(models.user_group.insert().values(user_id=owner_id, group_id=db_group.id))
+    versions.bump(db.connection(), [("group", db_group.id)])
     db.commit()
     return db_group
 
@@ -449,6 +636,9 @@ def add_user_to_group(db: Session, group_id: int, user_id: int):
     user = get_user(db, user_id)
     if group and user:
         db.execute(models.user_group.insert().values(user_id=user_id, group_id=group_id))
+        versions.bump(db.connection(), [("group", group_id), ("user", user_id)])
+        # The member list is part of the group, so delta sync has to resend it
+        group.updated_at = datetime.utcnow()
         db.commit()
         return True
     return False
@@ -474,6 +664,7 @@ def create_group_share(db: Session, group_id: int, share: schemas.GroupShareCrea
     if share.user_id == owner_id:
         raise HTTPException(status_code=400, detail="Cannot share with group owner")
     db.execute(models.group_shares.insert().values(group_id=group_id, user_id=share.user_id, permission=share.permission))
+    versions.bump(db.connection(), [("group", group_id), ("user", share.user_id)])
     db.commit()
     return {"group_id": group_id, "user_id": share.user_id, "permission": share.permission}
 
@@ -492,52 +683,42 @@ def delete_group_share(db: Session, group_id: int, user_id: int, owner_id: int):
     if not share:
         raise HTTPException(status_code=404, detail="Share not found")
     db.execute(models.group_shares.delete().where(models.group_shares.c.group_id == group_id, models.group_shares.c.user_id == user_id))
+    versions.bump(db.connection(), [("group", group_id), ("user", user_id)])
     db.commit()
     return {"message": "Share deleted"}
 
-def get_financial_summary(db: Session, user_id: int, group_id: Optional[int] = None, project_id: Optional[int] = None):
-    if group_id and not check_group_permission(db, group_id, user_id, "view"):
-        raise HTTPException(status_code=403, detail="Not authorized for this group")
-    query = db.query(func.sum(models.Income.amount)).filter(models.Income.user_id == user_id, models.Income.deleted_at.is_(None))
+def budget_allocation_statement(user_id: int, project_id: Optional[int] = None):
+    category_name = func.coalesce(models.BudgetCategory.name, "Unknown")
+    statement = select(category_name, func.sum(models.Budget.amount)).select_from(models.Budget).outerjoin(
+        models.BudgetCategory, models.BudgetCategory.id == models.Budget.category_id
+    ).where(models.Budget.user_id == user_id, models.Budget.deleted_at.is_(None))
     if project_id:
-        query = query.filter(models.Income.project_id == project_id)
-    total_income = query.scalar() or 0
-
-    query = db.query(func.sum(models.Expense.amount)).filter(models.Expense.user_id == user_id, models.Expense.deleted_at.is_(None))
+        statement = statement.where(models.Budget.project_id == project_id)
+    return statement.group_by(category_name)
+
+def budget_spend_statement(user_id: int, names: List[str], project_id: Optional[int] = None):
+    # Budgets are matched to expenses by category name == expense type name
+    rollup = models.MonthlyRollup
+    statement = select(models.ExpenseType.name, func.sum(rollup.total)).join(
+        rollup, rollup.type_id == models.ExpenseType.id
+    ).where(rollup.kind == "expense", rollup.user_id == user_id, models.ExpenseType.name.in_(names))
     if project_id:
-        query = query.filter(models.Expense.project_id == project_id)
-    total_expense = query.scalar() or 0
+        statement = statement.where(rollup.project_id == project_id)
+    return statement.group_by(models.ExpenseType.name)
 
+def get_financial_summary(db: Session, user_id: int, group_id: Optional[int] = None, project_id: Optional[int] = None, perms: Optional[PermissionContext] = None):
+    if group_id and not check_group_permission(db, group_id, user_id, "view", perms):
+        raise HTTPException(status_code=403, detail="Not authorized for this group")
+    total_income = rollups.totals(db, "income", user_id=user_id, project_id=project_id)
+    total_expense = rollups.totals(db, "expense", user_id=user_id, project_id=project_id)
     if group_id:
-        group = db.query(models.Group).filter(models.Group.id == group_id, models.Group.deleted_at.is_(None)).first()
-        if group:
-            group_income_query = db.query(func.sum(models.Income.amount)).filter(models.Income.group_id == group_id, models.Income.deleted_at.is_(None))
-            if project_id:
-                group_income_query = group_income_query.filter(models.Income.project_id == project_id)
-            total_income += group_income_query.scalar() or 0
-
-            group_expense_query = db.query(func.sum(models.Expense.amount)).filter(models.Expense.group_id == group_id, models.Expense.deleted_at.is_(None))
-            if project_id:
-                group_expense_query = group_expense_query.filter(models.Expense.project_id == project_id)
-            total_expense += group_expense_query.scalar() or 0
-
-    budgets = db.query(models.Budget).filter(models.Budget.user_id == user_id, models.Budget.deleted_at.is_(None))
-    if project_id:
-        budgets = budgets.filter(models.Budget.project_id == project_id)
-    budgets = budgets.all()
+        total_income += rollups.totals(db, "income", group_id=group_id, project_id=project_id)
+        total_expense += rollups.totals(db, "expense", group_id=group_id, project_id=project_id)
 
-    budget_status = {}
-    for b in budgets:
-        category = db.query(models.BudgetCategory).filter(models.BudgetCategory.id == b.category_id).first()
-        budget_status[category.name if category else "Unknown"] = {"allocated": b.amount, "spent": 0}
-
-    expenses = db.query(models.Expense).filter(models.Expense.user_id == user_id, models.Expense.deleted_at.is_(None))
-    if project_id:
-        expenses = expenses.filter(models.Expense.project_id == project_id)
-    for expense in expenses.all():
-        expense_type = db.query(models.ExpenseType).filter(models.ExpenseType.id == expense.type_id).first()
-        if expense_type and expense_type.name in budget_status:
-            budget_status[expense_type.name]["spent"] += expense.amount
+    budget_status = {name: {"allocated": amount, "spent": 0} for name, amount in db.execute(budget_allocation_statement(user_id, project_id)).all()}
+    if budget_status:
+        for name, amount in db.execute(budget_spend_statement(user_id, list(budget_status), project_id)).all():
+            budget_status[name]["spent"] = amount
 
     return schemas.FinancialSummary(
         total_income=total_income,
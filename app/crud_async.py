@@ -0,0 +1,133 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from fastapi import HTTPException
+from datetime import datetime
+from typing import Optional
+from . import models, schemas, rollups
+from .crud import transaction_filters, page_statement, split_page, budget_allocation_statement, budget_spend_statement, visible_to, row_columns, rows_statement, rows_page
+from .permissions import PermissionContext, permission_statement, build_permissions
+from .catalog import catalog
+
+# AsyncSession counterparts of the hot crud functions, used when DB_ASYNC=true.
+# Query construction is shared with crud.py; only the execution differs.
+
+async def get_user_by_username(db: AsyncSession, username: str):
+    return (await db.execute(select(models.User).where(models.User.username == username, models.User.deleted_at.is_(None)))).scalars().first()
+
+async def load_permissions(db: AsyncSession, user_id: int) -> PermissionContext:
+    return build_permissions(user_id, (await db.execute(permission_statement(user_id))).all())
+
+async def _first(db: AsyncSession, statement):
+    return (await db.execute(statement)).scalars().first()
+
+async def _authorized_project(db: AsyncSession, project_id: int, perms: PermissionContext, required_permission: str = "edit"):
+    project = await _first(db, select(models.Project).where(models.Project.id == project_id, models.Project.deleted_at.is_(None)))
+    if not project or (project.user_id != perms.user_id and not (project.group_id and perms.has(project.group_id, required_permission))):
+        return None
+    return project
+
+async def _keyset_page(db: AsyncSession, model, perms: PermissionContext, criteria, skip: int, limit: int, cursor: Optional[str] = None):
+    statement = page_statement(model, perms, criteria, skip, limit, cursor)
+    return split_page(model, (await db.execute(statement)).scalars().all(), limit)
+
+async def get_incomes(db: AsyncSession, perms: PermissionContext, skip: int = 0, limit: int = 100, type_id: int = None, start_date: datetime = None, end_date: datetime = None, project_id: int = None, cursor: Optional[str] = None):
+    return await _keyset_page(db, models.Income, perms, transaction_filters(models.Income, type_id, start_date, end_date, project_id), skip, limit, cursor)
+
+async def get_expenses(db: AsyncSession, perms: PermissionContext, skip: int = 0, limit: int = 100, type_id: int = None, start_date: datetime = None, end_date: datetime = None, project_id: int = None, cursor: Optional[str] = None):
+    return await _keyset_page(db, models.Expense, perms, transaction_filters(models.Expense, type_id, start_date, end_date, project_id), skip, limit, cursor)
+
+async def _rows_page(db: AsyncSession, model, schema, perms: PermissionContext, criteria, skip: int, limit: int, cursor: Optional[str] = None):
+    columns = row_columns(schema)
+    return rows_page(model, columns, (await db.execute(rows_statement(model, columns, perms, criteria, skip, limit, cursor))).all(), limit)
+
+async def get_income_rows(db: AsyncSession, perms: PermissionContext, skip: int = 0, limit: int = 100, type_id: int = None, start_date: datetime = None, end_date: datetime = None, project_id: int = None, cursor: Optional[str] = None):
+    return await _rows_page(db, models.Income, schemas.Income, perms, transaction_filters(models.Income, type_id, start_date, end_date, project_id), skip, limit, cursor)
+
+async def get_expense_rows(db: AsyncSession, perms: PermissionContext, skip: int = 0, limit: int = 100, type_id: int = None, start_date: datetime = None, end_date: datetime = None, project_id: int = None, cursor: Optional[str] = None):
+    return await _rows_page(db, models.Expense, schemas.Expense, perms, transaction_filters(models.Expense, type_id, start_date, end_date, project_id), skip, limit, cursor)
+
+async def get_budgets(db: AsyncSession, perms: PermissionContext, skip: int = 0, limit: int = 100, project_id: int = None, cursor: Optional[str] = None):
+    criteria = [models.Budget.deleted_at.is_(None)]
+    if project_id:
+        criteria.append(models.Budget.project_id == project_id)
+    return await _keyset_page(db, models.Budget, perms, criteria, skip, limit, cursor)
+
+async def get_projects(db: AsyncSession, perms: PermissionContext, skip: int = 0, limit: int = 100):
+    # schemas.Project embeds tasks, which cannot be lazy-loaded on an AsyncSession
+    statement = select(models.Project).options(selectinload(models.Project.tasks)).where(
+        visible_to(models.Project, perms), models.Project.deleted_at.is_(None)
+    ).order_by(models.Project.id).offset(skip).limit(limit)
+    return (await db.execute(statement)).scalars().all()
+
+async def _create_transaction(db: AsyncSession, kind: str, model, item, perms: PermissionContext):
+    label = kind.capitalize()
+    # Same cached catalog as the sync path; run_sync only touches the database on a miss
+    type_obj = await db.run_sync(catalog.get, kind, item.type_id, perms.user_id)
+    if not type_obj:
+        raise ValueError(f"{label} type ID '{item.type_id}' does not exist or not authorized")
+    if item.group_id and not perms.has(item.group_id, "edit"):
+        raise ValueError(f"Not authorized to add {kind} to group ID '{item.group_id}'")
+    if item.project_id and not await _authorized_project(db, item.project_id, perms, "edit"):
+        raise ValueError(f"Project ID '{item.project_id}' does not exist or not authorized")
+    row = model(
+        amount=item.amount,
+        type_id=item.type_id,
+        description=item.description,
+        date=item.date or datetime.utcnow(),
+        group_id=item.group_id,
+        project_id=item.project_id,
+        user_id=perms.user_id
+    )
+    db.add(row)
+    await rollups.record_async(db, kind, row)
+    await db.commit()
+    await db.refresh(row)
+    return row
+
+async def create_user_income(db: AsyncSession, income: schemas.IncomeCreate, perms: PermissionContext):
+    return await _create_transaction(db, "income", models.Income, income, perms)
+
+async def create_user_expense(db: AsyncSession, expense: schemas.ExpenseCreate, perms: PermissionContext):
+    return await _create_transaction(db, "expense", models.Expense, expense, perms)
+
+async def _soft_delete_transaction(db: AsyncSession, kind: str, model, row_id: int, perms: PermissionContext):
+    row = await _first(db, select(model).where(model.id == row_id, model.user_id == perms.user_id, model.deleted_at.is_(None)))
+    if row and row.group_id and not perms.has(row.group_id, "edit"):
+        raise HTTPException(status_code=403, detail=f"Not authorized to delete this {kind}")
+    if row:
+        row.deleted_at = datetime.utcnow()
+        await rollups.record_async(db, kind, row, -1)
+        await db.commit()
+    return row
+
+async def soft_delete_income(db: AsyncSession, income_id: int, perms: PermissionContext):
+    return await _soft_delete_transaction(db, "income", models.Income, income_id, perms)
+
+async def soft_delete_expense(db: AsyncSession, expense_id: int, perms: PermissionContext):
+    return await _soft_delete_transaction(db, "expense", models.Expense, expense_id, perms)
+
+async def get_financial_summary(db: AsyncSession, perms: PermissionContext, group_id: Optional[int] = None, project_id: Optional[int] = None):
+    if group_id and not perms.has(group_id, "view"):
+        raise HTTPException(status_code=403, detail="Not authorized for this group")
+
+    async def total(kind, **scope):
+        return (await db.execute(rollups.totals_statement(kind, project_id=project_id, **scope))).scalar() or 0
+
+    total_income = await total("income", user_id=perms.user_id)
+    total_expense = await total("expense", user_id=perms.user_id)
+    if group_id:
+        total_income += await total("income", group_id=group_id)
+        total_expense += await total("expense", group_id=group_id)
+
+    budget_status = {name: {"allocated": amount, "spent": 0} for name, amount in (await db.execute(budget_allocation_statement(perms.user_id, project_id))).all()}
+    if budget_status:
+        for name, amount in (await db.execute(budget_spend_statement(perms.user_id, list(budget_status), project_id))).all():
+            budget_status[name]["spent"] = amount
+
+    return schemas.FinancialSummary(
+        total_income=total_income,
+        total_expense=total_expense,
+        net_balance=total_income - total_expense,
+        budget_status=budget_status
+    )
\ No newline at end of file
@@ -0,0 +1,81 @@
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional, Tuple
+import asyncio
+from . import crud, crud_async
+from .catalog import catalog
+from .database import AsyncSessionLocal
+from .permissions import PermissionContext
+
+# Everything the frontend loads on start-up (FinanceDataContext) in one response. The
+# sync path reads every section through the request's session; the async path
+# (DB_ASYNC=true) gives each section its own pooled session and runs them concurrently.
+
+SECTIONS = ("incomes", "expenses", "budgets", "projects", "groups", "income_types", "expense_types", "budget_categories", "summary")
+CATALOG_SECTIONS = {"income_types": "income", "expense_types": "expense", "budget_categories": "budget"}
+
+def parse_sections(sections: Optional[List[str]]) -> List[str]:
+    if not sections:
+        return list(SECTIONS)
+    # Accept both ?section=a&section=b and ?section=a,b
+    names = [name.strip() for value in sections for name in value.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SECTIONS]
+    if unknown:
+        raise ValueError(f"Unknown dashboard section(s): {', '.join(unknown)}. Use: {', '.join(SECTIONS)}")
+    return [name for name in SECTIONS if name in names]
+
+def load_types(db: Session, user_id: int, sections: List[str]) -> Dict[str, Tuple[list, str]]:
+    # Catalog lookups are in-memory after the first request; their ETags go into the dashboard ETag
+    return {name: catalog.listing(db, kind, user_id) for name, kind in CATALOG_SECTIONS.items() if name in sections}
+
+def build_dashboard(db: Session, perms: PermissionContext, sections: List[str], types: Dict[str, Tuple[list, str]], limit: int = 100, group_id: Optional[int] = None) -> dict:
+    result = {"cursors": {}}
+    for name in sections:
+        if name == "incomes":
+            result[name], cursor = crud.get_incomes(db, user_id=perms.user_id, limit=limit, perms=perms)
+        elif name == "expenses":
+            result[name], cursor = crud.get_expenses(db, user_id=perms.user_id, limit=limit, perms=perms)
+        elif name == "budgets":
+            result[name], cursor = crud.get_budgets(db, user_id=perms.user_id, limit=limit, perms=perms)
+        else:
+            cursor = None
+            if name == "projects":
+                result[name] = crud.get_projects(db, user_id=perms.user_id, limit=limit, perms=perms)
+            elif name == "groups":
+                result[name] = crud.get_groups_for_user(db, user_id=perms.user_id)
+            elif name == "summary":
+                result[name] = crud.get_financial_summary(db, user_id=perms.user_id, group_id=group_id, perms=perms)
+            else:
+                result[name] = types[name][0]
+        if cursor:
+            result["cursors"][name] = cursor
+    return result
+
+async def _section_async(name: str, perms: PermissionContext, limit: int, group_id: Optional[int]):
+    # One AsyncSession cannot run statements concurrently, so every section gets its own
+    async with AsyncSessionLocal() as db:
+        if name == "incomes":
+            return await crud_async.get_incomes(db, perms, limit=limit)
+        if name == "expenses":
+            return await crud_async.get_expenses(db, perms, limit=limit)
+        if name == "budgets":
+            return await crud_async.get_budgets(db, perms, limit=limit)
+        if name == "projects":
+            return await crud_async.get_projects(db, perms, limit=limit), None
+        if name == "summary":
+            return await crud_async.get_financial_summary(db, perms, group_id=group_id), None
+        # Groups go through the sync query; members must be loaded before the session closes
+        groups = await db.run_sync(lambda session: [group for group in crud.get_groups_for_user(session, perms.user_id) if group.members is not None])
+        return groups, None
+
+async def build_dashboard_async(perms: PermissionContext, sections: List[str], types: Dict[str, Tuple[list, str]], limit: int = 100, group_id: Optional[int] = None) -> dict:
+    queried = [name for name in sections if name not in CATALOG_SECTIONS]
+    pages = await asyncio.gather(*[_section_async(name, perms, limit, group_id) for name in queried])
+    result = {"cursors": {}}
+    for name in sections:
+        if name in CATALOG_SECTIONS:
+            result[name] = types[name][0]
+    for name, (items, cursor) in zip(queried, pages):
+        result[name] = items
+        if cursor:
+            result["cursors"][name] = cursor
+    return result
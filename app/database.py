@@ -1,6 +1,7 @@
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from .pool_metrics import InstrumentedQueuePool, instrument
 import os
 from dotenv import load_dotenv
 
@@ -8,14 +9,60 @@ load_dotenv()
 
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+def _pool_options(url: str) -> dict:
+    # SQLite picks its own pool per database type (file vs :memory:), so only pre-ping applies there
+    if url.startswith("sqlite"):
+        return {"pool_pre_ping": DB_POOL_PRE_PING}
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+engine_options = _pool_options(SQLALCHEMY_DATABASE_URL)
+if not SQLALCHEMY_DATABASE_URL.startswith("sqlite"):
+    engine_options["poolclass"] = InstrumentedQueuePool
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **engine_options)
+pool_metrics = instrument(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+# Optional async path (DB_ASYNC=true). ASYNC_DATABASE_URL defaults to DATABASE_URL with
+# its driver swapped for an async one (aiomysql / aiosqlite, both in requirements.txt).
+ASYNC_DRIVERS = {"mysql+pymysql": "mysql+aiomysql", "mysql": "mysql+aiomysql", "sqlite": "sqlite+aiosqlite"}
+
+def _async_url(url: str) -> str:
+    scheme, sep, rest = url.partition("://")
+    return ASYNC_DRIVERS.get(scheme, scheme) + sep + rest
+
+DB_ASYNC = os.getenv("DB_ASYNC", "false").lower() == "true"
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _async_url(SQLALCHEMY_DATABASE_URL)
+
+async_engine = None
+async_pool_metrics = None
+AsyncSessionLocal = None
+if DB_ASYNC:
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, **_pool_options(ASYNC_DATABASE_URL))
+    async_pool_metrics = instrument(async_engine.sync_engine)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
\ No newline at end of file
@@ -2,8 +2,12 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from sqlalchemy.orm import Session
-from .database import get_db
-from . import schemas, crud
+from sqlalchemy.ext.asyncio import AsyncSession
+from .database import get_db, get_async_db
+from . import schemas, crud, crud_async
+from .permissions import PermissionContext, load_permissions
+from .principal_cache import principals
+from .metrics import auth_failures
 import os
 from dotenv import load_dotenv
 
@@ -11,29 +15,73 @@ load_dotenv()
 
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "10000"))
+# Usernames allowed on the /admin endpoints; nobody unless configured
+ADMIN_USERNAMES = {name.strip() for name in os.getenv("ADMIN_USERNAMES", "").split(",") if name.strip()}
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 
-def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
-    credentials_exception = HTTPException(
+def _credentials_exception(reason: str):
+    auth_failures.inc(reason=reason)
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def _token_subject(token: str) -> str:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
         if username is None:
-            raise credentials_exception
+            raise _credentials_exception("invalid_token")
         token_data = schemas.TokenData(username=username)
     except JWTError:
-        raise credentials_exception
-    user = crud.get_user_by_username(db, username=token_data.username)
+        raise _credentials_exception("invalid_token")
+    return token_data.username
+
+def _cache_principal(user) -> schemas.User:
     if user is None or user.deleted_at:
-        raise credentials_exception
-    return user
+        raise _credentials_exception("unknown_user")
+    principal = schemas.User.model_validate(user)
+    principals.put(principal)
+    return principal
+
+def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
+    username = _token_subject(token)
+    principal = principals.get(username)
+    if principal is not None:
+        return principal
+    return _cache_principal(crud.get_user_by_username(db, username=username))
 
 def get_current_active_user(current_user: schemas.User = Depends(get_current_user)):
     if not current_user.is_active:
+        auth_failures.inc(reason="inactive_user")
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return current_user
+
+def get_current_admin_user(current_user: schemas.User = Depends(get_current_active_user)):
+    if current_user.username not in ADMIN_USERNAMES:
+        auth_failures.inc(reason="not_admin")
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return current_user
+
+def get_permissions(db: Session = Depends(get_db), current_user: schemas.User = Depends(get_current_active_user)) -> PermissionContext:
+    return load_permissions(db, current_user.id)
+
+# Async equivalents for routers running on AsyncSession (DB_ASYNC=true)
+async def get_current_user_async(db: AsyncSession = Depends(get_async_db), token: str = Depends(oauth2_scheme)):
+    username = _token_subject(token)
+    principal = principals.get(username)
+    if principal is not None:
+        return principal
+    return _cache_principal(await crud_async.get_user_by_username(db, username))
+
+async def get_current_active_user_async(current_user: schemas.User = Depends(get_current_user_async)):
+    if not current_user.is_active:
+        auth_failures.inc(reason="inactive_user")
         raise HTTPException(status_code=400, detail="Inactive user")
-    return current_user
\ No newline at end of file
+    return current_user
+
+async def get_permissions_async(db: AsyncSession = Depends(get_async_db), current_user: schemas.User = Depends(get_current_active_user_async)) -> PermissionContext:
+    return await crud_async.load_permissions(db, current_user.id)
\ No newline at end of file
@@ -0,0 +1,54 @@
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from datetime import datetime
+from .database import SessionLocal
+from .crud import transaction_filters, keyset_order, visible_to
+from .permissions import PermissionContext
+import csv
+import io
+import orjson
+
+EXPORT_COLUMNS = ["id", "date", "amount", "type_id", "description", "user_id", "group_id", "project_id"]
+EXPORT_BATCH_SIZE = 1000
+MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+def _rows(model, perms: PermissionContext, type_id: int = None, start_date: datetime = None, end_date: datetime = None, project_id: int = None):
+    # The generator owns its session: it is consumed after the request's get_db session has been handed back.
+    # stream_results uses a server-side cursor, so memory stays at one batch whatever the row count.
+    db = SessionLocal()
+    try:
+        statement = select(*[getattr(model, column) for column in EXPORT_COLUMNS]).where(
+            visible_to(model, perms), *transaction_filters(model, type_id, start_date, end_date, project_id)
+        ).order_by(*keyset_order(model)).execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE)
+        for row in db.execute(statement):
+            yield row
+    finally:
+        db.close()
+
+def _csv_lines(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for count, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if count % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+def _ndjson_lines(rows):
+    chunk = []
+    for row in rows:
+        # orjson writes datetimes as ISO 8601 itself
+        chunk.append(orjson.dumps(dict(zip(EXPORT_COLUMNS, row))))
+        if len(chunk) == EXPORT_BATCH_SIZE:
+            yield b"\n".join(chunk) + b"\n"
+            chunk = []
+    if chunk:
+        yield b"\n".join(chunk) + b"\n"
+
+def export_response(model, perms: PermissionContext, format: str, filename: str, **filters) -> StreamingResponse:
+    rows = _rows(model, perms, **filters)
+    body = _csv_lines(rows) if format == "csv" else _ndjson_lines(rows)
+    return StreamingResponse(body, media_type=MEDIA_TYPES[format], headers={"Content-Disposition": f'attachment; filename="{filename}.{format}"'})
\ No newline at end of file
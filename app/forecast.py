@@ -0,0 +1,107 @@
+from sqlalchemy import select, func, or_, and_
+from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import Optional
+import numpy as np
+from . import models, rollups
+
+# Cash-flow projection for /analytics/forecast, read from monthly_rollups so the cost is
+# bounded by months x types in the history window, not by the number of transactions.
+# Every (kind, type) series is fitted at once: a shared least-squares solve gives each
+# series its linear trend, and month-of-year means of the detrended residuals give its
+# seasonal component.
+#
+# The projection starts with the current month, counting only what is still to come in
+# it: the month's actuals so far are part of the opening balance and are subtracted from
+# its projected total, so they are not counted twice.
+
+TYPE_MODELS = {"income": models.IncomeType, "expense": models.ExpenseType}
+# Below two full years every month-of-year would be estimated from a single value
+SEASONAL_MIN_MONTHS = 24
+
+def month_number(key: str) -> int:
+    year, month = key.split("-")
+    return int(year) * 12 + int(month) - 1
+
+def month_label(number: int) -> str:
+    return f"{number // 12:04d}-{number % 12 + 1:02d}"
+
+def _scope(user_id: int, group_id: Optional[int], project_id: Optional[int]):
+    # Same scopes as get_financial_summary (own entries, plus the group when given),
+    # OR-ed so entries that are both the user's and the group's count once
+    scopes = [and_(*rollups.scope_criteria(user_id=user_id, project_id=project_id))]
+    if group_id:
+        scopes.append(and_(*rollups.scope_criteria(group_id=group_id, project_id=project_id)))
+    return or_(*scopes)
+
+def fit(history: np.ndarray, horizon: int, first_month: int) -> tuple:
+    """Project `history` (series x months) `horizon` months ahead; returns (forecast, slope)."""
+    series, months = history.shape
+    t = np.arange(months, dtype=np.float64)
+    design = np.column_stack([np.ones(months), t])
+    # One pseudo-inverse serves every series: coefficients are (2 x series)
+    coefficients = np.linalg.pinv(design) @ history.T
+    future_t = np.arange(months, months + horizon, dtype=np.float64)
+    forecast = (np.column_stack([np.ones(horizon), future_t]) @ coefficients).T
+    if months >= SEASONAL_MIN_MONTHS:
+        residuals = history - (design @ coefficients).T
+        month_of_year = (first_month + np.arange(months)) % 12
+        onehot = np.eye(12)[month_of_year]
+        seasonal = (residuals @ onehot) / np.maximum(onehot.sum(axis=0), 1)
+        forecast += seasonal[:, (first_month + months + np.arange(horizon)) % 12]
+    return np.clip(forecast, 0, None), coefficients[1]
+
+def build_forecast(db: Session, user_id: int, months: int = 6, history_months: int = 36, group_id: Optional[int] = None, project_id: Optional[int] = None, as_of: Optional[datetime] = None) -> dict:
+    """Forecast for `months` months from the current one.
+
+    The opening balance includes the current month's actuals to date, and the first
+    month's values are what remains of it: projected total minus month-to-date, at least 0.
+    """
+    rollup = models.MonthlyRollup
+    current = month_number((as_of or datetime.utcnow()).strftime("%Y-%m"))
+    # The current month is still filling up, so the fitted history ends with the previous one
+    first = current - history_months
+    scope = _scope(user_id, group_id, project_id)
+
+    opening = {kind: total or 0.0 for kind, total in db.execute(
+        select(rollup.kind, func.sum(rollup.total)).where(scope, rollup.month <= month_label(current)).group_by(rollup.kind)
+    )}
+    opening_balance = opening.get("income", 0.0) - opening.get("expense", 0.0)
+
+    type_id = func.coalesce(rollup.type_id, 0)
+    rows = db.execute(select(rollup.kind, type_id, rollup.month, func.sum(rollup.total)).where(
+        scope, rollup.month >= month_label(first), rollup.month <= month_label(current)
+    ).group_by(rollup.kind, type_id, rollup.month)).all()
+
+    labels = [month_label(current + offset) for offset in range(months)]
+    result = {"months": labels, "history_months": history_months, "opening_balance": opening_balance, "by_type": []}
+    if not rows:
+        zeros = [0.0] * months
+        return {**result, "income": zeros, "expense": zeros, "net": zeros, "balance": [opening_balance] * months}
+
+    kinds, type_ids, month_keys, totals = zip(*rows)
+    keys = sorted(set(zip(kinds, type_ids)))
+    series_index = {key: index for index, key in enumerate(keys)}
+    # One column per history month plus a last one for the current month to date
+    history = np.zeros((len(keys), history_months + 1))
+    rows_series = np.fromiter((series_index[key] for key in zip(kinds, type_ids)), dtype=np.int64, count=len(rows))
+    rows_month = np.fromiter((month_number(key) - first for key in month_keys), dtype=np.int64, count=len(rows))
+    np.add.at(history, (rows_series, rows_month), np.array(totals, dtype=np.float64))
+
+    forecast, slopes = fit(history[:, :-1], months, first % 12)
+    forecast[:, 0] = np.clip(forecast[:, 0] - history[:, -1], 0, None)
+    is_income = np.array([kind == "income" for kind, _ in keys])
+    income = forecast[is_income].sum(axis=0)
+    expense = forecast[~is_income].sum(axis=0)
+    net = income - expense
+
+    names = {}
+    for kind, type_model in TYPE_MODELS.items():
+        ids = [type_id for series_kind, type_id in keys if series_kind == kind]
+        if ids:
+            names[kind] = dict(db.execute(select(type_model.id, type_model.name).where(type_model.id.in_(ids))).all())
+    result["by_type"] = [
+        {"kind": kind, "type_id": type_id, "name": names.get(kind, {}).get(type_id), "trend": float(slopes[index]), "values": forecast[index].tolist()}
+        for index, (kind, type_id) in enumerate(keys)
+    ]
+    return {**result, "income": income.tolist(), "expense": expense.tolist(), "net": net.tolist(), "balance": (opening_balance + np.cumsum(net)).tolist()}
\ No newline at end of file
@@ -0,0 +1,31 @@
+from fastapi import Request, Response
+from fastapi.responses import ORJSONResponse
+from typing import Optional
+import hashlib
+
+def make_etag(*parts) -> str:
+    return '"' + hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()[:32] + '"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [value.strip() for value in header.split(",")]
+    # If-None-Match uses weak comparison, so W/"x" matches "x"
+    return "*" in candidates or etag in (value[2:] if value.startswith("W/") else value for value in candidates)
+
+def conditional(request: Request, response: Response, etag: str, cache_control: str = "private, no-cache") -> Optional[Response]:
+    """Set ETag on `response`; return a 304 to send instead when the client already has this version."""
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+def fast_response(content, response: Response) -> ORJSONResponse:
+    """Serialize `content` with orjson, keeping headers already set on the injected `response`."""
+    fast = ORJSONResponse(content)
+    for name, value in response.headers.items():
+        if name != "content-length":
+            fast.headers[name] = value
+    return fast
\ No newline at end of file
@@ -0,0 +1,169 @@
+from sqlalchemy import select, update, or_, and_
+from sqlalchemy.orm import Session
+from email.mime.text import MIMEText
+from datetime import datetime, timedelta
+from typing import Optional
+from .database import SessionLocal
+from . import models
+import os
+import smtplib
+import threading
+import uuid
+from dotenv import load_dotenv
+
+load_dotenv()
+
+MAIL_SERVER = os.getenv("MAIL_SERVER")
+MAIL_PORT = int(os.getenv("MAIL_PORT", "587"))
+MAIL_USERNAME = os.getenv("MAIL_USERNAME")
+MAIL_PASSWORD = os.getenv("MAIL_PASSWORD")
+MAIL_FROM = os.getenv("MAIL_FROM")
+MAIL_TLS = os.getenv("MAIL_TLS", "True").lower() == "true"
+MAIL_SSL = os.getenv("MAIL_SSL", "False").lower() == "true"
+MAIL_OUTBOX_ENABLED = os.getenv("MAIL_OUTBOX_ENABLED", "true").lower() == "true"
+MAIL_BATCH_SIZE = int(os.getenv("MAIL_BATCH_SIZE", "50"))
+MAIL_POLL_SECONDS = float(os.getenv("MAIL_POLL_SECONDS", "5"))
+MAIL_MAX_ATTEMPTS = int(os.getenv("MAIL_MAX_ATTEMPTS", "8"))
+MAIL_RETRY_BASE_SECONDS = float(os.getenv("MAIL_RETRY_BASE_SECONDS", "30"))
+MAIL_RETRY_MAX_SECONDS = float(os.getenv("MAIL_RETRY_MAX_SECONDS", "3600"))
+MAIL_TIMEOUT_SECONDS = float(os.getenv("MAIL_TIMEOUT_SECONDS", "30"))
+# A row left in 'sending' this long belongs to a sender that died mid-batch and is picked up again
+MAIL_CLAIM_TIMEOUT_SECONDS = float(os.getenv("MAIL_CLAIM_TIMEOUT_SECONDS", "600"))
+
+def enqueue(db: Session, recipient: str, subject: str, body: str) -> models.EmailOutbox:
+    """Add a message to the outbox; it is committed (and later sent) with the caller's transaction."""
+    message = models.EmailOutbox(recipient=recipient, subject=subject, body=body, status="pending", attempts=0, next_attempt_at=datetime.utcnow())
+    db.add(message)
+    return message
+
+def retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=min(MAIL_RETRY_BASE_SECONDS * 2 ** (attempts - 1), MAIL_RETRY_MAX_SECONDS))
+
+def _due(now: datetime):
+    return or_(
+        and_(models.EmailOutbox.status == "pending", models.EmailOutbox.next_attempt_at <= now),
+        and_(models.EmailOutbox.status == "sending", models.EmailOutbox.claimed_at < now - timedelta(seconds=MAIL_CLAIM_TIMEOUT_SECONDS)),
+    )
+
+def claim_batch(db: Session, limit: int = MAIL_BATCH_SIZE):
+    # The conditional UPDATE is the claim: with several app processes draining the same
+    # outbox, a row another sender got to first no longer matches and is skipped.
+    now = datetime.utcnow()
+    ids = db.execute(select(models.EmailOutbox.id).where(_due(now)).order_by(models.EmailOutbox.id).limit(limit)).scalars().all()
+    if not ids:
+        return []
+    token = str(uuid.uuid4())
+    db.execute(update(models.EmailOutbox).where(models.EmailOutbox.id.in_(ids), _due(now)).values(status="sending", claimed_at=now, claim_token=token))
+    db.commit()
+    return db.query(models.EmailOutbox).filter(models.EmailOutbox.claim_token == token, models.EmailOutbox.status == "sending").order_by(models.EmailOutbox.id).all()
+
+class OutboxSender:
+    """Background thread that drains email_outbox over one reused SMTP connection."""
+
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="email-outbox", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def wake(self):
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                sent_any = self.drain_once()
+            except Exception as e:
+                print(f"Email outbox error: {e}")
+                sent_any = False
+            if not sent_any:
+                # Nothing due: release the SMTP connection rather than let the server time it out
+                self._disconnect()
+                self._wake.wait(MAIL_POLL_SECONDS)
+                self._wake.clear()
+        self._disconnect()
+
+    def drain_once(self) -> bool:
+        db = self.session_factory()
+        try:
+            batch = claim_batch(db)
+            for position, message in enumerate(batch):
+                try:
+                    smtp = self._connection()
+                except Exception as e:
+                    # Server unreachable: back off the whole batch instead of timing out once per message
+                    for pending in batch[position:]:
+                        self._failed(pending, e)
+                    db.commit()
+                    break
+                self._deliver(smtp, message)
+                db.commit()
+            return bool(batch)
+        finally:
+            db.close()
+
+    def _deliver(self, smtp: smtplib.SMTP, message: models.EmailOutbox):
+        mime = MIMEText(message.body)
+        mime["Subject"] = message.subject
+        mime["From"] = MAIL_FROM
+        mime["To"] = message.recipient
+        try:
+            smtp.send_message(mime)
+        except Exception as e:
+            # The connection may be what failed; the next message gets a fresh one
+            self._disconnect()
+            self._failed(message, e)
+            return
+        message.status = "sent"
+        message.sent_at = datetime.utcnow()
+        message.attempts += 1
+        message.last_error = None
+
+    def _failed(self, message: models.EmailOutbox, error: Exception):
+        message.attempts += 1
+        message.last_error = str(error)[:500]
+        message.claimed_at = None
+        message.claim_token = None
+        if message.attempts >= MAIL_MAX_ATTEMPTS:
+            message.status = "failed"
+        else:
+            message.status = "pending"
+            message.next_attempt_at = datetime.utcnow() + retry_delay(message.attempts)
+
+    def _connection(self) -> smtplib.SMTP:
+        if self._smtp is None:
+            if MAIL_SSL:
+                smtp = smtplib.SMTP_SSL(MAIL_SERVER, MAIL_PORT, timeout=MAIL_TIMEOUT_SECONDS)
+            else:
+                smtp = smtplib.SMTP(MAIL_SERVER, MAIL_PORT, timeout=MAIL_TIMEOUT_SECONDS)
+                if MAIL_TLS:
+                    smtp.starttls()
+            if MAIL_USERNAME and MAIL_PASSWORD:
+                smtp.login(MAIL_USERNAME, MAIL_PASSWORD)
+            self._smtp = smtp
+        return self._smtp
+
+    def _disconnect(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except Exception:
+                pass
+            self._smtp = None
+
+sender = OutboxSender()
\ No newline at end of file
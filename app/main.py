@@ -1,10 +1,32 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import auth, users, incomes, expenses, budgets, projects, tasks, groups, analytics, types
+from app.routers import auth, users, incomes, expenses, budgets, projects, tasks, groups, analytics, types, admin, async_api, search, dashboard, sync, push, metrics
+from app.database import DB_ASYNC
 from app.setup_db import setup_database
+from app import passwords, mailer, profiler
+from app.push import hub as push_hub
+from app.metrics import METRICS_ENABLED, MetricsMiddleware, flusher as metrics_flusher
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Background workers start here and stop in reverse order; the password pool spawns lazily
+    if mailer.MAIL_OUTBOX_ENABLED:
+        mailer.sender.start()
+    push_hub.start()
+    if METRICS_ENABLED:
+        metrics_flusher.start()
+    try:
+        yield
+    finally:
+        metrics_flusher.stop()
+        push_hub.stop()
+        mailer.sender.stop()
+        passwords.shutdown()
 
 # Initialize the FastAPI app
 app = FastAPI(
+    lifespan=lifespan,
     title="Finance App API",
     description="A FastAPI-based personal finance management system with multi-user support, income/expense tracking, budgeting, project management, and group sharing.",
     version="1.0.0"
@@ -17,9 +39,20 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "X-Query-Count", "Server-Timing"],
 )
 
-# Include routers
+# Per-request SQL counts, timings and N+1 warnings (opt-in)
+if profiler.SQL_PROFILER:
+    app.add_middleware(profiler.SQLProfilerMiddleware)
+
+# Prometheus /metrics; added last so its timings cover the other middleware too
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# Include routers; async handlers are matched first when enabled
+if DB_ASYNC:
+    app.include_router(async_api.router)
 app.include_router(auth.router)
 app.include_router(users.router)
 app.include_router(incomes.router)
@@ -30,6 +63,13 @@ app.include_router(tasks.router)
 app.include_router(groups.router)
 app.include_router(analytics.router)
 app.include_router(types.router)
+app.include_router(admin.router)
+app.include_router(search.router)
+app.include_router(dashboard.router)
+app.include_router(sync.router)
+app.include_router(push.router)
+if METRICS_ENABLED:
+    app.include_router(metrics.router)
 
 @app.get("/", summary="Root endpoint", description="Welcome message for the Finance App API.")
 def read_root():
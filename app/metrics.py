@@ -0,0 +1,323 @@
+from bisect import bisect_left
+from sqlalchemy import event
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import glob
+import json
+import os
+import threading
+import time
+from dotenv import load_dotenv
+from . import database
+from .principal_cache import principals
+from .push import hub
+
+load_dotenv()
+
+# Prometheus text-format metrics for GET /metrics. The hot path takes no locks: every
+# thread records into its own shard (a plain dict only that thread writes), and a scrape
+# sums the shards. Histograms have fixed buckets, so an observation is one bisect and
+# two additions. Pool, cache and connection figures are read from their owners at
+# scrape time instead of being recorded on every change.
+#
+# With several workers, set METRICS_MULTIPROC_DIR to a directory they share (emptied on
+# each deploy): every worker writes its snapshot there every METRICS_FLUSH_SECONDS and at
+# each scrape, and whichever worker answers /metrics sums them. Counters and histograms
+# of exited workers keep counting; their gauges are dropped once their file goes stale.
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+# When set, /metrics requires "Authorization: Bearer <METRICS_TOKEN>"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR") or os.getenv("PROMETHEUS_MULTIPROC_DIR")
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "5"))
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+OPERATIONS = ("SELECT", "INSERT", "UPDATE", "DELETE")
+
+Labels = Tuple[str, ...]
+# Counter/gauge samples are floats; histogram samples are [bucket counts..., +Inf count, sum]
+Samples = Dict[Labels, object]
+
+class Metric:
+    def __init__(self, registry: "Registry", kind: str, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = (), collect: Optional[Callable[[], Samples]] = None):
+        self.registry = registry
+        self.kind = kind
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # Collected metrics are read from elsewhere at scrape time instead of recorded
+        self.collect = collect
+        registry.metrics.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return (self.name, tuple(str(labels[name]) for name in self.labelnames))
+
+    def inc(self, amount: float = 1.0, **labels):
+        shard = self.registry.shard()
+        key = self._key(labels)
+        shard[key] = shard.get(key, 0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        # Gauges are sums of per-thread deltas, so a dec on another thread still balances an inc
+        self.inc(-amount, **labels)
+
+    def observe(self, value: float, **labels):
+        shard = self.registry.shard()
+        key = self._key(labels)
+        counts = shard.get(key)
+        if counts is None:
+            counts = shard[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        counts[bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+class Registry:
+    def __init__(self):
+        self.metrics: List[Metric] = []
+        self._shards: List[dict] = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def shard(self) -> dict:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            # Only a thread's first observation takes the lock
+            with self._lock:
+                self._shards.append(shard)
+            return shard
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = (), collect=None) -> Metric:
+        return Metric(self, "counter", name, documentation, labelnames, collect=collect)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = (), collect=None) -> Metric:
+        return Metric(self, "gauge", name, documentation, labelnames, collect=collect)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS, collect=None) -> Metric:
+        return Metric(self, "histogram", name, documentation, labelnames, buckets, collect)
+
+    def snapshot(self) -> Dict[str, Samples]:
+        """This process's current values, by metric name."""
+        result: Dict[str, Samples] = {metric.name: {} for metric in self.metrics}
+        with self._lock:
+            shards = list(self._shards)
+        for shard in shards:
+            # dict.copy() is atomic under the GIL, so the owning thread can keep writing
+            for (name, labels), value in shard.copy().items():
+                _add(result[name], labels, value)
+        for metric in self.metrics:
+            if metric.collect is not None:
+                try:
+                    result[metric.name] = metric.collect()
+                except Exception:
+                    result[metric.name] = {}
+        return result
+
+    def write(self, directory: str):
+        """Publish this process's snapshot for the other workers (atomic replace)."""
+        path = os.path.join(directory, f"metrics-{os.getpid()}.json")
+        data = {name: [[list(labels), value] for labels, value in samples.items()] for name, samples in self.snapshot().items()}
+        with open(path + ".tmp", "w") as file:
+            json.dump(data, file)
+        os.replace(path + ".tmp", path)
+
+    def aggregate(self, directory: str) -> Dict[str, Samples]:
+        """Sum every worker's snapshot in `directory`; gauges only from workers still writing."""
+        self.write(directory)
+        kinds = {metric.name: metric.kind for metric in self.metrics}
+        result: Dict[str, Samples] = {name: {} for name in kinds}
+        stale_before = time.time() - max(METRICS_FLUSH_SECONDS * 3, 15)
+        for path in glob.glob(os.path.join(directory, "metrics-*.json")):
+            try:
+                live = os.path.getmtime(path) >= stale_before
+                with open(path) as file:
+                    data = json.load(file)
+            except (OSError, ValueError):
+                continue  # Replaced or removed mid-read
+            for name, samples in data.items():
+                if name not in kinds or (kinds[name] == "gauge" and not live):
+                    continue
+                for labels, value in samples:
+                    _add(result[name], tuple(labels), value)
+        return result
+
+    def render(self, directory: Optional[str] = None) -> str:
+        values = self.aggregate(directory) if directory else self.snapshot()
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for labels, value in sorted(values.get(metric.name, {}).items()):
+                pairs = list(zip(metric.labelnames, labels))
+                if metric.kind != "histogram":
+                    lines.append(f"{metric.name}{_labels(pairs)} {_number(value)}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(metric.buckets + (float("inf"),), value[:-1]):
+                    cumulative += count
+                    lines.append(f"{metric.name}_bucket{_labels(pairs + [('le', '+Inf' if bound == float('inf') else _number(bound))])} {_number(cumulative)}")
+                lines.append(f"{metric.name}_sum{_labels(pairs)} {_number(value[-1])}")
+                lines.append(f"{metric.name}_count{_labels(pairs)} {_number(cumulative)}")
+        return "\n".join(lines) + "\n"
+
+def _add(samples: Samples, labels: Labels, value):
+    current = samples.get(labels)
+    if current is None:
+        samples[labels] = list(value) if isinstance(value, list) else value
+    elif isinstance(value, list):
+        if len(current) == len(value):
+            samples[labels] = [a + b for a, b in zip(current, value)]
+    else:
+        samples[labels] = current + value
+
+def _number(value) -> str:
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(pairs: list) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+registry = Registry()
+
+http_requests = registry.counter("http_requests_total", "HTTP requests handled, by method, route template and status code.", ("method", "route", "status"))
+http_duration = registry.histogram("http_request_duration_seconds", "HTTP request latency in seconds, by method and route template.", ("method", "route"))
+http_in_progress = registry.gauge("http_requests_in_progress", "HTTP requests currently being handled, by method.", ("method",))
+auth_failures = registry.counter("auth_failures_total", "Rejected logins and credentials, by reason.", ("reason",))
+db_queries = registry.counter("db_queries_total", "SQL statements executed, by operation.", ("operation",))
+db_query_duration = registry.histogram("db_query_duration_seconds", "SQL statement execution time in seconds, by operation.", ("operation",), QUERY_BUCKETS)
+catalog_cache = registry.counter("catalog_cache_requests_total", "Type catalog cache lookups, by result (hit or miss).", ("result",))
+
+def _pools() -> List[tuple]:
+    pools = [("sync", database.engine, database.pool_metrics)]
+    if database.async_engine is not None:
+        pools.append(("async", database.async_engine.sync_engine, database.async_pool_metrics))
+    return pools
+
+def _pool_state() -> Samples:
+    samples = {}
+    for name, engine, pool_metrics in _pools():
+        stats = pool_metrics.snapshot(engine.pool)
+        for state in ("checked_out", "checked_in", "overflow"):
+            if state in stats:
+                samples[(name, state)] = stats[state]
+    return samples
+
+def _pool_counter(field: str) -> Callable[[], Samples]:
+    return lambda: {(name,): pool_metrics.snapshot(engine.pool)[field] for name, engine, pool_metrics in _pools()}
+
+def _pool_wait() -> Samples:
+    samples = {}
+    for name, engine, pool_metrics in _pools():
+        wait = pool_metrics.snapshot(engine.pool)["wait_ms"]
+        samples[(name,)] = list(wait["buckets"].values()) + [wait["sum"] / 1000]
+    return samples
+
+registry.gauge("db_pool_connections", "Pooled database connections, by engine and state (checked_out, checked_in, overflow).", ("engine", "state"), collect=_pool_state)
+registry.gauge("db_pool_size", "Configured pool size, by engine.", ("engine",), collect=lambda: {(name,): engine.pool.size() for name, engine, _ in _pools() if hasattr(engine.pool, "size")})
+for field, documentation in (
+    ("checkouts", "Connections checked out of the pool."),
+    ("connects", "New database connections opened."),
+    ("overflow_events", "Connections opened beyond pool_size."),
+    ("timeouts", "Checkouts that timed out waiting for a connection."),
+    ("invalidations", "Connections invalidated after errors."),
+):
+    registry.counter(f"db_pool_{field}_total", f"{documentation} By engine.", ("engine",), collect=_pool_counter(field))
+# pool_metrics buckets are in milliseconds; the exposition uses seconds
+registry.histogram("db_pool_wait_seconds", "Time spent waiting for a pooled connection, by engine.", ("engine",), tuple(bound / 1000 for bound in database.pool_metrics.wait_ms.bounds), collect=_pool_wait)
+for field in ("hits", "misses", "evictions"):
+    registry.counter(f"principal_cache_{field}_total", f"Authenticated-user cache {field}.", collect=lambda field=field: {(): principals.stats()[field]})
+registry.gauge("principal_cache_entries", "Users held in the authenticated-user cache.", collect=lambda: {(): principals.stats()["size"]})
+registry.gauge("push_connections", "Open /push WebSocket and SSE connections.", collect=lambda: {(): hub.connections})
+
+def _operation(statement: str) -> str:
+    operation = statement.lstrip()[:6].upper()
+    return operation if operation in OPERATIONS else "OTHER"
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_started = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    operation = _operation(statement)
+    db_queries.inc(operation=operation)
+    db_query_duration.observe(time.perf_counter() - context._metrics_started, operation=operation)
+
+if METRICS_ENABLED:
+    for target in [database.engine] + ([database.async_engine.sync_engine] if database.async_engine is not None else []):
+        event.listen(target, "before_cursor_execute", _before_cursor_execute)
+        event.listen(target, "after_cursor_execute", _after_cursor_execute)
+
+class MetricsMiddleware:
+    """Counts and times every HTTP request by its route template (not the raw path)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        method = scope["method"]
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_in_progress.inc(method=method)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_in_progress.dec(method=method)
+            # Unmatched paths share one label, so scanners cannot blow up the series count
+            route = scope.get("route")
+            path = route.path if route is not None else "unmatched"
+            http_requests.inc(method=method, route=path, status=status)
+            http_duration.observe(elapsed, method=method, route=path)
+
+class Flusher:
+    """Writes this worker's snapshot to METRICS_MULTIPROC_DIR in the background."""
+
+    def __init__(self, directory: Optional[str], interval: float):
+        self.directory = directory
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if not self.directory or self._thread is not None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="metrics-flusher", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                registry.write(self.directory)
+            except OSError as e:
+                print(f"Metrics flush error: {e}")
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        # Final counters stay behind for the surviving workers to keep summing
+        registry.write(self.directory)
+
+flusher = Flusher(METRICS_MULTIPROC_DIR, METRICS_FLUSH_SECONDS)
+
+def render() -> str:
+    return registry.render(METRICS_MULTIPROC_DIR)
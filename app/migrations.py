@@ -0,0 +1,103 @@
+from sqlalchemy import select, update, inspect, func, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from datetime import datetime
+from .database import engine
+from . import models, rollups, search
+
+# Versioned schema changes for databases created before the corresponding model change.
+# Fresh databases get the same objects from Base.metadata.create_all, so every step
+# must be idempotent (create with checkfirst, skip columns that already exist).
+
+def _index(table, name: str):
+    return next(index for index in table.indexes if index.name == name)
+
+def _has_index(conn: Connection, index) -> bool:
+    # SQLite reflection skips expression indexes, so ask its catalog directly
+    if conn.dialect.name == "sqlite":
+        return conn.execute(text("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = :name"), {"name": index.name}).first() is not None
+    return any(existing["name"] == index.name for existing in inspect(conn).get_indexes(index.table.name))
+
+def _create_indexes(conn: Connection, *indexes):
+    # Only the indexes a step names: the models also carry indexes on columns that later steps add
+    for index in indexes:
+        if not _has_index(conn, index):
+            index.create(conn)
+
+def _add_columns(conn: Connection, table, *names):
+    existing = {column["name"] for column in inspect(conn).get_columns(table.name)}
+    for name in names:
+        if name not in existing:
+            column = table.c[name]
+            conn.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {name} {column.type.compile(dialect=conn.dialect)}")
+
+def _hot_path_indexes(conn: Connection):
+    _create_indexes(conn, *(
+        _index(table, name) for table, names in (
+            (models.Income.__table__, ("ix_incomes_user_deleted_date", "ix_incomes_group_deleted_date", "ix_incomes_project_deleted")),
+            (models.Expense.__table__, ("ix_expenses_user_deleted_date", "ix_expenses_group_deleted_date", "ix_expenses_project_deleted")),
+            (models.Budget.__table__, ("ix_budgets_user_deleted", "ix_budgets_group_deleted", "ix_budgets_project_deleted")),
+            (models.Project.__table__, ("ix_projects_user_deleted", "ix_projects_group_deleted")),
+            (models.Task.__table__, ("ix_tasks_project_deleted",)),
+            (models.user_group, ("ix_user_group_user_group",)),
+            (models.group_shares, ("ix_group_shares_user_group",)),
+        ) for name in names
+    ))
+
+def _monthly_rollups(conn: Connection):
+    # create() makes the table's own indexes along with a new table
+    models.MonthlyRollup.__table__.create(conn, checkfirst=True)
+    rollups.rebuild(Session(bind=conn))
+
+def _email_outbox(conn: Connection):
+    models.EmailOutbox.__table__.create(conn, checkfirst=True)
+
+def _data_versions(conn: Connection):
+    models.data_versions.create(conn, checkfirst=True)
+
+def _search_index(conn: Connection):
+    search.rebuild(conn)
+
+def _unique_rollup_key(conn: Connection):
+    # Racing writers may already have split a key over several rows; rebuilding merges them
+    rollups.rebuild(Session(bind=conn))
+    _create_indexes(conn, _index(models.MonthlyRollup.__table__, "ux_monthly_rollups_key"))
+
+SYNCED_MODELS = (
+    models.Income, models.Expense, models.Budget, models.Project, models.Task, models.Group,
+    models.IncomeType, models.ExpenseType, models.BudgetCategory,
+)
+
+def _updated_at(conn: Connection):
+    now = datetime.utcnow()
+    for model in SYNCED_MODELS:
+        table = model.__table__
+        _add_columns(conn, table, "updated_at")
+        # Existing rows count as changed now (or when they were deleted), so every client resyncs them once
+        conn.execute(update(table).where(table.c.updated_at.is_(None)).values(updated_at=func.coalesce(table.c.deleted_at, now)))
+        _create_indexes(conn, _index(table, f"ix_{table.name}_updated_at"))
+
+MIGRATIONS = [
+    (1, "Composite indexes for list, summary and permission lookups", _hot_path_indexes),
+    (2, "Monthly income/expense rollups", _monthly_rollups),
+    (3, "Email outbox", _email_outbox),
+    (4, "Per-user and per-group data versions", _data_versions),
+    (5, "Full-text search index", _search_index),
+    (6, "updated_at change timestamps", _updated_at),
+    (7, "Unique monthly rollup key", _unique_rollup_key),
+]
+
+def run_migrations(bind=engine):
+    models.schema_migrations.create(bind, checkfirst=True)
+    with bind.begin() as conn:
+        applied = set(conn.execute(select(models.schema_migrations.c.version)).scalars())
+    for version, description, upgrade in MIGRATIONS:
+        if version in applied:
+            continue
+        with bind.begin() as conn:
+            upgrade(conn)
+            conn.execute(models.schema_migrations.insert().values(version=version, description=description, applied_at=datetime.utcnow()))
+        print(f"Applied migration {version}: {description}")
+
+if __name__ == "__main__":
+    run_migrations()
@@ -1,17 +1,32 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean, Table
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean, Table, Index, Text, func, literal_column
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .database import Base
 
 user_group = Table('user_group', Base.metadata,
     Column('user_id', Integer, ForeignKey('users.id')),
-    Column('group_id', Integer, ForeignKey('groups.id'))
+    Column('group_id', Integer, ForeignKey('groups.id')),
+    Index('ix_user_group_user_group', 'user_id', 'group_id')
 )
 
 group_shares = Table('group_shares', Base.metadata,
     Column('group_id', Integer, ForeignKey('groups.id'), primary_key=True),
     Column('user_id', Integer, ForeignKey('users.id'), primary_key=True),
-    Column('permission', String(20), default="view")  # 'view' or 'edit'
+    Column('permission', String(20), default="view"),  # 'view' or 'edit'
+    Index('ix_group_shares_user_group', 'user_id', 'group_id')
+)
+
+schema_migrations = Table('schema_migrations', Base.metadata,
+    Column('version', Integer, primary_key=True, autoincrement=False),
+    Column('description', String(200)),
+    Column('applied_at', DateTime, default=datetime.utcnow)
+)
+
+# Change counter per user and per group, bumped in the writing transaction (see versions.py)
+data_versions = Table('data_versions', Base.metadata,
+    Column('scope', String(10), primary_key=True),
+    Column('scope_id', Integer, primary_key=True, autoincrement=False),
+    Column('version', Integer, nullable=False, default=0)
 )
 
 class IncomeType(Base):
@@ -21,6 +36,7 @@ class IncomeType(Base):
     name = Column(String(50), unique=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     deleted_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
     incomes = relationship("Income", back_populates="type")
     owner = relationship("User")
@@ -32,6 +48,7 @@ class ExpenseType(Base):
     name = Column(String(50), unique=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     deleted_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
     expenses = relationship("Expense", back_populates="type")
     owner = relationship("User")
@@ -43,6 +60,7 @@ class BudgetCategory(Base):
     name = Column(String(50), unique=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     deleted_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
     budgets = relationship("Budget", back_populates="category")
     owner = relationship("User")
@@ -84,6 +102,7 @@ class Group(Base):
     description = Column(String(200), nullable=True)
     owner_id = Column(Integer, ForeignKey("users.id"))
     deleted_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
     owner = relationship("User", back_populates="owned_groups")
     members = relationship("User", secondary=user_group, back_populates="groups")
@@ -94,6 +113,11 @@ class Group(Base):
 
 class Income(Base):
     __tablename__ = "incomes"
+    __table_args__ = (
+        Index('ix_incomes_user_deleted_date', 'user_id', 'deleted_at', 'date'),
+        Index('ix_incomes_group_deleted_date', 'group_id', 'deleted_at', 'date'),
+        Index('ix_incomes_project_deleted', 'project_id', 'deleted_at'),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     amount = Column(Float)
@@ -104,6 +128,7 @@ class Income(Base):
     group_id = Column(Integer, ForeignKey("groups.id"), nullable=True)
     project_id = Column(Integer, ForeignKey("projects.id"), nullable=True)
     deleted_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
     owner = relationship("User", back_populates="incomes")
     group = relationship("Group", back_populates="incomes")
@@ -112,6 +137,11 @@ class Income(Base):
 
 class Expense(Base):
     __tablename__ = "expenses"
+    __table_args__ = (
+        Index('ix_expenses_user_deleted_date', 'user_id', 'deleted_at', 'date'),
+        Index('ix_expenses_group_deleted_date', 'group_id', 'deleted_at', 'date'),
+        Index('ix_expenses_project_deleted', 'project_id', 'deleted_at'),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     amount = Column(Float)
@@ -122,6 +152,7 @@ class Expense(Base):
     group_id = Column(Integer, ForeignKey("groups.id"), nullable=True)
     project_id = Column(Integer, ForeignKey("projects.id"), nullable=True)
     deleted_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
     owner = relationship("User", back_populates="expenses")
     group = relationship("Group", back_populates="expenses")
@@ -130,6 +161,11 @@ class Expense(Base):
 
 class Budget(Base):
     __tablename__ = "budgets"
+    __table_args__ = (
+        Index('ix_budgets_user_deleted', 'user_id', 'deleted_at'),
+        Index('ix_budgets_group_deleted', 'group_id', 'deleted_at'),
+        Index('ix_budgets_project_deleted', 'project_id', 'deleted_at'),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     category_id = Column(Integer, ForeignKey("budget_categories.id"))
@@ -139,6 +175,7 @@ class Budget(Base):
     group_id = Column(Integer, ForeignKey("groups.id"), nullable=True)
     project_id = Column(Integer, ForeignKey("projects.id"), nullable=True)
     deleted_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
     owner = relationship("User", back_populates="budgets")
     group = relationship("Group", back_populates="budgets")
@@ -147,6 +184,10 @@ class Budget(Base):
 
 class Project(Base):
     __tablename__ = "projects"
+    __table_args__ = (
+        Index('ix_projects_user_deleted', 'user_id', 'deleted_at'),
+        Index('ix_projects_group_deleted', 'group_id', 'deleted_at'),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100))
@@ -157,6 +198,7 @@ class Project(Base):
     user_id = Column(Integer, ForeignKey("users.id"))
     group_id = Column(Integer, ForeignKey("groups.id"), nullable=True)
     deleted_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
     owner = relationship("User", back_populates="projects")
     group = relationship("Group", back_populates="projects")
@@ -167,6 +209,9 @@ class Project(Base):
 
 class Task(Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        Index('ix_tasks_project_deleted', 'project_id', 'deleted_at'),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100))
@@ -177,6 +222,56 @@ class Task(Base):
     project_id = Column(Integer, ForeignKey("projects.id"))
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     deleted_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
     project = relationship("Project", back_populates="tasks")
-    assignee = relationship("User", back_populates="tasks")
\ No newline at end of file
+    assignee = relationship("User", back_populates="tasks")
+
+class MonthlyRollup(Base):
+    __tablename__ = "monthly_rollups"
+    __table_args__ = (
+        Index('ix_monthly_rollups_user_kind_month', 'user_id', 'kind', 'month'),
+        Index('ix_monthly_rollups_group_kind_month', 'group_id', 'kind', 'month'),
+        Index('ix_monthly_rollups_project_kind_month', 'project_id', 'kind', 'month'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String(10))  # 'income' or 'expense'
+    user_id = Column(Integer, ForeignKey("users.id"))
+    group_id = Column(Integer, ForeignKey("groups.id"), nullable=True)
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=True)
+    type_id = Column(Integer)
+    month = Column(String(7), nullable=True)  # 'YYYY-MM'
+    total = Column(Float, default=0)
+    count = Column(Integer, default=0)
+
+# One row per rollup key. NULLs never collide in a unique index, so the optional parts are
+# coalesced; the literals are inline so queries can repeat the expressions and use the index.
+MONTHLY_ROLLUP_KEY = (
+    MonthlyRollup.kind,
+    MonthlyRollup.user_id,
+    func.coalesce(MonthlyRollup.group_id, literal_column("0")),
+    func.coalesce(MonthlyRollup.project_id, literal_column("0")),
+    func.coalesce(MonthlyRollup.type_id, literal_column("0")),
+    func.coalesce(MonthlyRollup.month, literal_column("''")),
+)
+Index('ux_monthly_rollups_key', *MONTHLY_ROLLUP_KEY, unique=True)
+
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        Index('ix_email_outbox_status_next_attempt', 'status', 'next_attempt_at'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    recipient = Column(String(100))
+    subject = Column(String(200))
+    body = Column(Text)
+    status = Column(String(10), default="pending")  # 'pending', 'sending', 'sent' or 'failed'
+    attempts = Column(Integer, default=0)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow)
+    claimed_at = Column(DateTime, nullable=True)
+    claim_token = Column(String(36), nullable=True)
+    last_error = Column(String(500), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
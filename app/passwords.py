@@ -0,0 +1,67 @@
+from concurrent.futures import Executor, ProcessPoolExecutor
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from typing import Optional, Tuple
+import multiprocessing
+import os
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", str(max(PASSWORD_HASH_WORKERS, 1) * 4)))
+
+# min/max pin the cost factor, so hashes made with any other cost are flagged for rehash on login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+def _verify_and_update(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return pwd_context.verify_and_update(password, hashed_password)
+
+_executor: Optional[Executor] = None
+_executor_lock = threading.Lock()
+_pending = threading.BoundedSemaphore(PASSWORD_HASH_MAX_PENDING)
+
+def _get_executor() -> Executor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn keeps the workers independent of the server's threads and open sockets
+            _executor = ProcessPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _executor
+
+def _run(fn, *args):
+    # bcrypt holds the GIL for its whole run, so it goes to worker processes; requests beyond
+    # PASSWORD_HASH_MAX_PENDING in flight are turned away instead of queueing behind each other
+    if not _pending.acquire(blocking=False):
+        raise HTTPException(status_code=429, detail="Too many concurrent password operations, try again shortly", headers={"Retry-After": "1"})
+    try:
+        if PASSWORD_HASH_WORKERS <= 0:
+            return fn(*args)
+        return _get_executor().submit(fn, *args).result()
+    finally:
+        _pending.release()
+
+def hash_password(password: str) -> str:
+    return _run(_hash, password)
+
+def verify_password(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Return (valid, new_hash); new_hash is set when the stored hash should be replaced."""
+    return _run(_verify_and_update, password, hashed_password)
+
+def shutdown():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
\ No newline at end of file
@@ -0,0 +1,52 @@
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import Session
+from typing import Dict, List
+from . import models
+
+class PermissionContext:
+    """Effective group permissions of a single user, resolved once per request.
+
+    `groups` maps group_id to "owner", "edit" or "view" for every live group the
+    user owns, is a member of or has been shared with.
+    """
+
+    def __init__(self, user_id: int, groups: Dict[int, str]):
+        self.user_id = user_id
+        self.groups = groups
+
+    @property
+    def group_ids(self) -> List[int]:
+        return list(self.groups)
+
+    def has(self, group_id: int, required_permission: str = "view") -> bool:
+        permission = self.groups.get(group_id)
+        if permission is None:
+            return False
+        return required_permission == "view" or permission in ("owner", "edit")
+
+def permission_statement(user_id: int):
+    shares = models.group_shares
+    members = models.user_group
+    return select(models.Group.id, models.Group.owner_id, shares.c.permission, members.c.user_id).outerjoin(
+        shares, and_(shares.c.group_id == models.Group.id, shares.c.user_id == user_id)
+    ).outerjoin(
+        members, and_(members.c.group_id == models.Group.id, members.c.user_id == user_id)
+    ).where(
+        models.Group.deleted_at.is_(None),
+        or_(models.Group.owner_id == user_id, shares.c.user_id.isnot(None), members.c.user_id.isnot(None))
+    )
+
+def build_permissions(user_id: int, rows) -> PermissionContext:
+    groups = {}
+    for group_id, owner_id, share_permission, member_id in rows:
+        # Same precedence as crud.check_group_permission: owner, then explicit share, then membership
+        if owner_id == user_id:
+            groups[group_id] = "owner"
+        elif share_permission:
+            groups[group_id] = "edit" if share_permission == "edit" else "view"
+        else:
+            groups[group_id] = "edit"
+    return PermissionContext(user_id, groups)
+
+def load_permissions(db: Session, user_id: int) -> PermissionContext:
+    return build_permissions(user_id, db.execute(permission_statement(user_id)).all())
@@ -0,0 +1,118 @@
+from bisect import bisect_left
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+from typing import List
+import threading
+import time
+
+WAIT_BUCKETS_MS = [1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+LIFETIME_BUCKETS_SECONDS = [1, 10, 60, 300, 900, 1800, 3600, 14400, 86400]
+
+class Histogram:
+    def __init__(self, bounds: List[float]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def snapshot(self) -> dict:
+        labels = [f"le_{bound}" for bound in self.bounds] + ["le_inf"]
+        return {"buckets": dict(zip(labels, self.counts)), "count": self.count, "sum": round(self.total, 3)}
+
+class PoolMetrics:
+    """Connection pool counters for one engine, fed by pool events and InstrumentedQueuePool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.connects = 0
+        self.overflow_events = 0
+        self.timeouts = 0
+        self.invalidations = 0
+        self.wait_ms = Histogram(WAIT_BUCKETS_MS)
+        self.lifetime_seconds = Histogram(LIFETIME_BUCKETS_SECONDS)
+
+    def record_wait(self, elapsed_ms: float, timed_out: bool = False):
+        with self._lock:
+            self.wait_ms.observe(elapsed_ms)
+            if timed_out:
+                self.timeouts += 1
+
+    def _on_connect(self, pool, connection_record):
+        connection_record.info["connected_at"] = time.monotonic()
+        with self._lock:
+            self.connects += 1
+            # QueuePool.overflow() turns positive once connections beyond pool_size are opened
+            if isinstance(pool, QueuePool) and pool.overflow() > 0:
+                self.overflow_events += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self._lock:
+            self.checkouts += 1
+
+    def _on_close(self, dbapi_connection, connection_record):
+        connected_at = connection_record.info.pop("connected_at", None)
+        if connected_at is not None:
+            with self._lock:
+                self.lifetime_seconds.observe(time.monotonic() - connected_at)
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.invalidations += 1
+
+    def attach(self, engine):
+        # Listening on the engine keeps the handlers when engine.dispose() replaces the pool
+        event.listen(engine, "connect", lambda dbapi_connection, record: self._on_connect(engine.pool, record))
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "close", self._on_close)
+        event.listen(engine, "invalidate", self._on_invalidate)
+
+    def snapshot(self, pool) -> dict:
+        with self._lock:
+            data = {
+                "pool_class": type(pool).__name__,
+                "checkouts": self.checkouts,
+                "connects": self.connects,
+                "overflow_events": self.overflow_events,
+                "timeouts": self.timeouts,
+                "invalidations": self.invalidations,
+                "wait_ms": self.wait_ms.snapshot(),
+                "connection_lifetime_seconds": self.lifetime_seconds.snapshot(),
+            }
+        if isinstance(pool, QueuePool):
+            data.update(size=pool.size(), checked_out=pool.checkedout(), checked_in=pool.checkedin(), overflow=max(pool.overflow(), 0))
+        return data
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that reports how long each checkout waited for a free connection."""
+
+    metrics: PoolMetrics = None
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            if self.metrics is not None:
+                self.metrics.record_wait((time.perf_counter() - started) * 1000, timed_out=True)
+            raise
+        if self.metrics is not None:
+            self.metrics.record_wait((time.perf_counter() - started) * 1000)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+def instrument(engine) -> PoolMetrics:
+    metrics = PoolMetrics()
+    if isinstance(engine.pool, InstrumentedQueuePool):
+        engine.pool.metrics = metrics
+    metrics.attach(engine)
+    return metrics
@@ -0,0 +1,192 @@
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from starlette.datastructures import MutableHeaders
+from sqlalchemy import event
+from typing import Dict, List
+import contextvars
+import logging
+import os
+import re
+import threading
+import time
+from dotenv import load_dotenv
+from .database import engine, async_engine
+
+load_dotenv()
+
+# Opt-in per-request SQL profiling (SQL_PROFILER=true). Engine cursor events count every
+# statement a request runs, its time in the database and how often each statement shape
+# repeats; the middleware reports them in X-Query-Count and Server-Timing headers and logs
+# requests that are slow, exceed their query budget or repeat one shape (an N+1).
+#
+# With SQL_PROFILER_STRICT=true the statement that breaks a budget or the repeat limit
+# raises QueryBudgetExceeded instead, so the request fails and a test client sees it.
+
+SQL_PROFILER = os.getenv("SQL_PROFILER", "false").lower() == "true"
+SQL_PROFILER_STRICT = os.getenv("SQL_PROFILER_STRICT", "false").lower() == "true"
+SQL_PROFILER_SLOW_MS = float(os.getenv("SQL_PROFILER_SLOW_MS", "500"))
+# Default query budget per request, and per-route overrides: "GET /expenses/=5,GET /dashboard/=30"
+SQL_PROFILER_MAX_QUERIES = int(os.getenv("SQL_PROFILER_MAX_QUERIES", "50"))
+SQL_PROFILER_REPEAT_THRESHOLD = int(os.getenv("SQL_PROFILER_REPEAT_THRESHOLD", "10"))
+QUERY_BUDGETS: Dict[str, int] = {
+    route.strip(): int(budget)
+    for route, _, budget in (item.rpartition("=") for item in os.getenv("SQL_QUERY_BUDGETS", "").split(",") if item.strip())
+}
+
+logger = logging.getLogger(__name__)
+
+LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|%\(\w+\)s|%s|:\w+")
+IN_LISTS = re.compile(r"\bIN \(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+WHITESPACE = re.compile(r"\s+")
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+def fingerprint(statement: str) -> str:
+    """Statement shape: literals and bound parameters become ?, IN lists collapse to (?...)."""
+    shape = LITERALS.sub("?", WHITESPACE.sub(" ", statement).strip())
+    return IN_LISTS.sub("IN (?...)", shape)
+
+class RequestProfile:
+    def __init__(self, scope: dict, strict: bool = False, max_queries: int = SQL_PROFILER_MAX_QUERIES, repeat_threshold: int = SQL_PROFILER_REPEAT_THRESHOLD):
+        # The router adds the matched route to this same scope, so the budget is looked up lazily
+        self.scope = scope
+        self.strict = strict
+        self.max_queries = max_queries
+        self.repeat_threshold = repeat_threshold
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.shapes: Counter = Counter()
+        self.shape_seconds: Dict[str, float] = defaultdict(float)
+        self.started = time.perf_counter()
+        self.elapsed = None
+        self.status = None
+
+    @property
+    def route(self) -> str:
+        route = self.scope.get("route")
+        return f"{self.scope['method']} {route.path if route is not None else self.scope['path']}"
+
+    @property
+    def budget(self) -> int:
+        return QUERY_BUDGETS.get(self.route, self.max_queries)
+
+    def start_query(self, statement: str) -> str:
+        shape = fingerprint(statement)
+        self.queries += 1
+        self.shapes[shape] += 1
+        if self.strict:
+            if self.queries > self.budget:
+                raise QueryBudgetExceeded(f"{self.route} ran more than {self.budget} queries; last: {shape}")
+            if self.shapes[shape] > self.repeat_threshold:
+                raise QueryBudgetExceeded(f"{self.route} ran the same statement more than {self.repeat_threshold} times (N+1?): {shape}")
+        return shape
+
+    def end_query(self, shape: str, seconds: float):
+        self.db_seconds += seconds
+        self.shape_seconds[shape] += seconds
+
+    def repeated(self) -> List[tuple]:
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= self.repeat_threshold]
+
+    def server_timing(self) -> str:
+        app_ms = (time.perf_counter() - self.started) * 1000
+        return f'db;dur={self.db_seconds * 1000:.1f};desc="{self.queries} queries", app;dur={app_ms:.1f}'
+
+    def problems(self, slow_ms: float) -> List[str]:
+        problems = []
+        if self.elapsed is not None and self.elapsed * 1000 > slow_ms:
+            problems.append(f"slow ({self.elapsed * 1000:.0f}ms > {slow_ms:.0f}ms)")
+        if self.queries > self.budget:
+            problems.append(f"over query budget ({self.queries} > {self.budget})")
+        if self.repeated():
+            problems.append("repeated statements")
+        return problems
+
+    def describe(self, limit: int = 5) -> str:
+        # Repeated shapes are the likely N+1s; otherwise show where the database time went
+        shapes = self.repeated() or sorted(self.shapes.items(), key=lambda item: -self.shape_seconds[item[0]])
+        lines = [f"  {count}x {self.shape_seconds[shape] * 1000:.1f}ms {shape[:300]}" for shape, count in shapes[:limit]]
+        return "\n".join(lines)
+
+_current: contextvars.ContextVar = contextvars.ContextVar("sql_profile", default=None)
+_captures: List[list] = []
+_lock = threading.Lock()
+_installed = False
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current.get()
+    if profile is not None:
+        context._profile_shape = profile.start_query(statement)
+        context._profile_started = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current.get()
+    started = getattr(context, "_profile_started", None)
+    if profile is not None and started is not None:
+        profile.end_query(context._profile_shape, time.perf_counter() - started)
+
+def install():
+    """Listen on the app's engines (idempotent); nothing is hooked until profiling is used."""
+    global _installed
+    with _lock:
+        if _installed:
+            return
+        for target in [engine] + ([async_engine.sync_engine] if async_engine is not None else []):
+            event.listen(target, "before_cursor_execute", _before_cursor_execute)
+            event.listen(target, "after_cursor_execute", _after_cursor_execute)
+        _installed = True
+
+@contextmanager
+def capture():
+    """Collect the profile of every request that finishes inside the block (tests, benchmarks)."""
+    profiles: List[RequestProfile] = []
+    with _lock:
+        _captures.append(profiles)
+    try:
+        yield profiles
+    finally:
+        with _lock:
+            _captures.remove(profiles)
+
+class SQLProfilerMiddleware:
+    def __init__(self, app, strict: bool = SQL_PROFILER_STRICT, slow_ms: float = SQL_PROFILER_SLOW_MS, max_queries: int = SQL_PROFILER_MAX_QUERIES, repeat_threshold: int = SQL_PROFILER_REPEAT_THRESHOLD):
+        self.app = app
+        self.strict = strict
+        self.slow_ms = slow_ms
+        self.max_queries = max_queries
+        self.repeat_threshold = repeat_threshold
+        install()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        profile = RequestProfile(scope, self.strict, self.max_queries, self.repeat_threshold)
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                # Streamed bodies can run more queries after this; the log line has the final count
+                headers = MutableHeaders(scope=message)
+                headers["X-Query-Count"] = str(profile.queries)
+                headers["Server-Timing"] = profile.server_timing()
+            await send(message)
+
+        token = _current.set(profile)
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            _current.reset(token)
+            profile.elapsed = time.perf_counter() - profile.started
+            self.report(profile)
+
+    def report(self, profile: RequestProfile):
+        with _lock:
+            for profiles in _captures:
+                profiles.append(profile)
+        problems = profile.problems(self.slow_ms)
+        if problems:
+            logger.warning(
+                "%s %s: %s; %d queries, %.1fms in database, %.1fms total\n%s",
+                profile.route, profile.status or "failed", ", ".join(problems), profile.queries, profile.db_seconds * 1000, profile.elapsed * 1000, profile.describe(),
+            )
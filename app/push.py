@@ -0,0 +1,235 @@
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from collections import defaultdict
+from datetime import datetime
+from itertools import chain
+from typing import Callable, Dict, Iterable, Set
+import asyncio
+import importlib
+import json
+import logging
+import os
+import threading
+from dotenv import load_dotenv
+from . import models, versions
+
+load_dotenv()
+
+# Live change events for /push (WebSocket and SSE). Writes are collected by the
+# after_flush hook below and published once the transaction commits, so a rolled back
+# write is never announced. Events go to the same user and group scopes that
+# versions.py bumps, through a broker: LocalBroker delivers inside this process,
+# RedisBroker (or any PUSH_BROKER="module:Class") fans out across workers. Each worker's
+# Hub then hands events to its own connections.
+#
+# Events are notifications, not data: clients fetch what changed with /sync.
+
+PUSH_BROKER = os.getenv("PUSH_BROKER", "local")
+PUSH_REDIS_URL = os.getenv("PUSH_REDIS_URL", "redis://localhost:6379/0")
+PUSH_REDIS_CHANNEL = os.getenv("PUSH_REDIS_CHANNEL", "finance:push")
+# Events buffered per connection; a client that falls further behind gets "resync"
+PUSH_QUEUE_SIZE = int(os.getenv("PUSH_QUEUE_SIZE", "100"))
+PUSH_HEARTBEAT_SECONDS = float(os.getenv("PUSH_HEARTBEAT_SECONDS", "15"))
+
+logger = logging.getLogger(__name__)
+
+KINDS = {
+    models.Income: "incomes",
+    models.Expense: "expenses",
+    models.Budget: "budgets",
+    models.Project: "projects",
+    models.Task: "tasks",
+    models.Group: "groups",
+}
+
+RESYNC = {"type": "resync"}
+
+class Subscription:
+    """One connection's bounded event queue, fed from any thread."""
+
+    def __init__(self, channels: Iterable[versions.Scope], loop: asyncio.AbstractEventLoop, maxsize: int):
+        self.channels = set(channels)
+        self._loop = loop
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self._overflowed = False
+
+    def offer(self, message: dict):
+        try:
+            self._loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:
+            pass  # Loop already closed: the connection is going away
+
+    def _put(self, message: dict):
+        if self._overflowed:
+            return
+        try:
+            self._queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Backpressure: drop the backlog instead of buffering without bound, and tell
+            # the client to catch up with /sync
+            self._overflowed = True
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            self._queue.put_nowait(RESYNC)
+
+    async def get(self) -> dict:
+        message = await self._queue.get()
+        if message is RESYNC:
+            self._overflowed = False
+        return message
+
+class LocalBroker:
+    """In-memory broker: delivers straight to this process's hub (single worker, tests)."""
+
+    def start(self, deliver: Callable[[dict], None]):
+        self._deliver = deliver
+
+    def publish(self, message: dict):
+        self._deliver(message)
+
+    def stop(self):
+        pass
+
+class RedisBroker:
+    """Redis pub/sub broker, so every worker's hub sees every worker's events (needs `redis`)."""
+
+    def __init__(self, url: str = PUSH_REDIS_URL, channel: str = PUSH_REDIS_CHANNEL):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("PUSH_BROKER=redis needs the redis package (pip install -r requirements.txt)") from e
+        self.channel = channel
+        self._client = redis.Redis.from_url(url)
+        self._thread = None
+
+    def start(self, deliver: Callable[[dict], None]):
+        pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{self.channel: lambda message: deliver(json.loads(message["data"]))})
+        self._thread = pubsub.run_in_thread(sleep_time=1, daemon=True)
+
+    def publish(self, message: dict):
+        self._client.publish(self.channel, json.dumps(message, default=str))
+
+    def stop(self):
+        if self._thread is not None:
+            self._thread.stop()
+            self._thread = None
+
+def _make_broker(name: str):
+    if name == "local":
+        return LocalBroker()
+    if name == "redis":
+        return RedisBroker()
+    module, _, attribute = name.partition(":")
+    return getattr(importlib.import_module(module), attribute)()
+
+class Hub:
+    def __init__(self, broker):
+        self.broker = broker
+        self._subscriptions: Dict[versions.Scope, Set[Subscription]] = defaultdict(set)
+        self._lock = threading.Lock()
+        self._started = False
+
+    def start(self):
+        # Started on first use as well as at app startup, so scripts and tests need no lifecycle
+        with self._lock:
+            if not self._started:
+                self.broker.start(self.dispatch)
+                self._started = True
+
+    def subscribe(self, channels: Iterable[versions.Scope]) -> Subscription:
+        """Register a connection; call from the event loop that will read it."""
+        self.start()
+        subscription = Subscription(channels, asyncio.get_running_loop(), PUSH_QUEUE_SIZE)
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscriptions[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscriptions.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscriptions[channel]
+
+    def publish(self, channels: Iterable[versions.Scope], payload: dict):
+        self.start()
+        self.broker.publish({**payload, "channels": [list(channel) for channel in channels]})
+
+    def dispatch(self, message: dict):
+        # An event can name several channels (user and group); each connection gets it once
+        payload = {key: value for key, value in message.items() if key != "channels"}
+        with self._lock:
+            targets = set(chain.from_iterable(self._subscriptions.get(tuple(channel), ()) for channel in message["channels"]))
+        for subscription in targets:
+            subscription.offer(payload)
+
+    @property
+    def connections(self) -> int:
+        with self._lock:
+            return len(set(chain.from_iterable(self._subscriptions.values())))
+
+    def stop(self):
+        with self._lock:
+            if self._started:
+                self.broker.stop()
+                self._started = False
+
+hub = Hub(_make_broker(PUSH_BROKER))
+
+def queue(session: Session, channels: Iterable[versions.Scope], payload: dict):
+    """Publish `payload` when `session` commits (for Core writes the flush hook cannot see)."""
+    channels = set(channels)
+    if channels:
+        session.info.setdefault("push_events", []).append((channels, payload))
+
+def _change(obj, change: str) -> str:
+    if change == "updated" and obj.deleted_at is not None and inspect(obj).attrs["deleted_at"].history.added:
+        return "deleted"
+    return change
+
+@event.listens_for(Session, "after_flush")
+def _collect_events(session: Session, flush_context):
+    conn = None
+    now = datetime.utcnow().isoformat()
+    changed = chain(
+        ((obj, "created") for obj in session.new),
+        ((obj, "deleted") for obj in session.deleted),
+        ((obj, "updated") for obj in session.dirty if session.is_modified(obj)),
+    )
+    for obj, change in changed:
+        kind = KINDS.get(type(obj))
+        if kind is None:
+            continue
+        conn = conn or session.connection()
+        queue(session, versions.object_scopes(conn, obj), {
+            "type": _change(obj, change),
+            "kind": kind,
+            "id": obj.id,
+            "group_id": getattr(obj, "group_id", None),
+            "project_id": obj.id if kind == "projects" else getattr(obj, "project_id", None),
+            "at": now,
+        })
+
+@event.listens_for(Session, "after_commit")
+def _publish_events(session: Session):
+    # The write is already committed: a broker that is down costs clients their live events
+    # (they catch up with /sync), it must not turn the request into an error
+    for channels, payload in session.info.pop("push_events", []):
+        try:
+            hub.publish(channels, payload)
+        except Exception:
+            logger.exception("Push publish failed for %s %s", payload.get("kind"), payload.get("id"))
+
+@event.listens_for(Session, "after_rollback")
+def _discard_events(session: Session):
+    session.info.pop("push_events", None)
+
+def channels_for(user_id: int, group_ids: Iterable[int]) -> Set[versions.Scope]:
+    return {("user", user_id)} | {("group", group_id) for group_id in group_ids}
+
+def encode(message: dict) -> str:
+    return json.dumps(message, separators=(",", ":"))
@@ -0,0 +1,108 @@
+from sqlalchemy import and_, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import Optional
+from . import models
+
+# Monthly sums and counts of incomes and expenses, keyed by
+# (kind, user, group, project, type, month), one row per key (ux_monthly_rollups_key).
+# Writers call record() in the same transaction as the change they describe: an UPDATE
+# of the key's row, or an INSERT when there is none yet. Two writers can both find no
+# row; the unique index turns the second INSERT into an IntegrityError, and that writer
+# retries the UPDATE against the row the first one created.
+
+ROLLUP_MODELS = {"income": models.Income, "expense": models.Expense}
+
+def month_key(date: Optional[datetime]) -> Optional[str]:
+    return date.strftime("%Y-%m") if date else None
+
+def _key_filter(kind, user_id, group_id, project_id, type_id, month):
+    # The same expressions as the unique index, so the lookup is a single index probe
+    values = (kind, user_id, group_id or 0, project_id or 0, type_id or 0, month or "")
+    return and_(*[expression == value for expression, value in zip(models.MONTHLY_ROLLUP_KEY, values)])
+
+def _increment(kind, user_id, group_id, project_id, type_id, month, total, count):
+    return (
+        update(models.MonthlyRollup)
+        .where(_key_filter(kind, user_id, group_id, project_id, type_id, month))
+        .values(total=models.MonthlyRollup.total + total, count=models.MonthlyRollup.count + count)
+        .execution_options(synchronize_session=False)
+    )
+
+def _insert(kind, user_id, group_id, project_id, type_id, month, total, count):
+    return insert(models.MonthlyRollup).values(kind=kind, user_id=user_id, group_id=group_id, project_id=project_id, type_id=type_id, month=month, total=total, count=count)
+
+def _row_key(kind: str, row, sign: int):
+    return kind, row.user_id, row.group_id, row.project_id, row.type_id, month_key(row.date), sign * (row.amount or 0), sign
+
+def add(db: Session, kind: str, user_id: int, group_id: Optional[int], project_id: Optional[int], type_id: Optional[int], month: Optional[str], total: float, count: int):
+    key = (kind, user_id, group_id, project_id, type_id, month, total, count)
+    if db.execute(_increment(*key)).rowcount:
+        return
+    try:
+        # In a savepoint, so losing the race rolls back only this INSERT
+        with db.begin_nested():
+            db.execute(_insert(*key))
+    except IntegrityError:
+        db.execute(_increment(*key))
+
+def record(db: Session, kind: str, row, sign: int = 1):
+    """Apply one income/expense row (sign=1) or remove it (sign=-1); caller commits."""
+    add(db, *_row_key(kind, row, sign))
+
+async def record_async(db, kind: str, row, sign: int = 1):
+    key = _row_key(kind, row, sign)
+    if (await db.execute(_increment(*key))).rowcount:
+        return
+    try:
+        async with db.begin_nested():
+            await db.execute(_insert(*key))
+    except IntegrityError:
+        await db.execute(_increment(*key))
+
+def scope_criteria(user_id: Optional[int] = None, group_id: Optional[int] = None, project_id: Optional[int] = None) -> list:
+    rollup = models.MonthlyRollup
+    criteria = []
+    if user_id:
+        criteria.append(rollup.user_id == user_id)
+    if group_id:
+        criteria.append(rollup.group_id == group_id)
+    if project_id:
+        criteria.append(rollup.project_id == project_id)
+    return criteria
+
+def totals_statement(kind: str, user_id: Optional[int] = None, group_id: Optional[int] = None, project_id: Optional[int] = None):
+    rollup = models.MonthlyRollup
+    return select(func.sum(rollup.total)).where(rollup.kind == kind, *scope_criteria(user_id, group_id, project_id))
+
+def totals(db: Session, kind: str, user_id: Optional[int] = None, group_id: Optional[int] = None, project_id: Optional[int] = None) -> float:
+    return db.execute(totals_statement(kind, user_id, group_id, project_id)).scalar() or 0
+
+def rebuild(db: Session):
+    """Recompute the whole rollup table from the transaction tables."""
+    db.query(models.MonthlyRollup).delete(synchronize_session=False)
+    for kind, model in ROLLUP_MODELS.items():
+        buckets = {}
+        rows = db.query(model.user_id, model.group_id, model.project_id, model.type_id, model.date, model.amount).filter(
+            model.deleted_at.is_(None)
+        ).execution_options(yield_per=5000)
+        for user_id, group_id, project_id, type_id, date, amount in rows:
+            key = (user_id, group_id, project_id, type_id, month_key(date))
+            bucket = buckets.setdefault(key, [0, 0])
+            bucket[0] += amount or 0
+            bucket[1] += 1
+        db.bulk_insert_mappings(models.MonthlyRollup, [
+            {"kind": kind, "user_id": key[0], "group_id": key[1], "project_id": key[2], "type_id": key[3], "month": key[4], "total": total, "count": count}
+            for key, (total, count) in buckets.items()
+        ])
+    db.commit()
+
+if __name__ == "__main__":
+    from .database import SessionLocal
+    db = SessionLocal()
+    try:
+        rebuild(db)
+        print(f"Rebuilt {db.query(models.MonthlyRollup).count()} rollup rows")
+    finally:
+        db.close()
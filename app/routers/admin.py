@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends
+from .. import schemas
+from ..dependencies import get_current_admin_user
+from ..principal_cache import principals
+from .. import database
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+@router.get("/principal-cache", response_model=dict, summary="Principal cache statistics", description="Size, hit, miss and eviction counters of the in-process authenticated-user cache for this worker.")
+def read_principal_cache_stats(current_user: schemas.User = Depends(get_current_admin_user)):
+    return principals.stats()
+
+@router.get("/pool", response_model=dict, summary="Database pool statistics", description="Pool configuration, occupancy, checkout wait-time histogram, overflow events and connection lifetimes for this worker.")
+def read_pool_stats(current_user: schemas.User = Depends(get_current_admin_user)):
+    stats = {
+        "config": {
+            "pool_size": database.DB_POOL_SIZE,
+            "max_overflow": database.DB_MAX_OVERFLOW,
+            "pool_timeout": database.DB_POOL_TIMEOUT,
+            "pool_recycle": database.DB_POOL_RECYCLE,
+            "pool_pre_ping": database.DB_POOL_PRE_PING,
+        },
+        "sync": database.pool_metrics.snapshot(database.engine.pool),
+    }
+    if database.async_engine is not None:
+        stats["async"] = database.async_pool_metrics.snapshot(database.async_engine.sync_engine.pool)
+    return stats
\ No newline at end of file
@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from .. import schemas, crud
+from datetime import datetime
+from .. import schemas, crud, timeseries, forecast
 from ..database import get_db
-from ..dependencies import get_current_active_user
+from ..dependencies import get_current_active_user, get_permissions
+from ..permissions import PermissionContext
 
 router = APIRouter(prefix="/analytics", tags=["analytics"])
 
@@ -10,10 +12,46 @@ router = APIRouter(prefix="/analytics", tags=["analytics"])
 def get_financial_summary(
     group_id: int = None,
     db: Session = Depends(get_db),
-    current_user: schemas.User = Depends(get_current_active_user)
+    current_user: schemas.User = Depends(get_current_active_user),
+    perms: PermissionContext = Depends(get_permissions)
 ):
-    if group_id:
-        group = next((g for g in current_user.groups if g.id == group_id and g.deleted_at is None), None)
-        if not group:
-            raise HTTPException(status_code=403, detail="Not authorized for this group")
-    return crud.get_financial_summary(db, user_id=current_user.id, group_id=group_id)
\ No newline at end of file
+    if group_id and not perms.has(group_id, "view"):
+        raise HTTPException(status_code=403, detail="Not authorized for this group")
+    return crud.get_financial_summary(db, user_id=current_user.id, group_id=group_id, perms=perms)
+
+@router.get("/timeseries", response_model=schemas.TimeSeries, summary="Income and expense time series", description="Income, expense and net per day, week or month with trailing averages over `window` periods, cumulative balance and per-type breakdown. Covers the user's own entries, or everything in a group or project when group_id or project_id is given.")
+def get_timeseries(
+    interval: str = Query("month", pattern="^(day|week|month)$"),
+    window: int = Query(3, ge=1, le=366),
+    group_id: int = None,
+    project_id: int = None,
+    start_date: datetime = None,
+    end_date: datetime = None,
+    db: Session = Depends(get_db),
+    current_user: schemas.User = Depends(get_current_active_user),
+    perms: PermissionContext = Depends(get_permissions)
+):
+    if group_id and not perms.has(group_id, "view"):
+        raise HTTPException(status_code=403, detail="Not authorized for this group")
+    if project_id and not crud.get_authorized_project(db, project_id, current_user.id, "view", perms):
+        raise HTTPException(status_code=404, detail="Project not found or not authorized")
+    try:
+        return timeseries.build_timeseries(db, current_user.id, interval=interval, window=window, group_id=group_id, project_id=project_id, start_date=start_date, end_date=end_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/forecast", response_model=schemas.Forecast, summary="Cash-flow forecast", description="Project income, expense, net and balance `months` ahead from the last `history_months` complete months, using a linear trend plus month-of-year seasonality per income and expense type. The first month is the current one: the opening balance includes its entries so far, and its projected values are only what is still expected this month. Uses the same scope as the financial summary: the user's own entries, plus a group's when group_id is given, optionally narrowed to a project.")
+def get_forecast(
+    months: int = Query(6, ge=1, le=60),
+    history_months: int = Query(36, ge=1, le=120),
+    group_id: int = None,
+    project_id: int = None,
+    db: Session = Depends(get_db),
+    current_user: schemas.User = Depends(get_current_active_user),
+    perms: PermissionContext = Depends(get_permissions)
+):
+    if group_id and not perms.has(group_id, "view"):
+        raise HTTPException(status_code=403, detail="Not authorized for this group")
+    if project_id and not crud.get_authorized_project(db, project_id, current_user.id, "view", perms):
+        raise HTTPException(status_code=404, detail="Project not found or not authorized")
+    return forecast.build_forecast(db, current_user.id, months=months, history_months=history_months, group_id=group_id, project_id=project_id)
\ No newline at end of file
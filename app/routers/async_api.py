@@ -0,0 +1,151 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+from .. import schemas, crud_async, versions, http_cache, dashboard
+from ..database import get_async_db
+from ..dependencies import get_permissions_async
+from ..permissions import PermissionContext
+
+# Async variants of the high-traffic routes, mounted ahead of the sync routers when
+# DB_ASYNC=true so they take precedence; every other route keeps its sync handler.
+router = APIRouter()
+
+@router.post("/incomes/", response_model=schemas.Income, tags=["incomes"], summary="Create a new income", description="Create an income entry for the authenticated user, optionally linked to a group or project.")
+async def create_income_async(income: schemas.IncomeCreate, db: AsyncSession = Depends(get_async_db), perms: PermissionContext = Depends(get_permissions_async)):
+    try:
+        return await crud_async.create_user_income(db, income, perms)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/incomes/", response_model=List[schemas.Income], tags=["incomes"], summary="List incomes", description="Retrieve incomes for the authenticated user or their groups, newest first, with optional filtering by type_id, project_id, and date range. Pass the X-Next-Cursor response header back as `cursor` to fetch the next page. Set `fast=true` to skip per-row model validation and serialize the rows straight to JSON with orjson.")
+async def read_incomes_async(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    type_id: int = None,
+    start_date: datetime = None,
+    end_date: datetime = None,
+    project_id: int = None,
+    cursor: str = None,
+    fast: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+    perms: PermissionContext = Depends(get_permissions_async)
+):
+    not_modified = await versions.check_async(request, response, db, perms)
+    if not_modified:
+        return not_modified
+    try:
+        if fast:
+            incomes, next_cursor = await crud_async.get_income_rows(db, perms, skip=skip, limit=limit, type_id=type_id, start_date=start_date, end_date=end_date, project_id=project_id, cursor=cursor)
+        else:
+            incomes, next_cursor = await crud_async.get_incomes(db, perms, skip=skip, limit=limit, type_id=type_id, start_date=start_date, end_date=end_date, project_id=project_id, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return http_cache.fast_response(incomes, response) if fast else incomes
+
+@router.delete("/incomes/{income_id}", response_model=dict, tags=["incomes"], summary="Soft delete income", description="Mark an income as deleted without removing it from the database.")
+async def delete_income_async(income_id: int, db: AsyncSession = Depends(get_async_db), perms: PermissionContext = Depends(get_permissions_async)):
+    if not await crud_async.soft_delete_income(db, income_id, perms):
+        raise HTTPException(status_code=404, detail="Income not found or not authorized")
+    return {"message": "Income deleted"}
+
+@router.post("/expenses/", response_model=schemas.Expense, tags=["expenses"], summary="Create a new expense", description="Create an expense entry for the authenticated user, optionally linked to a group or project.")
+async def create_expense_async(expense: schemas.ExpenseCreate, db: AsyncSession = Depends(get_async_db), perms: PermissionContext = Depends(get_permissions_async)):
+    try:
+        return await crud_async.create_user_expense(db, expense, perms)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/expenses/", response_model=List[schemas.Expense], tags=["expenses"], summary="List expenses", description="Retrieve expenses for the authenticated user or their groups, newest first, with optional filtering by type_id, project_id, and date range. Pass the X-Next-Cursor response header back as `cursor` to fetch the next page. Set `fast=true` to skip per-row model validation and serialize the rows straight to JSON with orjson.")
+async def read_expenses_async(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    type_id: int = None,
+    start_date: datetime = None,
+    end_date: datetime = None,
+    project_id: int = None,
+    cursor: str = None,
+    fast: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+    perms: PermissionContext = Depends(get_permissions_async)
+):
+    not_modified = await versions.check_async(request, response, db, perms)
+    if not_modified:
+        return not_modified
+    try:
+        if fast:
+            expenses, next_cursor = await crud_async.get_expense_rows(db, perms, skip=skip, limit=limit, type_id=type_id, start_date=start_date, end_date=end_date, project_id=project_id, cursor=cursor)
+        else:
+            expenses, next_cursor = await crud_async.get_expenses(db, perms, skip=skip, limit=limit, type_id=type_id, start_date=start_date, end_date=end_date, project_id=project_id, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return http_cache.fast_response(expenses, response) if fast else expenses
+
+@router.delete("/expenses/{expense_id}", response_model=dict, tags=["expenses"], summary="Soft delete expense", description="Mark an expense as deleted without removing it from the database.")
+async def delete_expense_async(expense_id: int, db: AsyncSession = Depends(get_async_db), perms: PermissionContext = Depends(get_permissions_async)):
+    if not await crud_async.soft_delete_expense(db, expense_id, perms):
+        raise HTTPException(status_code=404, detail="Expense not found or not authorized")
+    return {"message": "Expense deleted"}
+
+@router.get("/budgets/", response_model=List[schemas.Budget], tags=["budgets"], summary="List budgets", description="Retrieve budgets for the authenticated user or their groups, newest first, with optional filtering by project_id. Pass the X-Next-Cursor response header back as `cursor` to fetch the next page.")
+async def read_budgets_async(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    project_id: int = None,
+    cursor: str = None,
+    db: AsyncSession = Depends(get_async_db),
+    perms: PermissionContext = Depends(get_permissions_async)
+):
+    not_modified = await versions.check_async(request, response, db, perms)
+    if not_modified:
+        return not_modified
+    try:
+        budgets, next_cursor = await crud_async.get_budgets(db, perms, skip=skip, limit=limit, project_id=project_id, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return budgets
+
+@router.get("/projects/", response_model=List[schemas.Project], tags=["projects"], summary="List projects", description="Retrieve projects for the authenticated user or their groups.")
+async def read_projects_async(request: Request, response: Response, skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_async_db), perms: PermissionContext = Depends(get_permissions_async)):
+    not_modified = await versions.check_async(request, response, db, perms)
+    if not_modified:
+        return not_modified
+    return await crud_async.get_projects(db, perms, skip=skip, limit=limit)
+
+@router.get("/analytics/summary", response_model=schemas.FinancialSummary, tags=["analytics"], summary="Financial summary", description="Get total income, expense, net balance, and budget status for the user or a specific group.")
+async def get_financial_summary_async(group_id: int = None, db: AsyncSession = Depends(get_async_db), perms: PermissionContext = Depends(get_permissions_async)):
+    return await crud_async.get_financial_summary(db, perms, group_id=group_id)
+
+@router.get("/dashboard/", response_model=schemas.Dashboard, tags=["dashboard"], summary="Dashboard data in one request", description="Incomes, expenses, budgets, projects, groups, the three type lists and the financial summary in one response, read with a single permission lookup. Pick sections with `section` (repeatable or comma-separated); unselected sections are null. List sections return the first `limit` rows, with the cursor for the next page of incomes, expenses and budgets in `cursors`. `group_id` adds a group to the summary. Send If-None-Match with the last ETag to get 304 when nothing changed. Sections are queried concurrently, each on its own pooled connection.")
+async def read_dashboard_async(
+    request: Request,
+    response: Response,
+    section: List[str] = Query(None),
+    limit: int = Query(100, ge=1, le=500),
+    group_id: int = None,
+    db: AsyncSession = Depends(get_async_db),
+    perms: PermissionContext = Depends(get_permissions_async)
+):
+    try:
+        sections = dashboard.parse_sections(section)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if group_id and "summary" in sections and not perms.has(group_id, "view"):
+        raise HTTPException(status_code=403, detail="Not authorized for this group")
+    types = await db.run_sync(dashboard.load_types, perms.user_id, sections)
+    not_modified = await versions.check_async(request, response, db, perms, *[etag for _, etag in types.values()])
+    if not_modified:
+        return not_modified
+    return await dashboard.build_dashboard_async(perms, sections, types, limit=limit, group_id=group_id)
\ No newline at end of file
@@ -3,10 +3,10 @@ from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from jose import jwt
 from datetime import datetime, timedelta
-import smtplib
-from email.mime.text import MIMEText
-from .. import schemas, crud, dependencies
+from .. import schemas, crud, dependencies, passwords, mailer
 from ..database import get_db
+from ..principal_cache import principals
+from ..metrics import auth_failures
 import os
 from dotenv import load_dotenv
 
@@ -21,9 +21,16 @@ router = APIRouter(prefix="/auth", tags=["auth"])
 def authenticate_user(db: Session, username: str, password: str):
     user = crud.get_user_by_username(db, username)
     if not user or user.deleted_at:
+        auth_failures.inc(reason="unknown_user")
         return False
-    if not crud.verify_password(password, user.hashed_password):
+    valid, new_hash = passwords.verify_password(password, user.hashed_password)
+    if not valid:
+        auth_failures.inc(reason="wrong_password")
         return False
+    if new_hash:
+        # Stored hash predates the current BCRYPT_ROUNDS; upgrade it while we have the plaintext
+        user.hashed_password = new_hash
+        db.commit()
     return user
 
 def create_access_token(data: dict, expires_delta: timedelta = None):
@@ -51,27 +58,14 @@ def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db:
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
-@router.post("/forget", response_model=dict, summary="Request password reset", description="Request a password reset token, sent via email to the registered address.")
-async def forget_password(reset: schemas.ResetTokenCreate, db: Session = Depends(get_db)):
+@router.post("/forget", response_model=dict, summary="Request password reset", description="Request a password reset token, sent via email to the registered address. The email is queued and delivered in the background.")
+def forget_password(reset: schemas.ResetTokenCreate, db: Session = Depends(get_db)):
     user = crud.get_user_by_email(db, reset.email)
     if not user or user.deleted_at:
         raise HTTPException(status_code=404, detail="User not found")
-    token = crud.create_reset_token(db, user.id)
-    
-    msg = MIMEText(f"Use this token to reset your password: {token}\nIt expires in 1 hour.")
-    msg['Subject'] = "Password Reset Request"
-    msg['From'] = os.getenv("MAIL_FROM")
-    msg['To'] = user.email
-
-    try:
-        with smtplib.SMTP(os.getenv("MAIL_SERVER"), int(os.getenv("MAIL_PORT"))) as server:
-            server.starttls()
-            server.login(os.getenv("MAIL_USERNAME"), os.getenv("MAIL_PASSWORD"))
-            server.send_message(msg)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to send email: {str(e)}")
-    
-    return {"message": "Password reset email sent"}
+    crud.create_reset_token(db, user.id, user.email)
+    mailer.sender.wake()
+    return {"message": "Password reset email queued"}
 
 @router.post("/reset", response_model=dict, summary="Reset password", description="Reset password using the token received via email.")
 def reset_password(reset: schemas.ResetPassword, db: Session = Depends(get_db)):
@@ -83,5 +77,6 @@ def reset_password(reset: schemas.ResetPassword, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="User not found")
     user.hashed_password = crud.get_password_hash(reset.new_password)
     db.commit()
+    principals.invalidate(user.username)
     crud.delete_reset_token(db, reset.token)
     return {"message": "Password reset successful"}
\ No newline at end of file
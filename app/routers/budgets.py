@@ -1,34 +1,35 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from typing import List
 from sqlalchemy.orm import Session
-from .. import schemas, crud, models
+from datetime import datetime
+from .. import schemas, crud, models, versions, budget_periods, http_cache
 from ..database import get_db
-from ..dependencies import get_current_active_user
+from ..dependencies import get_current_active_user, get_permissions
+from ..permissions import PermissionContext
+from ..catalog import catalog
 
 router = APIRouter(prefix="/budgets", tags=["budgets"])
 
 @router.post("/", response_model=schemas.Budget, summary="Create a new budget", description="Create a budget entry for the authenticated user, optionally linked to a group or project.")
-def create_budget(budget: schemas.BudgetCreate, db: Session = Depends(get_db), current_user: schemas.User = Depends(get_current_active_user)):
+def create_budget(budget: schemas.BudgetCreate, db: Session = Depends(get_db), current_user: schemas.User = Depends(get_current_active_user), perms: PermissionContext = Depends(get_permissions)):
     try:
-        return crud.create_user_budget(db=db, budget=budget, user_id=current_user.id)
+        return crud.create_user_budget(db=db, budget=budget, user_id=current_user.id, perms=perms)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.put("/{budget_id}", response_model=schemas.Budget, summary="Update a budget", description="Update an existing budget entry for the authenticated user.")
-def update_budget(budget_id: int, budget: schemas.BudgetCreate, db: Session = Depends(get_db), current_user: schemas.User = Depends(get_current_active_user)):
+def update_budget(budget_id: int, budget: schemas.BudgetCreate, db: Session = Depends(get_db), current_user: schemas.User = Depends(get_current_active_user), perms: PermissionContext = Depends(get_permissions)):
     db_budget = db.query(models.Budget).filter(models.Budget.id == budget_id, models.Budget.user_id == current_user.id, models.Budget.deleted_at.is_(None)).first()
     if not db_budget:
         raise HTTPException(status_code=404, detail="Budget not found or not authorized")
-    if budget.group_id and not crud.check_group_permission(db, budget.group_id, current_user.id, "edit"):
+    if budget.group_id and not perms.has(budget.group_id, "edit"):
         raise HTTPException(status_code=403, detail="Not authorized for this group")
     try:
-        category_obj = crud.get_budget_category(db, budget.category_id, current_user.id)
+        category_obj = catalog.get(db, "budget", budget.category_id, current_user.id)
         if not category_obj:
             raise ValueError(f"Budget category ID '{budget.category_id}' does not exist or not authorized")
-        if budget.project_id:
-            project = db.query(models.Project).filter(models.Project.id == budget.project_id, models.Project.deleted_at.is_(None)).first()
-            if not project or (project.user_id != current_user.id and not (project.group_id and crud.check_group_permission(db, project.group_id, current_user.id, "edit"))):
-                raise ValueError(f"Project ID '{budget.project_id}' does not exist or not authorized")
+        if budget.project_id and not crud.get_authorized_project(db, budget.project_id, current_user.id, "edit", perms):
+            raise ValueError(f"Project ID '{budget.project_id}' does not exist or not authorized")
         db_budget.category_id = budget.category_id
         db_budget.amount = budget.amount
         db_budget.period = budget.period
@@ -40,19 +41,48 @@ def update_budget(budget_id: int, budget: schemas.BudgetCreate, db: Session = De
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@router.get("/", response_model=List[schemas.Budget], summary="List budgets", description="Retrieve budgets for the authenticated user or their groups, with optional filtering by project_id.")
+@router.get("/", response_model=List[schemas.Budget], summary="List budgets", description="Retrieve budgets for the authenticated user or their groups, newest first, with optional filtering by project_id. Pass the X-Next-Cursor response header back as `cursor` to fetch the next page.")
 def read_budgets(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     project_id: int = None,
+    cursor: str = None,
     db: Session = Depends(get_db),
-    current_user: schemas.User = Depends(get_current_active_user)
+    current_user: schemas.User = Depends(get_current_active_user),
+    perms: PermissionContext = Depends(get_permissions)
 ):
-    return crud.get_budgets(db, user_id=current_user.id, skip=skip, limit=limit, project_id=project_id)
+    not_modified = versions.check(request, response, db, perms)
+    if not_modified:
+        return not_modified
+    try:
+        budgets, next_cursor = crud.get_budgets(db, user_id=current_user.id, skip=skip, limit=limit, project_id=project_id, cursor=cursor, perms=perms)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return budgets
+
+@router.get("/evaluation", response_model=List[schemas.BudgetEvaluation], summary="Evaluate budgets per period", description="For every budget visible to the user, spend, remaining amount and utilisation in its current period (daily, weekly, monthly, quarterly or yearly) and the `history` periods before it, newest first. Spend is matched by expense type name equal to the budget category name, within the budget's project, group or owner.")
+def evaluate_budgets(
+    response: Response,
+    history: int = Query(5, ge=0, le=60),
+    as_of: datetime = None,
+    group_id: int = None,
+    project_id: int = None,
+    db: Session = Depends(get_db),
+    current_user: schemas.User = Depends(get_current_active_user),
+    perms: PermissionContext = Depends(get_permissions)
+):
+    if group_id and not perms.has(group_id, "view"):
+        raise HTTPException(status_code=403, detail="Not authorized for this group")
+    # Thousands of budgets x periods: serialize the engine's dicts directly rather than validating each one
+    return http_cache.fast_response(budget_periods.evaluate_budgets(db, perms, history=history, as_of=as_of, group_id=group_id, project_id=project_id), response)
 
 @router.delete("/{budget_id}", response_model=dict, summary="Soft delete budget", description="Mark a budget as deleted without removing it from the database.")
-def delete_budget(budget_id: int, db: Session = Depends(get_db), current_user: schemas.User = Depends(get_current_active_user)):
-    budget = crud.soft_delete_budget(db, budget_id, current_user.id)
+def delete_budget(budget_id: int, db: Session = Depends(get_db), current_user: schemas.User = Depends(get_current_active_user), perms: PermissionContext = Depends(get_permissions)):
+    budget = crud.soft_delete_budget(db, budget_id, current_user.id, perms)
     if not budget:
         raise HTTPException(status_code=404, detail="Budget not found or not authorized")
     return {"message": "Budget deleted"}
\ No newline at end of file
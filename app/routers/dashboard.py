@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from typing import List
+from sqlalchemy.orm import Session
+from .. import schemas, dashboard, versions
+from ..database import get_db
+from ..dependencies import get_permissions
+from ..permissions import PermissionContext
+
+router = APIRouter(prefix="/dashboard", tags=["dashboard"])
+
+@router.get("/", response_model=schemas.Dashboard, summary="Dashboard data in one request", description="Incomes, expenses, budgets, projects, groups, the three type lists and the financial summary in one response, read with a single permission lookup. Pick sections with `section` (repeatable or comma-separated); unselected sections are null. List sections return the first `limit` rows, with the cursor for the next page of incomes, expenses and budgets in `cursors`. `group_id` adds a group to the summary. Send If-None-Match with the last ETag to get 304 when nothing changed.")
+def read_dashboard(
+    request: Request,
+    response: Response,
+    section: List[str] = Query(None),
+    limit: int = Query(100, ge=1, le=500),
+    group_id: int = None,
+    db: Session = Depends(get_db),
+    perms: PermissionContext = Depends(get_permissions)
+):
+    try:
+        sections = dashboard.parse_sections(section)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if group_id and "summary" in sections and not perms.has(group_id, "view"):
+        raise HTTPException(status_code=403, detail="Not authorized for this group")
+    types = dashboard.load_types(db, perms.user_id, sections)
+    not_modified = versions.check(request, response, db, perms, *[etag for _, etag in types.values()])
+    if not_modified:
+        return not_modified
+    return dashboard.build_dashboard(db, perms, sections, types, limit=limit, group_id=group_id)
@@ -1,63 +1,100 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from typing import List
 from sqlalchemy.orm import Session
 from datetime import datetime
-from .. import schemas, crud, models
+from .. import schemas, crud, models, rollups, versions, http_cache
+from ..export import export_response
 from ..database import get_db
-from ..dependencies import get_current_active_user
+from ..dependencies import get_current_active_user, get_permissions, BULK_MAX_ITEMS
+from ..permissions import PermissionContext
+from ..catalog import catalog
 
 router = APIRouter(prefix="/expenses", tags=["expenses"])
 
 @router.post("/", response_model=schemas.Expense, summary="Create a new expense", description="Create an expense entry for the authenticated user, optionally linked to a group or project.")
-def create_expense(expense: schemas.ExpenseCreate, db: Session = Depends(get_db), current_user: schemas.User = Depends(get_current_active_user)):
+def create_expense(expense: schemas.ExpenseCreate, db: Session = Depends(get_db), current_user: schemas.User = Depends(get_current_active_user), perms: PermissionContext = Depends(get_permissions)):
     try:
-        return crud.create_user_expense(db=db, expense=expense, user_id=current_user.id)
+        return crud.create_user_expense(db=db, expense=expense, user_id=current_user.id, perms=perms)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.post("/bulk", response_model=schemas.BulkResult, summary="Create expenses in bulk", description="Create up to BULK_MAX_ITEMS expenses in one transaction. Each item is validated independently; the response reports the outcome of every item, in request order.")
+def create_expenses_bulk(expenses: List[schemas.ExpenseCreate], db: Session = Depends(get_db), current_user: schemas.User = Depends(get_current_active_user), perms: PermissionContext = Depends(get_permissions)):
+    if len(expenses) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_MAX_ITEMS} items per request")
+    return crud.bulk_create_user_expenses(db, expenses, current_user.id, perms)
+
 @router.put("/{expense_id}", response_model=schemas.Expense, summary="Update an expense", description="Update an existing expense entry for the authenticated user.")
-def update_expense(expense_id: int, expense: schemas.ExpenseCreate, db: Session = Depends(get_db), current_user: schemas.User = Depends(get_current_active_user)):
+def update_expense(expense_id: int, expense: schemas.ExpenseCreate, db: Session = Depends(get_db), current_user: schemas.User = Depends(get_current_active_user), perms: PermissionContext = Depends(get_permissions)):
     db_expense = db.query(models.Expense).filter(models.Expense.id == expense_id, models.Expense.user_id == current_user.id, models.Expense.deleted_at.is_(None)).first()
     if not db_expense:
         raise HTTPException(status_code=404, detail="Expense not found or not authorized")
-    if expense.group_id and not crud.check_group_permission(db, expense.group_id, current_user.id, "edit"):
+    if expense.group_id and not perms.has(expense.group_id, "edit"):
         raise HTTPException(status_code=403, detail="Not authorized for this group")
     try:
-        type_obj = crud.get_expense_type(db, expense.type_id, current_user.id)
+        type_obj = catalog.get(db, "expense", expense.type_id, current_user.id)
         if not type_obj:
             raise ValueError(f"Expense type ID '{expense.type_id}' does not exist or not authorized")
-        if expense.project_id:
-            project = db.query(models.Project).filter(models.Project.id == expense.project_id, models.Project.deleted_at.is_(None)).first()
-            if not project or (project.user_id != current_user.id and not (project.group_id and crud.check_group_permission(db, project.group_id, current_user.id, "edit"))):
-                raise ValueError(f"Project ID '{expense.project_id}' does not exist or not authorized")
+        if expense.project_id and not crud.get_authorized_project(db, expense.project_id, current_user.id, "edit", perms):
+            raise ValueError(f"Project ID '{expense.project_id}' does not exist or not authorized")
+        rollups.record(db, "expense", db_expense, -1)
         db_expense.amount = expense.amount
         db_expense.type_id = expense.type_id
         db_expense.description = expense.description
         db_expense.date = expense.date or datetime.utcnow()
         db_expense.group_id = expense.group_id
         db_expense.project_id = expense.project_id
+        rollups.record(db, "expense", db_expense)
         db.commit()
         db.refresh(db_expense)
         return db_expense
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@router.get("/", response_model=List[schemas.Expense], summary="List expenses", description="Retrieve expenses for the authenticated user or their groups, with optional filtering by type_id, project_id, and date range.")
+@router.get("/", response_model=List[schemas.Expense], summary="List expenses", description="Retrieve expenses for the authenticated user or their groups, newest first, with optional filtering by type_id, project_id, and date range. Pass the X-Next-Cursor response header back as `cursor` to fetch the next page. Set `fast=true` to skip per-row model validation and serialize the rows straight to JSON with orjson.")
 def read_expenses(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     type_id: int = None,
     start_date: datetime = None,
     end_date: datetime = None,
     project_id: int = None,
+    cursor: str = None,
+    fast: bool = False,
     db: Session = Depends(get_db),
-    current_user: schemas.User = Depends(get_current_active_user)
+    current_user: schemas.User = Depends(get_current_active_user),
+    perms: PermissionContext = Depends(get_permissions)
+):
+    not_modified = versions.check(request, response, db, perms)
+    if not_modified:
+        return not_modified
+    try:
+        if fast:
+            expenses, next_cursor = crud.get_expense_rows(db, perms, skip=skip, limit=limit, type_id=type_id, start_date=start_date, end_date=end_date, project_id=project_id, cursor=cursor)
+        else:
+            expenses, next_cursor = crud.get_expenses(db, user_id=current_user.id, skip=skip, limit=limit, type_id=type_id, start_date=start_date, end_date=end_date, project_id=project_id, cursor=cursor, perms=perms)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return http_cache.fast_response(expenses, response) if fast else expenses
+
+@router.get("/export", summary="Export expenses", description="Stream expenses visible to the authenticated user as CSV or NDJSON, newest first, with the same filters as the list endpoint.")
+def export_expenses(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    type_id: int = None,
+    start_date: datetime = None,
+    end_date: datetime = None,
+    project_id: int = None,
+    perms: PermissionContext = Depends(get_permissions)
 ):
-    return crud.get_expenses(db, user_id=current_user.id, skip=skip, limit=limit, type_id=type_id, start_date=start_date, end_date=end_date, project_id=project_id)
+    return export_response(models.Expense, perms, format, "expenses", type_id=type_id, start_date=start_date, end_date=end_date, project_id=project_id)
 
 @router.delete("/{expense_id}", response_model=dict, summary="Soft delete expense", description="Mark an expense as deleted without removing it from the database.")
-def delete_expense(expense_id: int, db: Session = Depends(get_db), current_user: schemas.User = Depends(get_current_active_user)):
-    expense = crud.soft_delete_expense(db, expense_id, current_user.id)
+def delete_expense(expense_id: int, db: Session = Depends(get_db), current_user: schemas.User = Depends(get_current_active_user), perms: PermissionContext = Depends(get_permissions)):
+    expense = crud.soft_delete_expense(db, expense_id, current_user.id, perms)
     if not expense:
         raise HTTPException(status_code=404, detail="Expense not found or not authorized")
     return {"message": "Expense deleted"}
\ No newline at end of file
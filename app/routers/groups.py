@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from typing import List
 from sqlalchemy.orm import Session
-from .. import schemas, crud, models
+from .. import schemas, crud, models, versions
 from ..database import get_db
-from ..dependencies import get_current_active_user
+from ..dependencies import get_current_active_user, get_permissions
+from ..permissions import PermissionContext
 
 router = APIRouter(prefix="/groups", tags=["groups"])
 
@@ -12,7 +13,10 @@ def create_group(group: schemas.GroupCreate, db: Session = Depends(get_db), curr
     return crud.create_group(db=db, group=group, owner_id=current_user.id)
 
 @router.get("/", response_model=List[schemas.Group], summary="List groups", description="Retrieve groups for the authenticated user.")
-def read_groups(db: Session = Depends(get_db), current_user: schemas.User = Depends(get_current_active_user)):
+def read_groups(request: Request, response: Response, db: Session = Depends(get_db), current_user: schemas.User = Depends(get_current_active_user), perms: PermissionContext = Depends(get_permissions)):
+    not_modified = versions.check(request, response, db, perms)
+    if not_modified:
+        return not_modified
     return crud.get_groups_for_user(db, user_id=current_user.id)
 
 @router.delete("/{group_id}", response_model=dict, summary="Soft delete group", description="Mark a group as deleted without removing it from the database, if owned by the user.")
@@ -1,63 +1,100 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from typing import List
 from sqlalchemy.orm import Session
 from datetime import datetime
-from .. import schemas, crud, models
+from .. import schemas, crud, models, rollups, versions, http_cache
+from ..export import export_response
 from ..database import get_db
-from ..dependencies import get_current_active_user
+from ..dependencies import get_current_active_user, get_permissions, BULK_MAX_ITEMS
+from ..permissions import PermissionContext
+from ..catalog import catalog
 
 router = APIRouter(prefix="/incomes", tags=["incomes"])
 
 @router.post("/", response_model=schemas.Income, summary="Create a new income", description="Create an income entry for the authenticated user, optionally linked to a group or project.")
-def create_income(income: schemas.IncomeCreate, db: Session = Depends(get_db), current_user: schemas.User = Depends(get_current_active_user)):
+def create_income(income: schemas.IncomeCreate, db: Session = Depends(get_db), current_user: schemas.User = Depends(get_current_active_user), perms: PermissionContext = Depends(get_permissions)):
     try:
-        return crud.create_user_income(db=db, income=income, user_id=current_user.id)
+        return crud.create_user_income(db=db, income=income, user_id=current_user.id, perms=perms)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.post("/bulk", response_model=schemas.BulkResult, summary="Create incomes in bulk", description="Create up to BULK_MAX_ITEMS incomes in one transaction. Each item is validated independently; the response reports the outcome of every item, in request order.")
+def create_incomes_bulk(incomes: List[schemas.IncomeCreate], db: Session = Depends(get_db), current_user: schemas.User = Depends(get_current_active_user), perms: PermissionContext = Depends(get_permissions)):
+    if len(incomes) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_MAX_ITEMS} items per request")
+    return crud.bulk_create_user_incomes(db, incomes, current_user.id, perms)
+
 @router.put("/{income_id}", response_model=schemas.Income, summary="Update an income", description="Update an existing income entry for the authenticated user.")
-def update_income(income_id: int, income: schemas.IncomeCreate, db: Session = Depends(get_db), current_user: schemas.User = Depends(get_current_active_user)):
+def update_income(income_id: int, income: schemas.IncomeCreate, db: Session = Depends(get_db), current_user: schemas.User = Depends(get_current_active_user), perms: PermissionContext = Depends(get_permissions)):
     db_income = db.query(models.Income).filter(models.Income.id == income_id, models.Income.user_id == current_user.id, models.Income.deleted_at.is_(None)).first()
     if not db_income:
         raise HTTPException(status_code=404, detail="Income not found or not authorized")
-    if income.group_id and not crud.check_group_permission(db, income.group_id, current_user.id, "edit"):
+    if income.group_id and not perms.has(income.group_id, "edit"):
         raise HTTPException(status_code=403, detail="Not authorized for this group")
     try:
-        type_obj = crud.get_income_type(db, income.type_id, current_user.id)
+        type_obj = catalog.get(db, "income", income.type_id, current_user.id)
         if not type_obj:
             raise ValueError(f"Income type ID '{income.type_id}' does not exist or not authorized")
-        if income.project_id:
-            project = db.query(models.Project).filter(models.Project.id == income.project_id, models.Project.deleted_at.is_(None)).first()
-            if not project or (project.user_id != current_user.id and not (project.group_id and crud.check_group_permission(db, project.group_id, current_user.id, "edit"))):
-                raise ValueError(f"Project ID '{income.project_id}' does not exist or not authorized")
+        if income.project_id and not crud.get_authorized_project(db, income.project_id, current_user.id, "edit", perms):
+            raise ValueError(f"Project ID '{income.project_id}' does not exist or not authorized")
+        rollups.record(db, "income", db_income, -1)
         db_income.amount = income.amount
         db_income.type_id = income.type_id
         db_income.description = income.description
         db_income.date = income.date or datetime.utcnow()
         db_income.group_id = income.group_id
         db_income.project_id = income.project_id
+        rollups.record(db, "income", db_income)
         db.commit()
         db.refresh(db_income)
         return db_income
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@router.get("/", response_model=List[schemas.Income], summary="List incomes", description="Retrieve incomes for the authenticated user or their groups, with optional filtering by type_id, project_id, and date range.")
+@router.get("/", response_model=List[schemas.Income], summary="List incomes", description="Retrieve incomes for the authenticated user or their groups, newest first, with optional filtering by type_id, project_id, and date range. Pass the X-Next-Cursor response header back as `cursor` to fetch the next page. Set `fast=true` to skip per-row model validation and serialize the rows straight to JSON with orjson.")
 def read_incomes(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     type_id: int = None,
     start_date: datetime = None,
     end_date: datetime = None,
     project_id: int = None,
+    cursor: str = None,
+    fast: bool = False,
     db: Session = Depends(get_db),
-    current_user: schemas.User = Depends(get_current_active_user)
+    current_user: schemas.User = Depends(get_current_active_user),
+    perms: PermissionContext = Depends(get_permissions)
+):
+    not_modified = versions.check(request, response, db, perms)
+    if not_modified:
+        return not_modified
+    try:
+        if fast:
+            incomes, next_cursor = crud.get_income_rows(db, perms, skip=skip, limit=limit, type_id=type_id, start_date=start_date, end_date=end_date, project_id=project_id, cursor=cursor)
+        else:
+            incomes, next_cursor = crud.get_incomes(db, user_id=current_user.id, skip=skip, limit=limit, type_id=type_id, start_date=start_date, end_date=end_date, project_id=project_id, cursor=cursor, perms=perms)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return http_cache.fast_response(incomes, response) if fast else incomes
+
+@router.get("/export", summary="Export incomes", description="Stream incomes visible to the authenticated user as CSV or NDJSON, newest first, with the same filters as the list endpoint.")
+def export_incomes(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    type_id: int = None,
+    start_date: datetime = None,
+    end_date: datetime = None,
+    project_id: int = None,
+    perms: PermissionContext = Depends(get_permissions)
 ):
-    return crud.get_incomes(db, user_id=current_user.id, skip=skip, limit=limit, type_id=type_id, start_date=start_date, end_date=end_date, project_id=project_id)
+    return export_response(models.Income, perms, format, "incomes", type_id=type_id, start_date=start_date, end_date=end_date, project_id=project_id)
 
 @router.delete("/{income_id}", response_model=dict, summary="Soft delete income", description="Mark an income as deleted without removing it from the database.")
-def delete_income(income_id: int, db: Session = Depends(get_db), current_user: schemas.User = Depends(get_current_active_user)):
-    income = crud.soft_delete_income(db, income_id, current_user.id)
+def delete_income(income_id: int, db: Session = Depends(get_db), current_user: schemas.User = Depends(get_current_active_user), perms: PermissionContext = Depends(get_permissions)):
+    income = crud.soft_delete_income(db, income_id, current_user.id, perms)
     if not income:
         raise HTTPException(status_code=404, detail="Income not found or not authorized")
     return {"message": "Income deleted"}
\ No newline at end of file
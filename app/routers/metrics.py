@@ -0,0 +1,11 @@
+from fastapi import APIRouter, Header, HTTPException, Response
+import secrets
+from .. import metrics
+
+router = APIRouter(tags=["metrics"])
+
+@router.get("/metrics", response_class=Response, summary="Prometheus metrics", description="Request counts and latency histograms per route, in-flight requests, authentication failures, SQL query timing, connection pool gauges and cache counters in the Prometheus text format. Summed over all workers when METRICS_MULTIPROC_DIR is set. Requires `Authorization: Bearer <METRICS_TOKEN>` when METRICS_TOKEN is configured.")
+def read_metrics(authorization: str = Header(None)):
+    if metrics.METRICS_TOKEN and not secrets.compare_digest(authorization or "", f"Bearer {metrics.METRICS_TOKEN}"):
+        raise HTTPException(status_code=401, detail="Invalid metrics token", headers={"WWW-Authenticate": "Bearer"})
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
@@ -0,0 +1,82 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from fastapi.security import OAuth2PasswordBearer
+from typing import Optional
+import asyncio
+from .. import push
+from ..database import SessionLocal
+from ..dependencies import get_current_user
+from ..permissions import PermissionContext, load_permissions
+
+router = APIRouter(prefix="/push", tags=["push"])
+
+# EventSource and browser WebSockets cannot send an Authorization header, so the token may also come as ?token=
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token", auto_error=False)
+
+def _authenticate(token: Optional[str]) -> PermissionContext:
+    if not token:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated", headers={"WWW-Authenticate": "Bearer"})
+    # A short-lived session: the connection itself may stay open for hours
+    with SessionLocal() as db:
+        user = get_current_user(db, token)
+        if not user.is_active:
+            raise HTTPException(status_code=400, detail="Inactive user")
+        return load_permissions(db, user.id)
+
+@router.get("/events", summary="Change events (Server-Sent Events)", description="Stream of change notifications for the user's own data and every group they can see: `{type, kind, id, group_id, project_id, at}` with type created, updated, deleted or bulk_created. A `resync` event means events were dropped because the client fell behind: fetch /sync. Authenticate with the Authorization header or `?token=`. Group access is read once per connection; reconnect after it changes.")
+async def stream_events(request: Request, token: Optional[str] = Query(None), header_token: Optional[str] = Depends(optional_oauth2_scheme)):
+    perms = await run_in_threadpool(_authenticate, header_token or token)
+    subscription = push.hub.subscribe(push.channels_for(perms.user_id, perms.group_ids))
+
+    async def events():
+        getter = asyncio.ensure_future(subscription.get())
+        try:
+            yield ": connected\n\n"
+            while not await request.is_disconnected():
+                # asyncio.wait leaves the read pending on timeout; wait_for would cancel it and could
+                # drop an event it had already taken off the queue
+                done, _ = await asyncio.wait({getter}, timeout=push.PUSH_HEARTBEAT_SECONDS)
+                if not done:
+                    yield ": ping\n\n"
+                    continue
+                message = getter.result()
+                getter = asyncio.ensure_future(subscription.get())
+                yield f"event: {message['type']}\ndata: {push.encode(message)}\n\n"
+        finally:
+            getter.cancel()
+            push.hub.unsubscribe(subscription)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@router.websocket("/ws")
+async def websocket_events(websocket: WebSocket, token: Optional[str] = Query(None)):
+    try:
+        perms = await run_in_threadpool(_authenticate, token)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await websocket.accept()
+    subscription = push.hub.subscribe(push.channels_for(perms.user_id, perms.group_ids))
+    # Nothing is expected from the client; reading only notices when it goes away
+    receiver = asyncio.ensure_future(websocket.receive_text())
+    # The queue read stays pending across heartbeats and client messages and is only cancelled
+    # when the connection ends: cancelling it earlier could drop an event it had already taken
+    sender = asyncio.ensure_future(subscription.get())
+    try:
+        while True:
+            done, _ = await asyncio.wait({sender, receiver}, timeout=push.PUSH_HEARTBEAT_SECONDS, return_when=asyncio.FIRST_COMPLETED)
+            if sender in done:
+                await websocket.send_text(push.encode(sender.result()))
+                sender = asyncio.ensure_future(subscription.get())
+            if receiver in done:
+                receiver.result()
+                receiver = asyncio.ensure_future(websocket.receive_text())
+            if not done:
+                await websocket.send_text(push.encode({"type": "ping"}))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
+        sender.cancel()
+        push.hub.unsubscribe(subscription)
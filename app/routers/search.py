@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List
+from sqlalchemy.orm import Session
+from datetime import datetime
+from .. import schemas, search
+from ..database import get_db
+from ..dependencies import get_permissions
+from ..permissions import PermissionContext
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+@router.get("/", response_model=List[schemas.SearchHit], summary="Search transactions, projects and tasks", description="Full-text search over income and expense descriptions, project names and descriptions and task names visible to the user, best matches first. Every word in `q` must match; end a word with `*` to match it as a prefix. Narrow with `kind` (income, expense, project, task, repeatable), an amount range (transactions only) and a date range (transaction date, or project/task start date). Page with `skip` and `limit`.")
+def search_documents(
+    q: str = Query(..., min_length=1, max_length=200),
+    kind: List[str] = Query(None),
+    min_amount: float = None,
+    max_amount: float = None,
+    start_date: datetime = None,
+    end_date: datetime = None,
+    skip: int = Query(0, ge=0, le=1000),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    perms: PermissionContext = Depends(get_permissions)
+):
+    try:
+        return search.search(db, perms, q, kinds=kind, min_amount=min_amount, max_amount=max_amount, start_date=start_date, end_date=end_date, skip=skip, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
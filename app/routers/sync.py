@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from .. import schemas, sync
+from ..database import get_db
+from ..dependencies import get_permissions
+from ..permissions import PermissionContext
+
+router = APIRouter(prefix="/sync", tags=["sync"])
+
+@router.get("/", response_model=schemas.SyncChanges, summary="Incremental sync", description="Rows created, changed or soft-deleted since `since` across incomes, expenses, budgets, projects, tasks, groups and the type lists visible to the user. Without `since`, or after the user's group access changed, `reset` is true and the response is a full load: replace local data instead of merging. Changed rows are upserts, `deleted` lists tombstone ids per collection. Each collection returns at most `limit` rows; while `has_more` is true, call again with the returned `cursor` right away. Store `cursor` and pass it as `since` next time.")
+def read_changes(
+    since: str = None,
+    limit: int = Query(500, ge=1, le=5000),
+    db: Session = Depends(get_db),
+    perms: PermissionContext = Depends(get_permissions)
+):
+    try:
+        return sync.changes(db, perms, cursor=since, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from typing import List
 from sqlalchemy.orm import Session
 from .. import schemas, crud
 from ..database import get_db
 from ..dependencies import get_current_active_user
+from ..catalog import catalog
+from ..http_cache import conditional
 
 router = APIRouter(prefix="/types", tags=["types"])
 
@@ -28,9 +30,10 @@ def delete_income_type(income_type_id: int, db: Session = Depends(get_db), curre
         raise HTTPException(status_code=404, detail="Income type not found or not authorized")
     return {"message": "Income type deleted"}
 
-@router.get("/income", response_model=List[schemas.IncomeType], summary="List income types", description="Retrieve all income types available to the authenticated user, including default and custom types.")
-def read_income_types(db: Session = Depends(get_db), current_user: schemas.User = Depends(get_current_active_user)):
-    return crud.get_income_types(db, current_user.id)
+@router.get("/income", response_model=List[schemas.IncomeType], summary="List income types", description="Retrieve all income types available to the authenticated user, including default and custom types. Send If-None-Match with the last ETag to get 304 when unchanged.")
+def read_income_types(request: Request, response: Response, db: Session = Depends(get_db), current_user: schemas.User = Depends(get_current_active_user)):
+    items, etag = catalog.listing(db, "income", current_user.id)
+    return conditional(request, response, etag) or items
 
 @router.post("/expense", response_model=schemas.ExpenseType, summary="Create a new expense type", description="Create a custom expense type for the authenticated user.")
 def create_expense_type(expense_type: schemas.ExpenseTypeCreate, db: Session = Depends(get_db), current_user: schemas.User = Depends(get_current_active_user)):
@@ -53,9 +56,10 @@ def delete_expense_type(expense_type_id: int, db: Session = Depends(get_db), cur
         raise HTTPException(status_code=404, detail="Expense type not found or not authorized")
     return {"message": "Expense type deleted"}
 
-@router.get("/expense", response_model=List[schemas.ExpenseType], summary="List expense types", description="Retrieve all expense types available to the authenticated user, including default and custom types.")
-def read_expense_types(db: Session = Depends(get_db), current_user: schemas.User = Depends(get_current_active_user)):
-    return crud.get_expense_types(db, current_user.id)
+@router.get("/expense", response_model=List[schemas.ExpenseType], summary="List expense types", description="Retrieve all expense types available to the authenticated user, including default and custom types. Send If-None-Match with the last ETag to get 304 when unchanged.")
+def read_expense_types(request: Request, response: Response, db: Session = Depends(get_db), current_user: schemas.User = Depends(get_current_active_user)):
+    items, etag = catalog.listing(db, "expense", current_user.id)
+    return conditional(request, response, etag) or items
 
 @router.post("/budget", response_model=schemas.BudgetCategory, summary="Create a new budget category", description="Create a custom budget category for the authenticated user.")
 def create_budget_category(budget_category: schemas.BudgetCategoryCreate, db: Session = Depends(get_db), current_user: schemas.User = Depends(get_current_active_user)):
@@ -78,6 +82,7 @@ def delete_budget_category(budget_category_id: int, db: Session = Depends(get_db
         raise HTTPException(status_code=404, detail="Budget category not found or not authorized")
     return {"message": "Budget category deleted"}
 
-@router.get("/budget", response_model=List[schemas.BudgetCategory], summary="List budget categories", description="Retrieve all budget categories available to the authenticated user, including default and custom categories.")
-def read_budget_categories(db: Session = Depends(get_db), current_user: schemas.User = Depends(get_current_active_user)):
-    return crud.get_budget_categories(db, current_user.id)
\ No newline at end of file
+@router.get("/budget", response_model=List[schemas.BudgetCategory], summary="List budget categories", description="Retrieve all budget categories available to the authenticated user, including default and custom categories. Send If-None-Match with the last ETag to get 304 when unchanged.")
+def read_budget_categories(request: Request, response: Response, db: Session = Depends(get_db), current_user: schemas.User = Depends(get_current_active_user)):
+    items, etag = catalog.listing(db, "budget", current_user.id)
+    return conditional(request, response, etag) or items
\ No newline at end of file
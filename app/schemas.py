@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
-from datetime import datetime
-from typing import Optional, List
+from datetime import date, datetime
+from typing import Dict, Optional, List
 
 class UserBase(BaseModel):
     username: str = Field(..., min_length=3, max_length=50)
@@ -42,6 +42,7 @@ class IncomeTypeUpdate(IncomeTypeBase):
 class IncomeType(IncomeTypeBase):
     id: int
     user_id: Optional[int]
+    updated_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
@@ -58,6 +59,7 @@ class ExpenseTypeUpdate(ExpenseTypeBase):
 class ExpenseType(ExpenseTypeBase):
     id: int
     user_id: Optional[int]
+    updated_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
@@ -74,6 +76,7 @@ class BudgetCategoryUpdate(BudgetCategoryBase):
 class BudgetCategory(BudgetCategoryBase):
     id: int
     user_id: Optional[int]
+    updated_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
@@ -92,6 +95,7 @@ class IncomeCreate(IncomeBase):
 class Income(IncomeBase):
     id: int
     user_id: int
+    updated_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
@@ -110,14 +114,25 @@ class ExpenseCreate(ExpenseBase):
 class Expense(ExpenseBase):
     id: int
     user_id: int
+    updated_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
 
+class BulkItemResult(BaseModel):
+    index: int
+    created: bool
+    error: Optional[str] = None
+
+class BulkResult(BaseModel):
+    created: int
+    failed: int
+    results: List[BulkItemResult]
+
 class BudgetBase(BaseModel):
     category_id: int
     amount: float = Field(..., gt=0)
-    period: str = Field(default="monthly", pattern="^(daily|weekly|monthly|yearly)$")
+    period: str = Field(default="monthly", pattern="^(daily|weekly|monthly|quarterly|yearly)$")
     group_id: Optional[int] = None
     project_id: Optional[int] = None
 
@@ -127,6 +142,7 @@ class BudgetCreate(BudgetBase):
 class Budget(BudgetBase):
     id: int
     user_id: int
+    updated_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
@@ -145,6 +161,7 @@ class TaskCreate(TaskBase):
 class Task(TaskBase):
     id: int
     project_id: int
+    updated_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
@@ -164,6 +181,7 @@ class Project(ProjectBase):
     id: int
     user_id: int
     tasks: List[Task] = []
+    updated_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
@@ -179,6 +197,7 @@ class Group(GroupBase):
     id: int
     owner_id: int
     members: List[User] = []
+    updated_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
@@ -200,4 +219,95 @@ class FinancialSummary(BaseModel):
     total_income: float
     total_expense: float
     net_balance: float
-    budget_status: dict
\ No newline at end of file
+    budget_status: dict
+
+class TypeSeries(BaseModel):
+    type_id: int
+    name: Optional[str] = None
+    totals: List[float]
+
+class TimeSeries(BaseModel):
+    interval: str
+    window: int
+    periods: List[date]
+    income: List[float]
+    expense: List[float]
+    net: List[float]
+    income_avg: List[float]
+    expense_avg: List[float]
+    net_avg: List[float]
+    opening_balance: float
+    cumulative_net: List[float]
+    income_by_type: List[TypeSeries]
+    expense_by_type: List[TypeSeries]
+
+class BudgetPeriodStatus(BaseModel):
+    start: datetime
+    end: datetime
+    spent: float
+    remaining: float
+    utilisation: Optional[float] = None
+
+class BudgetEvaluation(BaseModel):
+    budget_id: int
+    category_id: int
+    category: Optional[str] = None
+    amount: float
+    period: str
+    group_id: Optional[int] = None
+    project_id: Optional[int] = None
+    periods: List[BudgetPeriodStatus]
+
+class ForecastSeries(BaseModel):
+    kind: str
+    type_id: int
+    name: Optional[str] = None
+    trend: float
+    values: List[float]
+
+class Forecast(BaseModel):
+    months: List[str]
+    history_months: int
+    opening_balance: float
+    income: List[float]
+    expense: List[float]
+    net: List[float]
+    balance: List[float]
+    by_type: List[ForecastSeries]
+
+class SearchHit(BaseModel):
+    kind: str
+    id: int
+    text: Optional[str] = None
+    amount: Optional[float] = None
+    date: Optional[datetime] = None
+    project_id: Optional[int] = None
+    group_id: Optional[int] = None
+    score: float
+
+class Dashboard(BaseModel):
+    incomes: Optional[List[Income]] = None
+    expenses: Optional[List[Expense]] = None
+    budgets: Optional[List[Budget]] = None
+    projects: Optional[List[Project]] = None
+    groups: Optional[List[Group]] = None
+    income_types: Optional[List[IncomeType]] = None
+    expense_types: Optional[List[ExpenseType]] = None
+    budget_categories: Optional[List[BudgetCategory]] = None
+    summary: Optional[FinancialSummary] = None
+    cursors: Dict[str, str] = {}
+
+class SyncChanges(BaseModel):
+    cursor: str
+    reset: bool
+    has_more: bool
+    incomes: List[Income] = []
+    expenses: List[Expense] = []
+    budgets: List[Budget] = []
+    projects: List[Project] = []
+    tasks: List[Task] = []
+    groups: List[Group] = []
+    income_types: List[IncomeType] = []
+    expense_types: List[ExpenseType] = []
+    budget_categories: List[BudgetCategory] = []
+    deleted: Dict[str, List[int]] = {}
\ No newline at end of file
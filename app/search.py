@@ -0,0 +1,342 @@
+from sqlalchemy import MetaData, Table, Column, Integer, String, Text, Index, Float, event, inspect, select, delete, insert, literal, literal_column, null, cast, union_all, text, func
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+import bisect
+import math
+import os
+import re
+import threading
+from dotenv import load_dotenv
+from . import models, crud
+from .database import engine, async_engine
+from .permissions import PermissionContext
+
+load_dotenv()
+
+# Full-text search over income/expense descriptions, project names and descriptions and
+# task names. The index lives next to the data: an FTS5 table on SQLite, a FULLTEXT
+# index on MySQL, or (SEARCH_BACKEND=memory, or any other database) an inverted index in
+# this process. ORM writes are indexed by the after_flush hook below in the same
+# transaction; Core bulk inserts call index_new() themselves.
+#
+# The index only answers "which documents match and how well"; visibility, soft deletes
+# and amount/date filters are applied by joining the matches to their rows by primary key.
+
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "auto").lower()
+
+KINDS = {"income": models.Income, "expense": models.Expense, "project": models.Project, "task": models.Task}
+TRANSACTIONS = ("income", "expense")
+# FTS5 rowids pack (kind, doc_id) so a document is replaced or removed by rowid
+CODES = {"income": 0, "expense": 1, "project": 2, "task": 3}
+INDEXED = {"income": ("description",), "expense": ("description",), "project": ("name", "description"), "task": ("name",)}
+# Rows read per query by rebuild()
+REBUILD_BATCH_SIZE = 10000
+
+TOKEN = re.compile(r"(\w+)(\*?)")
+
+_metadata = MetaData()
+documents = Table(
+    "search_documents", _metadata,
+    Column("kind", String(10), primary_key=True),
+    Column("doc_id", Integer, primary_key=True),
+    Column("body", Text),
+    Index("ix_search_documents_body", "body", mysql_prefix="FULLTEXT"),
+)
+
+Key = Tuple[str, int]
+
+def parse_query(q: str) -> List[Tuple[str, bool]]:
+    """Lower-cased (term, is_prefix) pairs; `term*` matches every word starting with term."""
+    return [(term.lower(), bool(star)) for term, star in TOKEN.findall(q or "")]
+
+def document_body(kind: str, obj) -> str:
+    return " ".join(value for value in (getattr(obj, attribute) for attribute in INDEXED[kind]) if value)
+
+class Fts5Index:
+    name = "fts5"
+
+    def create(self, conn: Connection):
+        # prefix='2 3' keeps extra index entries for short prefixes, so `ab*` needs no term scan
+        conn.execute(text("CREATE VIRTUAL TABLE IF NOT EXISTS search_documents USING fts5(body, kind UNINDEXED, doc_id UNINDEXED, prefix='2 3')"))
+
+    def remove(self, conn: Connection, keys: Iterable[Key]):
+        rowids = [doc_id * len(CODES) + CODES[kind] for kind, doc_id in keys]
+        if rowids:
+            conn.execute(delete(documents).where(literal_column("search_documents.rowid").in_(rowids)))
+
+    def replace(self, conn: Connection, docs: Dict[Key, str]):
+        self.remove(conn, docs)
+        rows = [{"rowid": doc_id * len(CODES) + CODES[kind], "kind": kind, "doc_id": doc_id, "body": body} for (kind, doc_id), body in docs.items() if body]
+        if rows:
+            conn.execute(text("INSERT INTO search_documents (rowid, kind, doc_id, body) VALUES (:rowid, :kind, :doc_id, :body)"), rows)
+
+    def match(self, terms: List[Tuple[str, bool]]):
+        expression = " ".join(f'"{term}"' + ("*" if prefix else "") for term, prefix in terms)
+        # bm25() is lower for better matches
+        return literal_column("search_documents").op("MATCH")(expression), -func.bm25(literal_column("search_documents"))
+
+class FulltextIndex:
+    name = "fulltext"
+
+    def create(self, conn: Connection):
+        documents.create(conn, checkfirst=True)
+
+    def remove(self, conn: Connection, keys: Iterable[Key]):
+        by_kind = defaultdict(list)
+        for kind, doc_id in keys:
+            by_kind[kind].append(doc_id)
+        for kind, doc_ids in by_kind.items():
+            conn.execute(delete(documents).where(documents.c.kind == kind, documents.c.doc_id.in_(doc_ids)))
+
+    def replace(self, conn: Connection, docs: Dict[Key, str]):
+        self.remove(conn, docs)
+        rows = [{"kind": kind, "doc_id": doc_id, "body": body} for (kind, doc_id), body in docs.items() if body]
+        if rows:
+            conn.execute(insert(documents), rows)
+
+    def match(self, terms: List[Tuple[str, bool]]):
+        # Boolean mode: every term required, `term*` for prefixes
+        score = text("MATCH (search_documents.body) AGAINST (:search_terms IN BOOLEAN MODE)").bindparams(
+            search_terms=" ".join("+" + term + ("*" if prefix else "") for term, prefix in terms)
+        )
+        return score, score
+
+class MemoryIndex:
+    """Inverted index held by this process, loaded from the tables on first search.
+
+    Each process keeps its own copy and only sees its own writes after they commit, so
+    this is meant for single-process deployments on databases without a native index.
+    """
+
+    name = "memory"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings: Dict[str, Dict[Key, int]] = {}
+        self._documents: Dict[Key, List[str]] = {}
+        self._terms: Optional[List[str]] = None
+        self._loaded = False
+
+    def create(self, conn: Connection):
+        pass
+
+    def _remove(self, key: Key):
+        for term in self._documents.pop(key, ()):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(key, None)
+                if not postings:
+                    del self._postings[term]
+                    self._terms = None
+
+    def _add(self, key: Key, body: str):
+        words = [term for term, _ in parse_query(body)]
+        if not words:
+            return
+        counts = defaultdict(int)
+        for word in words:
+            counts[word] += 1
+        for word, count in counts.items():
+            if word not in self._postings:
+                self._postings[word] = {}
+                self._terms = None
+            self._postings[word][key] = count
+        self._documents[key] = list(counts)
+
+    def apply(self, removed: Iterable[Key], docs: Dict[Key, str]):
+        with self._lock:
+            for key in removed:
+                self._remove(key)
+            for key, body in docs.items():
+                self._remove(key)
+                self._add(key, body)
+
+    def remove(self, conn: Connection, keys: Iterable[Key]):
+        pending = _pending(conn)
+        for key in keys:
+            pending["docs"].pop(key, None)
+            pending["removed"].add(key)
+
+    def replace(self, conn: Connection, docs: Dict[Key, str]):
+        pending = _pending(conn)
+        pending["removed"].difference_update(docs)
+        pending["docs"].update(docs)
+
+    def load(self, db: Session):
+        with self._lock:
+            if self._loaded:
+                return
+            for kind, model in KINDS.items():
+                columns = [getattr(model, attribute) for attribute in INDEXED[kind]]
+                for doc_id, *values in db.execute(select(model.id, *columns).where(model.deleted_at.is_(None))):
+                    self._add((kind, doc_id), " ".join(value for value in values if value))
+            self._loaded = True
+
+    def scores(self, terms: List[Tuple[str, bool]]) -> Dict[Key, float]:
+        """Documents containing every term, scored by summed tf-idf."""
+        with self._lock:
+            if self._terms is None:
+                self._terms = sorted(self._postings)
+            total = max(len(self._documents), 1)
+            result: Optional[Dict[Key, float]] = None
+            for term, prefix in terms:
+                matches = defaultdict(float)
+                words = [term] if not prefix else self._terms[bisect.bisect_left(self._terms, term):bisect.bisect_left(self._terms, term + "￿")]
+                for word in words:
+                    postings = self._postings.get(word, {})
+                    idf = math.log(1 + total / len(postings)) if postings else 0
+                    for key, count in postings.items():
+                        matches[key] = max(matches[key], count * idf)
+                result = dict(matches) if result is None else {key: score + matches[key] for key, score in result.items() if key in matches}
+                if not result:
+                    return {}
+            return result or {}
+
+def _pending(conn: Connection) -> dict:
+    # Memory index changes wait for the commit, so rolled back writes never show up
+    return conn.info.setdefault("search_pending", {"removed": set(), "docs": {}})
+
+def _select_backend():
+    dialect = engine.dialect.name
+    if SEARCH_BACKEND == "fts5" or (SEARCH_BACKEND == "auto" and dialect == "sqlite"):
+        return Fts5Index()
+    if SEARCH_BACKEND == "fulltext" or (SEARCH_BACKEND == "auto" and dialect == "mysql"):
+        return FulltextIndex()
+    return MemoryIndex()
+
+backend = _select_backend()
+
+def rebuild(conn: Connection):
+    backend.create(conn)
+    if isinstance(backend, MemoryIndex):
+        return
+    for kind, model in KINDS.items():
+        columns = [getattr(model, attribute) for attribute in INDEXED[kind]]
+        # Walk the table in id order a batch at a time, so millions of rows never sit in memory at once
+        last_id = 0
+        while True:
+            rows = conn.execute(select(model.id, *columns).where(model.deleted_at.is_(None), model.id > last_id).order_by(model.id).limit(REBUILD_BATCH_SIZE)).all()
+            if not rows:
+                break
+            backend.replace(conn, {(kind, doc_id): " ".join(value for value in values if value) for doc_id, *values in rows})
+            last_id = rows[-1][0]
+
+def index_new(conn: Connection, kind: str, rows: List[dict]):
+    """Index rows inserted with Core, given as their inserted values plus "id"."""
+    docs = {(kind, row["id"]): " ".join(row[attribute] for attribute in INDEXED[kind] if row.get(attribute)) for row in rows}
+    if docs:
+        backend.replace(conn, docs)
+
+def _kind_of(obj) -> Optional[str]:
+    for kind, model in KINDS.items():
+        if isinstance(obj, model):
+            return kind
+    return None
+
+@event.listens_for(Session, "after_flush")
+def _index_flushed_documents(session: Session, flush_context):
+    removed, docs = set(), {}
+    for obj in session.deleted:
+        kind = _kind_of(obj)
+        if kind:
+            removed.add((kind, obj.id))
+    for obj in session.new | session.dirty:
+        kind = _kind_of(obj)
+        if not kind or obj in session.deleted:
+            continue
+        state = inspect(obj)
+        if obj in session.dirty and not any(state.attrs[attribute].history.has_changes() for attribute in INDEXED[kind] + ("deleted_at",)):
+            continue
+        if obj.deleted_at is not None:
+            removed.add((kind, obj.id))
+        else:
+            docs[(kind, obj.id)] = document_body(kind, obj)
+    if removed or docs:
+        conn = session.connection()
+        backend.remove(conn, removed)
+        backend.replace(conn, docs)
+
+def _apply_pending(conn: Connection):
+    pending = conn.info.pop("search_pending", None)
+    if pending and isinstance(backend, MemoryIndex):
+        backend.apply(pending["removed"], pending["docs"])
+
+def _discard_pending(conn: Connection):
+    conn.info.pop("search_pending", None)
+
+for _engine in (engine, async_engine.sync_engine if async_engine else None):
+    if _engine is not None:
+        event.listen(_engine, "commit", _apply_pending)
+        event.listen(_engine, "rollback", _discard_pending)
+
+def _columns(kind: str):
+    model = KINDS[kind]
+    if kind in TRANSACTIONS:
+        return model.description, model.amount, model.date, model.project_id, model.group_id
+    if kind == "project":
+        return model.name, cast(null(), Float), model.start_date, model.id, model.group_id
+    return model.name, cast(null(), Float), model.start_date, model.project_id, models.Project.group_id
+
+def _criteria(kind: str, perms: PermissionContext, min_amount: Optional[float], max_amount: Optional[float], start_date: Optional[datetime], end_date: Optional[datetime]) -> list:
+    model = KINDS[kind]
+    # Tasks are visible through their project
+    criteria = [crud.visible_to(models.Project if kind == "task" else model, perms), model.deleted_at.is_(None)]
+    if kind == "task":
+        criteria.append(models.Project.deleted_at.is_(None))
+    date_column = model.date if kind in TRANSACTIONS else model.start_date
+    if start_date:
+        criteria.append(date_column >= start_date)
+    if end_date:
+        criteria.append(date_column <= end_date)
+    if min_amount is not None:
+        criteria.append(model.amount >= min_amount)
+    if max_amount is not None:
+        criteria.append(model.amount <= max_amount)
+    return criteria
+
+def _select(kind: str, score, indexed: bool):
+    model = KINDS[kind]
+    body, amount, date, project_id, group_id = _columns(kind)
+    statement = select(
+        literal(kind).label("kind"), model.id.label("id"), body.label("text"), amount.label("amount"),
+        date.label("date"), project_id.label("project_id"), group_id.label("group_id"), cast(score, Float).label("score"),
+    )
+    # Driven from the index: matches are looked up in their table by primary key
+    statement = statement.select_from(documents).join(model, model.id == documents.c.doc_id) if indexed else statement.select_from(model)
+    return statement.join(models.Project, models.Project.id == models.Task.project_id) if kind == "task" else statement
+
+def search(db: Session, perms: PermissionContext, q: str, kinds: Optional[List[str]] = None, min_amount: Optional[float] = None, max_amount: Optional[float] = None, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None, skip: int = 0, limit: int = 20) -> List[dict]:
+    terms = parse_query(q)
+    if not terms:
+        raise ValueError("Search query must contain at least one word")
+    kinds = kinds or list(KINDS)
+    unknown = [kind for kind in kinds if kind not in KINDS]
+    if unknown:
+        raise ValueError(f"Unknown search kind(s): {', '.join(unknown)}. Use: {', '.join(KINDS)}")
+    if min_amount is not None or max_amount is not None:
+        # Only transactions have amounts
+        kinds = [kind for kind in kinds if kind in TRANSACTIONS]
+    columns = ["kind", "id", "text", "amount", "date", "project_id", "group_id", "score"]
+    filters = {kind: _criteria(kind, perms, min_amount, max_amount, start_date, end_date) for kind in kinds}
+    if not kinds:
+        return []
+
+    if isinstance(backend, MemoryIndex):
+        backend.load(db)
+        scores = backend.scores(terms)
+        hits = []
+        for kind in kinds:
+            ids = [doc_id for hit_kind, doc_id in scores if hit_kind == kind]
+            if ids:
+                statement = _select(kind, literal(0.0), indexed=False).where(KINDS[kind].id.in_(ids), *filters[kind])
+                hits.extend({**dict(zip(columns, row)), "score": scores[(kind, row[1])]} for row in db.execute(statement))
+        hits.sort(key=lambda hit: (-hit["score"], hit["kind"], -hit["id"]))
+        return hits[skip:skip + limit]
+
+    match, score = backend.match(terms)
+    hits = union_all(*[_select(kind, score, indexed=True).where(match, documents.c.kind == kind, *filters[kind]) for kind in kinds]).subquery()
+    statement = select(*[hits.c[column] for column in columns]).order_by(hits.c.score.desc(), hits.c.kind, hits.c.id.desc()).offset(skip).limit(limit)
+    return [dict(zip(columns, row)) for row in db.execute(statement)]
@@ -1,12 +1,13 @@
 from sqlalchemy.orm import Session
 from .database import SessionLocal, engine
 from .models import Base, IncomeType, ExpenseType, BudgetCategory, User, Group
-from passlib.context import CryptContext
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from .migrations import run_migrations
+from . import models
+from .passwords import pwd_context
 
 def setup_database():
     Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
 
     default_income_types = ["salary", "investment", "freelance", "other"]
     default_expense_types = ["food", "rent", "utilities", "entertainment", "other"]
@@ -0,0 +1,104 @@
+from sqlalchemy import select, or_, and_
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+import base64
+import hashlib
+import json
+import os
+from dotenv import load_dotenv
+from . import models
+from .crud import visible_to
+from .permissions import PermissionContext
+
+load_dotenv()
+
+# Delta sync for GET /sync. Every synced row carries updated_at (set on insert and on
+# every update, soft deletes included), and the cursor holds a (updated_at, id) position
+# per collection. A sync returns rows past each position in (updated_at, id) order, with
+# soft-deleted rows reduced to tombstone ids.
+#
+# A write is stamped when it is flushed but only becomes visible when it commits, so a
+# caught-up collection restarts SYNC_SAFETY_SECONDS before the sync began. Rows changed
+# in that window can be sent twice; clients apply changes as upserts.
+#
+# The cursor also fingerprints the user's group permissions. When those change, rows
+# the client never saw (or may no longer see) can have old timestamps, so the next sync
+# is a full reset instead of a delta.
+
+SYNC_SAFETY_SECONDS = float(os.getenv("SYNC_SAFETY_SECONDS", "10"))
+
+COLLECTIONS = {
+    "incomes": models.Income,
+    "expenses": models.Expense,
+    "budgets": models.Budget,
+    "projects": models.Project,
+    "tasks": models.Task,
+    "groups": models.Group,
+    "income_types": models.IncomeType,
+    "expense_types": models.ExpenseType,
+    "budget_categories": models.BudgetCategory,
+}
+
+Position = Tuple[datetime, int]
+
+def permissions_fingerprint(perms: PermissionContext) -> str:
+    return hashlib.sha1(json.dumps(sorted(perms.groups.items())).encode()).hexdigest()[:16]
+
+def encode_cursor(fingerprint: str, positions: Dict[str, Position]) -> str:
+    payload = {"g": fingerprint, "p": {name: [updated_at.isoformat(), row_id] for name, (updated_at, row_id) in positions.items()}}
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[str, Dict[str, Position]]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return payload["g"], {name: (datetime.fromisoformat(updated_at), int(row_id)) for name, (updated_at, row_id) in payload["p"].items() if name in COLLECTIONS}
+    except (ValueError, TypeError, KeyError):
+        raise ValueError("Invalid sync cursor")
+
+def _visible(name: str, perms: PermissionContext) -> list:
+    model = COLLECTIONS[name]
+    if name in ("income_types", "expense_types", "budget_categories"):
+        return [or_(model.user_id.is_(None), model.user_id == perms.user_id)]
+    if name == "groups":
+        return [model.id.in_(perms.group_ids)]
+    if name == "tasks":
+        # Tasks are visible through their project
+        return [model.project_id.in_(select(models.Project.id).where(visible_to(models.Project, perms)))]
+    return [visible_to(model, perms)]
+
+def changes(db: Session, perms: PermissionContext, cursor: Optional[str] = None, limit: int = 500) -> dict:
+    started = datetime.utcnow()
+    fingerprint = permissions_fingerprint(perms)
+    positions: Dict[str, Position] = {}
+    reset = True
+    if cursor:
+        cursor_fingerprint, positions = decode_cursor(cursor)
+        reset = cursor_fingerprint != fingerprint
+        if reset:
+            positions = {}
+
+    result = {"reset": reset, "has_more": False, "deleted": {}}
+    next_positions = {}
+    for name, model in COLLECTIONS.items():
+        criteria = _visible(name, perms)
+        position = positions.get(name)
+        if position is None:
+            # First page of a full load: the client has nothing, so tombstones are pointless
+            criteria.append(model.deleted_at.is_(None))
+        else:
+            updated_at, row_id = position
+            criteria.append(or_(model.updated_at > updated_at, and_(model.updated_at == updated_at, model.id > row_id)))
+        rows = db.execute(select(model).where(*criteria).order_by(model.updated_at, model.id).limit(limit + 1)).scalars().all()
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_positions[name] = (rows[-1].updated_at, rows[-1].id)
+            result["has_more"] = True
+        else:
+            next_positions[name] = (started - timedelta(seconds=SYNC_SAFETY_SECONDS), 0)
+        result[name] = [row for row in rows if row.deleted_at is None]
+        deleted = [row.id for row in rows if row.deleted_at is not None]
+        if deleted:
+            result["deleted"][name] = deleted
+    result["cursor"] = encode_cursor(fingerprint, next_positions)
+    return result
@@ -0,0 +1,122 @@
+from sqlalchemy import select, func
+from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import Optional, Tuple
+import numpy as np
+from . import models, schemas
+
+# Income/expense history for /analytics/timeseries. The database only sums amounts per
+# (day, type); those rows are turned into flat NumPy columns and all bucketing, rolling
+# and cumulative work is vectorized, so the response cost tracks the number of days in
+# range rather than the number of transactions.
+
+INTERVALS = ("day", "week", "month")
+KINDS = {"income": (models.Income, models.IncomeType), "expense": (models.Expense, models.ExpenseType)}
+
+def _criteria(model, user_id: int, group_id: Optional[int], project_id: Optional[int]):
+    criteria = [model.deleted_at.is_(None), model.date.isnot(None)]
+    if project_id:
+        criteria.append(model.project_id == project_id)
+    if group_id:
+        criteria.append(model.group_id == group_id)
+    if not project_id and not group_id:
+        criteria.append(model.user_id == user_id)
+    return criteria
+
+def _load(db: Session, model, criteria) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    day = func.date(model.date)
+    type_id = func.coalesce(model.type_id, 0)
+    statement = select(day, type_id, func.sum(model.amount)).where(*criteria).group_by(day, type_id)
+    # Core execution on the session's connection: plain tuples, no ORM result processing
+    rows = db.connection().execute(statement).all()
+    if not rows:
+        return np.empty(0, np.int64), np.empty(0, np.float64), np.empty(0, np.int64)
+    days, type_ids, amounts = zip(*rows)
+    return np.array(days, dtype="datetime64[D]").astype(np.int64), np.array(amounts, dtype=np.float64), np.array(type_ids, dtype=np.int64)
+
+def _bucket(days: np.ndarray, interval: str) -> np.ndarray:
+    # Buckets are integers: day number, day number of the Monday starting the week, or month number
+    if interval == "week":
+        return days - (days + 3) % 7  # 1970-01-01 was a Thursday
+    if interval == "month":
+        return days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+    return days
+
+def _position(buckets: np.ndarray, first: int, interval: str) -> np.ndarray:
+    return (buckets - first) // 7 if interval == "week" else buckets - first
+
+def _labels(first: int, count: int, interval: str):
+    if interval == "week":
+        return np.arange(first, first + 7 * count, 7).astype("datetime64[D]").tolist()
+    if interval == "month":
+        return np.arange(first, first + count).astype("datetime64[M]").astype("datetime64[D]").tolist()
+    return np.arange(first, first + count).astype("datetime64[D]").tolist()
+
+def _day(value: datetime) -> int:
+    return int(np.datetime64(value, "D").astype(np.int64))
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing mean over `window` periods; the first periods average over what is available."""
+    sums = np.cumsum(values)
+    sums[window:] = sums[window:] - sums[:-window]
+    return sums / np.minimum(np.arange(1, len(values) + 1), window)
+
+def _by_type(db: Session, type_model, positions: np.ndarray, type_ids: np.ndarray, amounts: np.ndarray, count: int):
+    if not len(amounts):
+        return []
+    ids, inverse = np.unique(type_ids, return_inverse=True)
+    # One bincount over (period, type) pairs gives the whole period x type grid
+    grid = np.bincount(positions * len(ids) + inverse.ravel(), weights=amounts, minlength=count * len(ids)).reshape(count, len(ids))
+    names = dict(db.execute(select(type_model.id, type_model.name).where(type_model.id.in_(ids.tolist()))).all())
+    return [schemas.TypeSeries(type_id=type_id, name=names.get(type_id), totals=grid[:, column].tolist()) for column, type_id in enumerate(ids.tolist())]
+
+def _opening_balance(db: Session, user_id: int, group_id: Optional[int], project_id: Optional[int], start_date: datetime) -> float:
+    balance = 0.0
+    for kind, (model, _) in KINDS.items():
+        total = db.execute(select(func.sum(model.amount)).where(*_criteria(model, user_id, group_id, project_id), model.date < start_date)).scalar() or 0
+        balance += total if kind == "income" else -total
+    return balance
+
+def build_timeseries(db: Session, user_id: int, interval: str = "month", window: int = 3, group_id: Optional[int] = None, project_id: Optional[int] = None, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> schemas.TimeSeries:
+    if interval not in INTERVALS:
+        raise ValueError(f"Interval must be one of: {', '.join(INTERVALS)}")
+    if window < 1:
+        raise ValueError("Window must be at least 1")
+    data = {}
+    for kind, (model, _) in KINDS.items():
+        criteria = _criteria(model, user_id, group_id, project_id)
+        if start_date:
+            criteria.append(model.date >= start_date)
+        if end_date:
+            criteria.append(model.date <= end_date)
+        days, amounts, type_ids = _load(db, model, criteria)
+        data[kind] = (_bucket(days, interval), amounts, type_ids)
+
+    all_buckets = np.concatenate([data["income"][0], data["expense"][0]])
+    first = int(_bucket(np.array([_day(start_date)]), interval)[0]) if start_date else (int(all_buckets.min()) if len(all_buckets) else None)
+    last = int(_bucket(np.array([_day(end_date)]), interval)[0]) if end_date else (int(all_buckets.max()) if len(all_buckets) else None)
+    count = 0 if first is None or last is None or last < first else int(_position(np.array([last]), first, interval)[0]) + 1
+
+    totals, by_type = {}, {}
+    for kind, (buckets, amounts, type_ids) in data.items():
+        positions = _position(buckets, first, interval) if count else np.empty(0, np.int64)
+        totals[kind] = np.bincount(positions, weights=amounts, minlength=count) if count else np.zeros(0)
+        by_type[kind] = _by_type(db, KINDS[kind][1], positions, type_ids, amounts, count) if count else []
+
+    net = totals["income"] - totals["expense"]
+    opening = _opening_balance(db, user_id, group_id, project_id, start_date) if start_date else 0.0
+    return schemas.TimeSeries(
+        interval=interval,
+        window=window,
+        periods=_labels(first, count, interval) if count else [],
+        income=totals["income"].tolist(),
+        expense=totals["expense"].tolist(),
+        net=net.tolist(),
+        income_avg=rolling_mean(totals["income"], window).tolist(),
+        expense_avg=rolling_mean(totals["expense"], window).tolist(),
+        net_avg=rolling_mean(net, window).tolist(),
+        opening_balance=opening,
+        cumulative_net=(opening + np.cumsum(net)).tolist(),
+        income_by_type=by_type["income"],
+        expense_by_type=by_type["expense"],
+    )
\ No newline at end of file
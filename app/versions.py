@@ -0,0 +1,89 @@
+from fastapi import Request, Response
+from sqlalchemy import event, inspect, select, update, insert, or_, and_
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from itertools import chain
+from typing import Iterable, Optional, Set, Tuple
+from . import models
+from .http_cache import conditional, make_etag
+from .permissions import PermissionContext
+
+# Every user and group has a version in data_versions that goes up whenever a row it can
+# see changes. List endpoints hash the versions in scope into their ETag, so a client
+# holding the current ETag gets 304 after a single primary-key lookup.
+#
+# ORM writes are picked up by the after_flush hook below, whichever code path makes them.
+# Core statements (bulk inserts, user_group and group_shares rows) call bump() themselves.
+
+Scope = Tuple[str, int]
+
+def bump(conn: Connection, scopes: Iterable[Scope]):
+    table = models.data_versions
+    for scope, scope_id in sorted(set(scopes)):
+        result = conn.execute(update(table).where(table.c.scope == scope, table.c.scope_id == scope_id).values(version=table.c.version + 1))
+        if result.rowcount == 0:
+            conn.execute(insert(table).values(scope=scope, scope_id=scope_id, version=1))
+
+def _values(obj, attribute: str) -> Set:
+    # Current value plus the pre-flush one, so moving a row between groups bumps both
+    history = inspect(obj).attrs[attribute].history
+    return {value for value in chain(history.added, history.unchanged, history.deleted) if value}
+
+def object_scopes(conn: Connection, obj) -> Set[Scope]:
+    if isinstance(obj, (models.Income, models.Expense, models.Budget, models.Project)):
+        return {("user", user_id) for user_id in _values(obj, "user_id")} | {("group", group_id) for group_id in _values(obj, "group_id")}
+    if isinstance(obj, models.Task):
+        # Tasks are listed inside their project, so they count against the project's owner and group
+        project_ids = _values(obj, "project_id")
+        if not project_ids:
+            return set()
+        scopes = set()
+        for user_id, group_id in conn.execute(select(models.Project.user_id, models.Project.group_id).where(models.Project.id.in_(project_ids))):
+            scopes.add(("user", user_id))
+            if group_id:
+                scopes.add(("group", group_id))
+        return scopes
+    if isinstance(obj, models.Group):
+        return {("group", obj.id), ("user", obj.owner_id)}
+    if isinstance(obj, models.User):
+        # Users are embedded as members in every group listing they appear in
+        group_ids = conn.execute(select(models.user_group.c.group_id).where(models.user_group.c.user_id == obj.id)).scalars()
+        return {("user", obj.id)} | {("group", group_id) for group_id in group_ids}
+    return set()
+
+@event.listens_for(Session, "after_flush")
+def _bump_flushed_scopes(session: Session, flush_context):
+    conn = session.connection()
+    scopes = set()
+    for obj in chain(session.new, session.deleted, (obj for obj in session.dirty if session.is_modified(obj))):
+        scopes |= object_scopes(conn, obj)
+    if scopes:
+        bump(conn, scopes)
+
+def _versions_statement(perms: PermissionContext):
+    table = models.data_versions
+    return select(table.c.scope, table.c.scope_id, table.c.version).where(or_(
+        and_(table.c.scope == "user", table.c.scope_id == perms.user_id),
+        and_(table.c.scope == "group", table.c.scope_id.in_(perms.group_ids)),
+    ))
+
+def list_etag(request: Request, perms: PermissionContext, versions, *extra) -> str:
+    return make_etag(
+        request.url.path,
+        sorted(request.query_params.multi_items()),
+        perms.user_id,
+        sorted(perms.groups.items()),
+        sorted(tuple(row) for row in versions),
+        *extra,
+    )
+
+def check(request: Request, response: Response, db: Session, perms: PermissionContext, *extra) -> Optional[Response]:
+    """Set the list ETag on `response`, or return a 304 when the client's copy is current.
+
+    `extra` mixes other version markers (e.g. catalog ETags) into the ETag.
+    """
+    return conditional(request, response, list_etag(request, perms, db.execute(_versions_statement(perms)).all(), *extra))
+
+async def check_async(request: Request, response: Response, db: AsyncSession, perms: PermissionContext, *extra) -> Optional[Response]:
+    return conditional(request, response, list_etag(request, perms, (await db.execute(_versions_statement(perms))).all(), *extra))
\ No newline at end of file
@@ -0,0 +1,197 @@
+from sqlalchemy import select, func
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+import random
+from app import models, rollups, search
+from app.database import Base
+from app.passwords import pwd_context
+
+# Synthetic, reproducible datasets for the benchmarks: the same seed and scale always
+# produce the same rows, with dates relative to the day they are generated. Everything
+# goes in through Core executemany inserts in chunks, which skips the ORM hooks, so
+# rollups and the search index are rebuilt at the end.
+#
+# Every user's password is PASSWORD. The first user (bench0) is the one the benchmark
+# logs in as: it owns the first group and project, belongs to a few groups and has a
+# couple more shared with it, so every visibility path (own rows, member groups, shared
+# groups) is exercised.
+
+PASSWORD = "bench-password"
+CHUNK_SIZE = 5000
+
+SCALES = {
+    "tiny": {"users": 10, "groups": 4, "projects": 10, "tasks": 50, "budgets": 20, "transactions": 5_000},
+    "small": {"users": 50, "groups": 10, "projects": 40, "tasks": 200, "budgets": 100, "transactions": 50_000},
+    "medium": {"users": 500, "groups": 100, "projects": 400, "tasks": 4_000, "budgets": 1_000, "transactions": 1_000_000},
+    "large": {"users": 5_000, "groups": 1_000, "projects": 4_000, "tasks": 40_000, "budgets": 10_000, "transactions": 5_000_000},
+}
+# Share of transactions that are incomes; the rest are expenses
+INCOME_SHARE = 0.3
+YEARS = 3
+
+WORDS = (
+    "grocery rent salary bonus coffee lunch dinner fuel train taxi insurance phone internet "
+    "electricity water gym cinema books laptop repair garden holiday hotel flight gift "
+    "pharmacy doctor school tuition invoice consulting dividend interest refund subscription "
+    "market bakery furniture paint tools parking toll charity donation music concert"
+).split()
+STATUSES = ("pending", "in_progress", "done")
+PERIODS = ("daily", "weekly", "monthly", "quarterly", "yearly")
+
+def _phrase(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+def _insert(conn: Connection, table, rows: List[dict]):
+    for start in range(0, len(rows), CHUNK_SIZE):
+        conn.execute(table.insert(), rows[start:start + CHUNK_SIZE])
+
+def _next_id(conn: Connection, model) -> int:
+    return (conn.execute(select(func.max(model.id))).scalar() or 0) + 1
+
+def seed(engine: Engine, scale: Dict[str, int], seed: int = 0, prefix: str = "bench") -> dict:
+    """Insert a synthetic dataset of `scale` into an existing schema; returns locate() for it."""
+    rng = random.Random(seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    first_day = now - timedelta(days=365 * YEARS)
+    span = int((now - first_day).total_seconds())
+    hashed_password = pwd_context.hash(PASSWORD)
+
+    with engine.begin() as conn:
+        income_types = list(conn.execute(select(models.IncomeType.id).where(models.IncomeType.user_id.is_(None))).scalars())
+        expense_types = list(conn.execute(select(models.ExpenseType.id).where(models.ExpenseType.user_id.is_(None))).scalars())
+        categories = list(conn.execute(select(models.BudgetCategory.id).where(models.BudgetCategory.user_id.is_(None))).scalars())
+
+        first_user = _next_id(conn, models.User)
+        user_ids = list(range(first_user, first_user + scale["users"]))
+        _insert(conn, models.User.__table__, [
+            {"id": user_id, "username": f"{prefix}{index}", "email": f"{prefix}{index}@example.com", "hashed_password": hashed_password, "is_active": True}
+            for index, user_id in enumerate(user_ids)
+        ])
+
+        first_group = _next_id(conn, models.Group)
+        group_ids = list(range(first_group, first_group + scale["groups"]))
+        bench_user = user_ids[0]
+        owners = {group_id: bench_user if index == 0 else rng.choice(user_ids) for index, group_id in enumerate(group_ids)}
+        _insert(conn, models.Group.__table__, [
+            {"id": group_id, "name": f"{prefix} group {index}", "description": _phrase(rng, 4), "owner_id": owners[group_id]}
+            for index, group_id in enumerate(group_ids)
+        ])
+
+        members = {group_id: {owners[group_id]} | set(rng.sample(user_ids, min(len(user_ids), rng.randint(2, 8)))) for group_id in group_ids}
+        for group_id in group_ids[:3]:
+            members[group_id].add(bench_user)
+        _insert(conn, models.user_group, [{"user_id": user_id, "group_id": group_id} for group_id in group_ids for user_id in sorted(members[group_id])])
+
+        shares = {}
+        for group_id in group_ids:
+            outsiders = [user_id for user_id in rng.sample(user_ids, min(len(user_ids), 4)) if user_id not in members[group_id]]
+            for user_id in outsiders[:2]:
+                shares[(group_id, user_id)] = rng.choice(("view", "edit"))
+        for group_id in group_ids[3:5]:
+            if bench_user not in members[group_id]:
+                shares[(group_id, bench_user)] = "view"
+        _insert(conn, models.group_shares, [{"group_id": group_id, "user_id": user_id, "permission": permission} for (group_id, user_id), permission in shares.items()])
+
+        groups_of = {user_id: [] for user_id in user_ids}
+        for group_id in group_ids:
+            for user_id in members[group_id]:
+                groups_of[user_id].append(group_id)
+
+        def owner_and_group(share: float):
+            # A row belongs to its author and, some of the time, to one of the author's groups
+            user_id = rng.choice(user_ids)
+            group_id = rng.choice(groups_of[user_id]) if groups_of[user_id] and rng.random() < share else None
+            return user_id, group_id
+
+        first_project = _next_id(conn, models.Project)
+        projects = []
+        for index in range(scale["projects"]):
+            user_id, group_id = (bench_user, None) if index == 0 else owner_and_group(0.5)
+            start = first_day + timedelta(seconds=rng.randrange(span))
+            projects.append({
+                "id": first_project + index, "name": f"{_phrase(rng, 2)} project", "description": _phrase(rng, 8),
+                "start_date": start, "end_date": start + timedelta(days=rng.randint(7, 365)), "user_id": user_id, "group_id": group_id,
+            })
+        _insert(conn, models.Project.__table__, projects)
+        project_ids = [project["id"] for project in projects]
+
+        def tasks():
+            for _ in range(scale["tasks"]):
+                project = rng.choice(projects)
+                start = project["start_date"] + timedelta(days=rng.randint(0, 30))
+                yield {
+                    "name": _phrase(rng, 3), "status": rng.choice(STATUSES), "start_date": start, "end_date": start + timedelta(days=rng.randint(1, 60)),
+                    "project_id": project["id"], "user_id": project["user_id"],
+                }
+        _insert(conn, models.Task.__table__, list(tasks()))
+
+        def budgets():
+            for _ in range(scale["budgets"]):
+                user_id, group_id = owner_and_group(0.3)
+                yield {
+                    "category_id": rng.choice(categories), "amount": round(rng.uniform(100, 5000), 2), "period": rng.choice(PERIODS),
+                    "user_id": user_id, "group_id": group_id, "project_id": rng.choice(project_ids) if project_ids and rng.random() < 0.1 else None,
+                }
+        _insert(conn, models.Budget.__table__, list(budgets()))
+
+        def transactions(count: int, type_ids: List[int], low: float, high: float):
+            for _ in range(count):
+                user_id, group_id = owner_and_group(0.3)
+                yield {
+                    "amount": round(rng.uniform(low, high), 2), "type_id": rng.choice(type_ids), "description": _phrase(rng, rng.randint(1, 5)),
+                    "date": first_day + timedelta(seconds=rng.randrange(span)), "user_id": user_id, "group_id": group_id,
+                    "project_id": rng.choice(project_ids) if project_ids and rng.random() < 0.1 else None,
+                }
+
+        # Generated a chunk at a time so millions of rows never sit in memory at once
+        incomes = int(scale["transactions"] * INCOME_SHARE)
+        for table, count, type_ids, low, high in (
+            (models.Income.__table__, incomes, income_types, 50, 5000),
+            (models.Expense.__table__, scale["transactions"] - incomes, expense_types, 1, 500),
+        ):
+            rows = transactions(count, type_ids, low, high)
+            while True:
+                chunk = [row for _, row in zip(range(CHUNK_SIZE), rows)]
+                if not chunk:
+                    break
+                conn.execute(table.insert(), chunk)
+
+        rollups.rebuild(Session(bind=conn))
+        search.rebuild(conn)
+
+    return locate(engine, prefix)
+
+def locate(engine: Engine, prefix: str = "bench") -> Optional[dict]:
+    """Ids and sizes of a seeded dataset, or None when the database has not been seeded."""
+    with engine.connect() as conn:
+        user_id = conn.execute(select(models.User.id).where(models.User.username == f"{prefix}0")).scalar()
+        if user_id is None:
+            return None
+        first = lambda query: conn.execute(query.limit(1)).scalar()
+        return {
+            "username": f"{prefix}0",
+            "password": PASSWORD,
+            "user_id": user_id,
+            "group_id": first(select(models.user_group.c.group_id).where(models.user_group.c.user_id == user_id).order_by(models.user_group.c.group_id)),
+            "owned_group_id": first(select(models.Group.id).where(models.Group.owner_id == user_id, models.Group.deleted_at.is_(None)).order_by(models.Group.id)),
+            "project_id": first(select(models.Project.id).where(models.Project.user_id == user_id, models.Project.deleted_at.is_(None)).order_by(models.Project.id)),
+            "income_type_id": first(select(models.IncomeType.id).where(models.IncomeType.user_id.is_(None)).order_by(models.IncomeType.id)),
+            "expense_type_id": first(select(models.ExpenseType.id).where(models.ExpenseType.user_id.is_(None)).order_by(models.ExpenseType.id)),
+            "budget_category_id": first(select(models.BudgetCategory.id).where(models.BudgetCategory.user_id.is_(None)).order_by(models.BudgetCategory.id)),
+            "dataset": {
+                name: conn.execute(select(func.count()).select_from(table)).scalar()
+                for name, table in (
+                    ("users", models.User.__table__), ("groups", models.Group.__table__), ("group_shares", models.group_shares),
+                    ("projects", models.Project.__table__), ("tasks", models.Task.__table__), ("budgets", models.Budget.__table__),
+                    ("incomes", models.Income.__table__), ("expenses", models.Expense.__table__),
+                )
+            },
+        }
+
+def drop(engine: Engine):
+    """Drop every table, search index included, so the next seed starts from an empty database."""
+    with engine.begin() as conn:
+        search.documents.drop(conn, checkfirst=True)
+    Base.metadata.drop_all(bind=engine)
@@ -0,0 +1,384 @@
+"""Load-test the API against a seeded database and report latency, throughput and queries.
+
+    python -m benchmarks.run --scale small --out benchmarks/results.json
+    python -m benchmarks.run --scale small --baseline benchmarks/baseline.json
+
+The app is served by uvicorn in this process, so every SQL statement a request runs can
+be counted. Exits with status 1 when --baseline is given and a scenario regressed.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+from fnmatch import fnmatch
+from typing import Dict, List, Optional
+import argparse
+import asyncio
+import contextvars
+import itertools
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+import httpx
+import orjson
+import uvicorn
+from sqlalchemy import event
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCENARIO_HEADER = "x-bench-scenario"
+# Latency differences below this are noise, whatever the tolerance says
+NOISE_FLOOR_MS = 1.0
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the Finance App API against a synthetic dataset.")
+    parser.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL"), help="Database to seed and serve (default: a SQLite file under benchmarks/.data)")
+    parser.add_argument("--scale", default="small", help="Dataset preset (tiny, small, medium, large)")
+    parser.add_argument("--transactions", type=int, help="Override the preset's number of incomes + expenses")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the dataset")
+    parser.add_argument("--reseed", action="store_true", help="Drop and regenerate the dataset even if it already exists")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="Serve with DB_ASYNC=true")
+    parser.add_argument("--concurrency", type=int, default=10, help="Concurrent clients per scenario")
+    parser.add_argument("--requests", type=int, default=200, help="Measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=10, help="Unmeasured requests per scenario before measuring")
+    parser.add_argument("--scenario", action="append", help="Only run scenarios matching this pattern, e.g. 'expenses.*' (repeatable)")
+    parser.add_argument("--out", default=os.path.join(ROOT, "benchmarks", "results.json"), help="Where to write the JSON report")
+    parser.add_argument("--baseline", help="JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative p95 / throughput change before it counts as a regression")
+    return parser.parse_args(argv)
+
+def configure_environment(args: argparse.Namespace):
+    # The app reads its configuration at import time, so this runs before anything from app/ is imported
+    if not args.database_url:
+        data_dir = os.path.join(ROOT, "benchmarks", ".data")
+        os.makedirs(data_dir, exist_ok=True)
+        path = os.path.join(data_dir, f"bench-{args.scale}-{args.transactions or 'preset'}-{args.seed}.db")
+        args.database_url = f"sqlite:///{path}"
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ["DB_ASYNC"] = "true" if args.use_async else "false"
+    os.environ["MAIL_OUTBOX_ENABLED"] = "false"
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+    os.environ.setdefault("ALGORITHM", "HS256")
+    os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "120")
+    # The admin scenarios log in as the account setup_db seeds
+    os.environ.setdefault("ADMIN_USERNAMES", "admin")
+
+class QueryCounter:
+    """ASGI wrapper that counts the SQL statements each request executes, per scenario."""
+
+    def __init__(self, app, engines):
+        self.app = app
+        self.counts: Dict[str, List[int]] = defaultdict(list)
+        self._current = contextvars.ContextVar("bench_query_count", default=None)
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args):
+        counter = self._current.get()
+        if counter is not None:
+            counter[0] += 1
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        counter = [0]
+        token = self._current.set(counter)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self._current.reset(token)
+        name = dict(scope["headers"]).get(SCENARIO_HEADER.encode())
+        if name:
+            self.counts[name.decode()].append(counter[0])
+
+class Scenario:
+    """One request shape, sent `--requests` times; `json` may be a callable of a sequence number."""
+
+    def __init__(self, name: str, method: str, url: str, auth: Optional[str] = "user", params: dict = None, json=None, data: dict = None, headers: dict = None, expect=(200,), rows: bool = False):
+        self.name = name
+        self.method = method
+        self.url = url
+        self.auth = auth
+        self.params = params
+        self.json = json
+        self.data = data
+        self.headers = headers or {}
+        self.expect = expect
+        self.rows = rows
+        self._sequence = itertools.count()
+
+    def request(self, tokens: Dict[str, str], measured: bool) -> dict:
+        headers = dict(self.headers)
+        if self.auth:
+            headers["Authorization"] = f"Bearer {tokens[self.auth]}"
+        if measured:
+            headers[SCENARIO_HEADER] = self.name
+        body = self.json(next(self._sequence)) if callable(self.json) else self.json
+        return {"method": self.method, "url": self.url, "params": self.params, "json": body, "data": self.data, "headers": headers}
+
+def build_scenarios(ctx: dict) -> List[Scenario]:
+    """Read scenarios first, so their numbers are not skewed by rows the write scenarios add."""
+    today = datetime.utcnow().replace(microsecond=0)
+    last_month = (today - timedelta(days=30)).isoformat()
+    expense = {"amount": 12.5, "type_id": ctx["expense_type_id"], "description": "benchmark lunch"}
+    reads = [
+        Scenario("users.me", "GET", "/users/me"),
+        Scenario("incomes.list", "GET", "/incomes/"),
+        Scenario("incomes.list_fast_1000", "GET", "/incomes/", params={"limit": 1000, "fast": "true"}, rows=True),
+        Scenario("incomes.export_month", "GET", "/incomes/export", params={"format": "csv", "start_date": last_month}),
+        Scenario("expenses.list", "GET", "/expenses/"),
+        Scenario("expenses.list_1000", "GET", "/expenses/", params={"limit": 1000}, rows=True),
+        Scenario("expenses.list_fast_1000", "GET", "/expenses/", params={"limit": 1000, "fast": "true"}, rows=True),
+        Scenario("expenses.list_next_page", "GET", "/expenses/", params={"cursor": ctx["expenses_cursor"]}),
+        Scenario("expenses.list_filtered", "GET", "/expenses/", params={"type_id": ctx["expense_type_id"], "start_date": last_month}),
+        Scenario("expenses.list_not_modified", "GET", "/expenses/", headers={"If-None-Match": ctx["expenses_etag"]}, expect=(304,)),
+        Scenario("expenses.export_month", "GET", "/expenses/export", params={"format": "ndjson", "start_date": last_month}),
+        Scenario("budgets.list", "GET", "/budgets/"),
+        Scenario("budgets.evaluation", "GET", "/budgets/evaluation"),
+        Scenario("projects.list", "GET", "/projects/"),
+        Scenario("groups.list", "GET", "/groups/"),
+        Scenario("types.income", "GET", "/types/income"),
+        Scenario("types.expense", "GET", "/types/expense"),
+        Scenario("types.budget", "GET", "/types/budget"),
+        Scenario("analytics.summary", "GET", "/analytics/summary"),
+        Scenario("analytics.summary_group", "GET", "/analytics/summary", params={"group_id": ctx["group_id"]}),
+        Scenario("analytics.timeseries_month", "GET", "/analytics/timeseries"),
+        Scenario("analytics.timeseries_day", "GET", "/analytics/timeseries", params={"interval": "day", "window": 30, "start_date": (today - timedelta(days=365)).isoformat()}),
+        Scenario("analytics.forecast", "GET", "/analytics/forecast", params={"months": 12}),
+        Scenario("search.word", "GET", "/search/", params={"q": "grocery"}),
+        Scenario("search.prefix", "GET", "/search/", params={"q": "gro* rent"}),
+        Scenario("dashboard", "GET", "/dashboard/"),
+        Scenario("sync.full", "GET", "/sync/"),
+        Scenario("sync.next_page", "GET", "/sync/", params={"since": ctx["sync_cursor"]}),
+        Scenario("admin.pool", "GET", "/admin/pool", auth="admin"),
+        Scenario("admin.principal_cache", "GET", "/admin/principal-cache", auth="admin"),
+    ]
+    if ctx["project_id"]:
+        reads.append(Scenario("tasks.list", "GET", f"/tasks/{ctx['project_id']}"))
+    if ctx["owned_group_id"]:
+        reads.append(Scenario("groups.shares", "GET", f"/groups/{ctx['owned_group_id']}/shares"))
+
+    writes = [
+        Scenario("auth.login", "POST", "/auth/token", auth=None, data={"username": ctx["username"], "password": ctx["password"]}),
+        Scenario("users.create", "POST", "/users/", auth=None, json=lambda n: {"username": f"load{ctx['run_id']}x{n}", "email": f"load{ctx['run_id']}x{n}@example.com", "password": ctx["password"]}),
+        Scenario("incomes.create", "POST", "/incomes/", json={"amount": 1500, "type_id": ctx["income_type_id"], "description": "benchmark salary"}),
+        Scenario("expenses.create", "POST", "/expenses/", json=expense),
+        Scenario("expenses.create_group", "POST", "/expenses/", json={**expense, "group_id": ctx["group_id"]}),
+        Scenario("expenses.bulk_100", "POST", "/expenses/bulk", json=[expense] * 100),
+        Scenario("expenses.update", "PUT", f"/expenses/{ctx['expense_id']}", json={**expense, "amount": 13.5}),
+        Scenario("budgets.create", "POST", "/budgets/", json={"category_id": ctx["budget_category_id"], "amount": 400, "period": "monthly"}),
+        Scenario("projects.create", "POST", "/projects/", json={"name": "benchmark project", "description": "created by the benchmark"}),
+    ]
+    if ctx["project_id"]:
+        writes.append(Scenario("tasks.create", "POST", f"/tasks/{ctx['project_id']}", json={"name": "benchmark task"}))
+    return reads + writes
+
+async def login(client: httpx.AsyncClient, username: str, password: str) -> str:
+    response = await client.post("/auth/token", data={"username": username, "password": password})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+async def prepare(client: httpx.AsyncClient, ctx: dict) -> Dict[str, str]:
+    """Log in and collect the cursors, ETags and ids the scenarios replay."""
+    tokens = {"user": await login(client, ctx["username"], ctx["password"]), "admin": await login(client, "admin", "admin123")}
+    auth = {"Authorization": f"Bearer {tokens['user']}"}
+    # Written first: any later write would invalidate the ETag below
+    response = await client.post("/expenses/", headers=auth, json={"amount": 10, "type_id": ctx["expense_type_id"], "description": "benchmark update target"})
+    response.raise_for_status()
+    ctx["expense_id"] = response.json()["id"]
+    response = await client.get("/expenses/", headers=auth)
+    ctx["expenses_cursor"] = response.headers.get("X-Next-Cursor", "")
+    ctx["expenses_etag"] = response.headers.get("ETag", "")
+    ctx["sync_cursor"] = (await client.get("/sync/", headers=auth)).json()["cursor"]
+    return tokens
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    # Nearest-rank percentile of an already sorted list
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))]
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, tokens: Dict[str, str], counter: QueryCounter, total: int, concurrency: int, warmup: int) -> dict:
+    latencies: List[float] = []
+    outcome = {"errors": 0, "rows": 0, "statuses": defaultdict(int)}
+
+    async def worker(jobs, measured: bool):
+        for _ in jobs:
+            started = time.perf_counter()
+            response = await client.request(**scenario.request(tokens, measured))
+            elapsed = time.perf_counter() - started
+            if not measured:
+                continue
+            latencies.append(elapsed)
+            outcome["statuses"][str(response.status_code)] += 1
+            if response.status_code not in scenario.expect:
+                outcome["errors"] += 1
+            elif scenario.rows:
+                outcome["rows"] += len(orjson.loads(response.content))
+
+    # Workers pull from one shared iterator, so exactly `total` requests are sent
+    jobs = iter(range(warmup))
+    await asyncio.gather(*(worker(jobs, False) for _ in range(concurrency)))
+    jobs = iter(range(total))
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(jobs, True) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    # The server records a request's queries after its last byte is sent; let the stragglers finish
+    await asyncio.sleep(0.05)
+
+    ordered = sorted(latency * 1000 for latency in latencies)
+    queries = counter.counts.pop(scenario.name, [])
+    result = {
+        "method": scenario.method,
+        "path": scenario.url,
+        "requests": len(ordered),
+        "errors": outcome["errors"],
+        "statuses": dict(outcome["statuses"]),
+        "p50_ms": round(percentile(ordered, 0.50), 3),
+        "p95_ms": round(percentile(ordered, 0.95), 3),
+        "p99_ms": round(percentile(ordered, 0.99), 3),
+        "mean_ms": round(sum(ordered) / len(ordered), 3),
+        "max_ms": round(ordered[-1], 3),
+        "throughput_rps": round(len(ordered) / elapsed, 2),
+        "queries_per_request": round(sum(queries) / len(queries), 2) if queries else None,
+        "max_queries": max(queries) if queries else None,
+    }
+    if scenario.rows:
+        result["rows_per_second"] = round(outcome["rows"] / elapsed, 1)
+    return result
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    """Human-readable regressions of `results` against `baseline` (scenarios in both only)."""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if current["p95_ms"] > previous["p95_ms"] * (1 + tolerance) and current["p95_ms"] - previous["p95_ms"] > NOISE_FLOOR_MS:
+            regressions.append(f"{name}: p95 {previous['p95_ms']:.1f}ms -> {current['p95_ms']:.1f}ms")
+        if current["throughput_rps"] < previous["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {previous['throughput_rps']:.1f} -> {current['throughput_rps']:.1f} req/s")
+        # Query counts are deterministic, so any increase is a regression (often an N+1)
+        if current["queries_per_request"] is not None and previous.get("queries_per_request") is not None and current["queries_per_request"] > previous["queries_per_request"] + 0.5:
+            regressions.append(f"{name}: queries/request {previous['queries_per_request']} -> {current['queries_per_request']}")
+        if current["errors"] and not previous["errors"]:
+            regressions.append(f"{name}: {current['errors']} errors (baseline had none)")
+    return regressions
+
+def print_table(results: Dict[str, dict], baseline: Dict[str, dict]):
+    print(f"{'scenario':34} {'p50':>8} {'p95':>8} {'p99':>8} {'req/s':>8} {'q/req':>6} {'err':>4}  {'p95 vs baseline':>15}")
+    for name, result in results.items():
+        change = ""
+        previous = baseline.get(name)
+        if previous and previous["p95_ms"]:
+            change = f"{(result['p95_ms'] / previous['p95_ms'] - 1) * 100:+.0f}%"
+        queries = "-" if result["queries_per_request"] is None else f"{result['queries_per_request']:g}"
+        print(f"{name:34} {result['p50_ms']:8.1f} {result['p95_ms']:8.1f} {result['p99_ms']:8.1f} {result['throughput_rps']:8.1f} {queries:>6} {result['errors']:4d}  {change:>15}")
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+class Server:
+    """uvicorn on a free local port, in a background thread."""
+
+    def __init__(self, app):
+        self.server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning", access_log=False))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def __enter__(self) -> str:
+        self.thread.start()
+        while not self.server.started:
+            if not self.thread.is_alive():
+                raise RuntimeError("uvicorn failed to start")
+            time.sleep(0.05)
+        port = self.server.servers[0].sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}"
+
+    def __exit__(self, *exc_info):
+        self.server.should_exit = True
+        self.thread.join()
+
+async def benchmark(url: str, ctx: dict, scenarios_filter: Optional[List[str]], counter: QueryCounter, args: argparse.Namespace) -> Dict[str, dict]:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=120) as client:
+        tokens = await prepare(client, ctx)
+        results = {}
+        for scenario in build_scenarios(ctx):
+            if scenarios_filter and not any(fnmatch(scenario.name, pattern) for pattern in scenarios_filter):
+                continue
+            print(f"  {scenario.name} ...", file=sys.stderr, flush=True)
+            results[scenario.name] = await run_scenario(client, scenario, tokens, counter, args.requests, args.concurrency, args.warmup)
+        return results
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    configure_environment(args)
+    from benchmarks import datagen
+    if args.scale not in datagen.SCALES:
+        raise SystemExit(f"Unknown scale {args.scale!r}; use one of {', '.join(datagen.SCALES)}")
+    scale = dict(datagen.SCALES[args.scale])
+    if args.transactions is not None:
+        scale["transactions"] = args.transactions
+
+    from app import database
+    from app.main import app
+    from app.setup_db import setup_database
+    if args.reseed:
+        datagen.drop(database.engine)
+    setup_database()
+    ctx = datagen.locate(database.engine)
+    if ctx is None:
+        print(f"Seeding {args.scale} dataset ({scale['transactions']:,} transactions) ...", file=sys.stderr, flush=True)
+        started = time.perf_counter()
+        datagen.seed(database.engine, scale, seed=args.seed)
+        print(f"Seeded in {time.perf_counter() - started:.1f}s", file=sys.stderr, flush=True)
+        ctx = datagen.locate(database.engine)
+    ctx["run_id"] = datetime.utcnow().strftime("%Y%m%d%H%M%S")
+
+    engines = [database.engine] + ([database.async_engine.sync_engine] if database.async_engine is not None else [])
+    counter = QueryCounter(app, engines)
+    with Server(counter) as url:
+        results = asyncio.run(benchmark(url, ctx, args.scenario, counter, args))
+
+    report = {
+        "meta": {
+            "created_at": datetime.utcnow().isoformat(),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": database.engine.url.get_backend_name(),
+            "async": args.use_async,
+            "scale": args.scale,
+            "seed": args.seed,
+            "dataset": ctx["dataset"],
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "warmup": args.warmup,
+        },
+        "scenarios": results,
+    }
+    with open(args.out, "w") as file:
+        json.dump(report, file, indent=2)
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)["scenarios"]
+    print_table(results, baseline)
+    print(f"\nReport written to {args.out}")
+    if args.baseline:
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.baseline}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(f"\nNo regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+    return 0
+
+if __name__ == "__main__":
+    # Guarded: the password hashing pool starts its workers with spawn, which re-imports this module
+    sys.exit(main())
@@ -14,10 +14,7 @@ const Dashboard: React.FC = () => {
     incomes, 
     expenses, 
     projects, 
-    fetchFinancialSummary, 
-    fetchIncomes, 
-    fetchExpenses, 
-    fetchProjects 
+    fetchDashboard
   } = useFinanceData();
   const { startLoading, stopLoading } = useLoading();
 
@@ -25,12 +22,7 @@ const Dashboard: React.FC = () => {
     const loadData = async () => {
       startLoading();
       try {
-        await Promise.all([
-          fetchFinancialSummary(),
-          fetchIncomes(),
-          fetchExpenses(),
-          fetchProjects()
-        ]);
+        await fetchDashboard(['summary', 'incomes', 'expenses', 'projects']);
       } catch (error) {
         console.error('Failed to load dashboard data:', error);
       } finally {
@@ -39,7 +31,7 @@ const Dashboard: React.FC = () => {
     };
 
     loadData();
-  }, [fetchFinancialSummary, fetchIncomes, fetchExpenses, fetchProjects, startLoading, stopLoading]);
+  }, [fetchDashboard, startLoading, stopLoading]);
 
   const stats = [
     {
@@ -1,6 +1,12 @@
-import React, { createContext, useState, useContext, ReactNode, useCallback } from 'react';
-import { financeAPI, projectAPI, typesAPI, groupAPI, analyticsAPI } from '../services/api';
-import { Income, Expense, Budget, Project, Task, IncomeType, ExpenseType, BudgetCategory, Group, FinancialSummary } from '../types';
+import React, { createContext, useState, useContext, ReactNode, useCallback, useEffect, useRef } from 'react';
+import { financeAPI, projectAPI, typesAPI, groupAPI, analyticsAPI, dashboardAPI, syncAPI, pushAPI } from '../services/api';
+import { Income, Expense, Budget, Project, Task, IncomeType, ExpenseType, BudgetCategory, Group, FinancialSummary, DashboardSection } from '../types';
+
+// Upserts changed rows by id and drops tombstoned ones, keeping the rest in place
+const mergeChanges = <T extends { id: number }>(current: T[], changed: T[], deleted: number[] = [], reset = false): T[] => {
+  const removed = new Set([...deleted, ...changed.map(item => item.id)]);
+  return [...(reset ? [] : current.filter(item => !removed.has(item.id))), ...changed];
+};
 
 interface FinanceDataContextType {
   // State
@@ -37,6 +43,8 @@ interface FinanceDataContextType {
   fetchBudgetCategories: () => Promise<void>;
   fetchGroups: () => Promise<void>;
   fetchFinancialSummary: (groupId?: number) => Promise<void>;
+  fetchDashboard: (sections?: DashboardSection[], groupId?: number) => Promise<void>;
+  syncChanges: () => Promise<void>;
   
   // CRUD operations
   createIncome: (data: any) => Promise<Income>;
@@ -236,6 +244,68 @@ export const FinanceDataProvider: React.FC<FinanceDataProviderProps> = ({ childr
     }
   }, []);
 
+  // Loads any subset of the lists above in a single request
+  const fetchDashboard = useCallback(async (sections?: DashboardSection[], groupId?: number) => {
+    setLoading(true);
+    try {
+      const data = await dashboardAPI.getDashboard(sections, groupId);
+      if (data.incomes) setIncomes(data.incomes);
+      if (data.expenses) setExpenses(data.expenses);
+      if (data.budgets) setBudgets(data.budgets);
+      if (data.projects) setProjects(data.projects);
+      if (data.groups) setGroups(data.groups);
+      if (data.income_types) setIncomeTypes(data.income_types);
+      if (data.expense_types) setExpenseTypes(data.expense_types);
+      if (data.budget_categories) setBudgetCategories(data.budget_categories);
+      if (data.summary) setFinancialSummary(data.summary);
+    } catch (error) {
+      console.error('Failed to fetch dashboard:', error);
+    } finally {
+      setLoading(false);
+    }
+  }, []);
+
+  // Incremental refresh: only rows changed since the last sync, in one request per page
+  const syncCursor = useRef<string | undefined>(undefined);
+  const syncChanges = useCallback(async () => {
+    try {
+      let hasMore = true;
+      while (hasMore) {
+        const changes = await syncAPI.getChanges(syncCursor.current);
+        const { reset, deleted } = changes;
+        setIncomes(prev => mergeChanges(prev, changes.incomes, deleted.incomes, reset));
+        setExpenses(prev => mergeChanges(prev, changes.expenses, deleted.expenses, reset));
+        setBudgets(prev => mergeChanges(prev, changes.budgets, deleted.budgets, reset));
+        setProjects(prev => mergeChanges(prev, changes.projects, deleted.projects, reset));
+        setGroups(prev => mergeChanges(prev, changes.groups, deleted.groups, reset));
+        setIncomeTypes(prev => mergeChanges(prev, changes.income_types, deleted.income_types, reset));
+        setExpenseTypes(prev => mergeChanges(prev, changes.expense_types, deleted.expense_types, reset));
+        setBudgetCategories(prev => mergeChanges(prev, changes.budget_categories, deleted.budget_categories, reset));
+        setTasks(prev => {
+          const next: Record<number, Task[]> = {};
+          const removed = [...(deleted.tasks || []), ...changes.tasks.map(task => task.id)];
+          for (const [projectId, projectTasks] of Object.entries(reset ? {} : prev)) {
+            next[Number(projectId)] = mergeChanges(projectTasks, [], removed);
+          }
+          for (const task of changes.tasks) {
+            next[task.project_id] = mergeChanges(next[task.project_id] || [], [task]);
+          }
+          return next;
+        });
+        syncCursor.current = changes.cursor;
+        hasMore = changes.has_more;
+      }
+    } catch (error) {
+      console.error('Failed to sync changes:', error);
+    }
+  }, []);
+
+  // Live updates: any pushed change triggers an incremental sync instead of polling
+  useEffect(() => {
+    const source = pushAPI.connect(() => { syncChanges(); });
+    return () => source?.close();
+  }, [syncChanges]);
+
   // CRUD operations
   const createIncome = async (data: any): Promise<Income> => {
     const newIncome = await financeAPI.createIncome(data);
@@ -291,6 +361,8 @@ export const FinanceDataProvider: React.FC<FinanceDataProviderProps> = ({ childr
     fetchBudgetCategories,
     fetchGroups,
     fetchFinancialSummary,
+    fetchDashboard,
+    syncChanges,
     
     // CRUD operations
     createIncome,
@@ -20,7 +20,10 @@ import {
   Project,
   Task,
   Group,
-  FinancialSummary
+  FinancialSummary,
+  DashboardData,
+  DashboardSection,
+  SyncChanges
 } from '../types';
 
 const API_BASE_URL = 'http://127.0.0.1:8000';
@@ -316,4 +319,33 @@ export const analyticsAPI = {
   },
 };
 
+export const dashboardAPI = {
+  getDashboard: async (sections?: DashboardSection[], groupId?: number): Promise<DashboardData> => {
+    const params: Record<string, string | number> = {};
+    if (sections && sections.length) params.section = sections.join(',');
+    if (groupId) params.group_id = groupId;
+    const response = await api.get('/dashboard/', { params });
+    return response.data;
+  },
+};
+
+export const syncAPI = {
+  getChanges: async (since?: string): Promise<SyncChanges> => {
+    const params = since ? { since } : {};
+    const response = await api.get('/sync/', { params });
+    return response.data;
+  },
+};
+
+// Server-Sent Events: EventSource cannot send headers, so the token goes in the query string
+export const pushAPI = {
+  connect: (onChange: () => void): EventSource | null => {
+    const token = localStorage.getItem('token');
+    if (!token) return null;
+    const source = new EventSource(`${API_BASE_URL}/push/events?token=${encodeURIComponent(token)}`);
+    ['created', 'updated', 'deleted', 'bulk_created', 'resync'].forEach(type => source.addEventListener(type, onChange));
+    return source;
+  },
+};
+
 export default api;
\ No newline at end of file
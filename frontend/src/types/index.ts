@@ -103,6 +103,46 @@ export interface FinancialSummary {
   budget_status: Record<string, number>;
 }
 
+export type DashboardSection =
+  | 'incomes'
+  | 'expenses'
+  | 'budgets'
+  | 'projects'
+  | 'groups'
+  | 'income_types'
+  | 'expense_types'
+  | 'budget_categories'
+  | 'summary';
+
+export interface SyncChanges {
+  cursor: string;
+  reset: boolean;
+  has_more: boolean;
+  incomes: Income[];
+  expenses: Expense[];
+  budgets: Budget[];
+  projects: Project[];
+  tasks: Task[];
+  groups: Group[];
+  income_types: IncomeType[];
+  expense_types: ExpenseType[];
+  budget_categories: BudgetCategory[];
+  deleted: Record<string, number[]>;
+}
+
+export interface DashboardData {
+  incomes: Income[] | null;
+  expenses: Expense[] | null;
+  budgets: Budget[] | null;
+  projects: Project[] | null;
+  groups: Group[] | null;
+  income_types: IncomeType[] | null;
+  expense_types: ExpenseType[] | null;
+  budget_categories: BudgetCategory[] | null;
+  summary: FinancialSummary | null;
+  cursors: Record<string, string>;
+}
+
 // Form types
 export interface LoginForm {
   username: string;
@@ -0,0 +1,157 @@
+CREATE TABLE users (
+	id INTEGER NOT NULL, 
+	username VARCHAR(50), 
+	email VARCHAR(100), 
+	hashed_password VARCHAR(255), 
+	is_active BOOLEAN, 
+	deleted_at DATETIME, 
+	PRIMARY KEY (id)
+);
+CREATE INDEX ix_users_id ON users (id);
+CREATE UNIQUE INDEX ix_users_username ON users (username);
+CREATE UNIQUE INDEX ix_users_email ON users (email);
+CREATE TABLE income_types (
+	id INTEGER NOT NULL, 
+	name VARCHAR(50), 
+	user_id INTEGER, 
+	deleted_at DATETIME, 
+	PRIMARY KEY (id), 
+	FOREIGN KEY(user_id) REFERENCES users (id)
+);
+CREATE UNIQUE INDEX ix_income_types_name ON income_types (name);
+CREATE INDEX ix_income_types_id ON income_types (id);
+CREATE TABLE expense_types (
+	id INTEGER NOT NULL, 
+	name VARCHAR(50), 
+	user_id INTEGER, 
+	deleted_at DATETIME, 
+	PRIMARY KEY (id), 
+	FOREIGN KEY(user_id) REFERENCES users (id)
+);
+CREATE UNIQUE INDEX ix_expense_types_name ON expense_types (name);
+CREATE INDEX ix_expense_types_id ON expense_types (id);
+CREATE TABLE budget_categories (
+	id INTEGER NOT NULL, 
+	name VARCHAR(50), 
+	user_id INTEGER, 
+	deleted_at DATETIME, 
+	PRIMARY KEY (id), 
+	FOREIGN KEY(user_id) REFERENCES users (id)
+);
+CREATE INDEX ix_budget_categories_id ON budget_categories (id);
+CREATE UNIQUE INDEX ix_budget_categories_name ON budget_categories (name);
+CREATE TABLE reset_tokens (
+	id INTEGER NOT NULL, 
+	user_id INTEGER, 
+	token VARCHAR(36), 
+	expires_at DATETIME, 
+	PRIMARY KEY (id), 
+	FOREIGN KEY(user_id) REFERENCES users (id), 
+	UNIQUE (token)
+);
+CREATE INDEX ix_reset_tokens_id ON reset_tokens (id);
+CREATE TABLE groups (
+	id INTEGER NOT NULL, 
+	name VARCHAR(50), 
+	description VARCHAR(200), 
+	owner_id INTEGER, 
+	deleted_at DATETIME, 
+	PRIMARY KEY (id), 
+	FOREIGN KEY(owner_id) REFERENCES users (id)
+);
+CREATE INDEX ix_groups_name ON groups (name);
+CREATE INDEX ix_groups_id ON groups (id);
+CREATE TABLE user_group (
+	user_id INTEGER, 
+	group_id INTEGER, 
+	FOREIGN KEY(user_id) REFERENCES users (id), 
+	FOREIGN KEY(group_id) REFERENCES groups (id)
+);
+CREATE TABLE group_shares (
+	group_id INTEGER NOT NULL, 
+	user_id INTEGER NOT NULL, 
+	permission VARCHAR(20), 
+	PRIMARY KEY (group_id, user_id), 
+	FOREIGN KEY(group_id) REFERENCES groups (id), 
+	FOREIGN KEY(user_id) REFERENCES users (id)
+);
+CREATE TABLE projects (
+	id INTEGER NOT NULL, 
+	name VARCHAR(100), 
+	description VARCHAR(500), 
+	start_date DATETIME, 
+	end_date DATETIME, 
+	image_url VARCHAR(255), 
+	user_id INTEGER, 
+	group_id INTEGER, 
+	deleted_at DATETIME, 
+	PRIMARY KEY (id), 
+	FOREIGN KEY(user_id) REFERENCES users (id), 
+	FOREIGN KEY(group_id) REFERENCES groups (id)
+);
+CREATE INDEX ix_projects_id ON projects (id);
+CREATE TABLE incomes (
+	id INTEGER NOT NULL, 
+	amount FLOAT, 
+	type_id INTEGER, 
+	description VARCHAR(200), 
+	date DATETIME, 
+	user_id INTEGER, 
+	group_id INTEGER, 
+	project_id INTEGER, 
+	deleted_at DATETIME, 
+	PRIMARY KEY (id), 
+	FOREIGN KEY(type_id) REFERENCES income_types (id), 
+	FOREIGN KEY(user_id) REFERENCES users (id), 
+	FOREIGN KEY(group_id) REFERENCES groups (id), 
+	FOREIGN KEY(project_id) REFERENCES projects (id)
+);
+CREATE INDEX ix_incomes_id ON incomes (id);
+CREATE TABLE expenses (
+	id INTEGER NOT NULL, 
+	amount FLOAT, 
+	type_id INTEGER, 
+	description VARCHAR(200), 
+	date DATETIME, 
+	user_id INTEGER, 
+	group_id INTEGER, 
+	project_id INTEGER, 
+	deleted_at DATETIME, 
+	PRIMARY KEY (id), 
+	FOREIGN KEY(type_id) REFERENCES expense_types (id), 
+	FOREIGN KEY(user_id) REFERENCES users (id), 
+	FOREIGN KEY(group_id) REFERENCES groups (id), 
+	FOREIGN KEY(project_id) REFERENCES projects (id)
+);
+CREATE INDEX ix_expenses_id ON expenses (id);
+CREATE TABLE budgets (
+	id INTEGER NOT NULL, 
+	category_id INTEGER, 
+	amount FLOAT, 
+	period VARCHAR(20), 
+	user_id INTEGER, 
+	group_id INTEGER, 
+	project_id INTEGER, 
+	deleted_at DATETIME, 
+	PRIMARY KEY (id), 
+	FOREIGN KEY(category_id) REFERENCES budget_categories (id), 
+	FOREIGN KEY(user_id) REFERENCES users (id), 
+	FOREIGN KEY(group_id) REFERENCES groups (id), 
+	FOREIGN KEY(project_id) REFERENCES projects (id)
+);
+CREATE INDEX ix_budgets_id ON budgets (id);
+CREATE TABLE tasks (
+	id INTEGER NOT NULL, 
+	name VARCHAR(100), 
+	status VARCHAR(20), 
+	start_date DATETIME, 
+	end_date DATETIME, 
+	file_url VARCHAR(255), 
+	project_id INTEGER, 
+	user_id INTEGER, 
+	deleted_at DATETIME, 
+	PRIMARY KEY (id), 
+	FOREIGN KEY(project_id) REFERENCES projects (id), 
+	FOREIGN KEY(user_id) REFERENCES users (id)
+);
+CREATE INDEX ix_tasks_id ON tasks (id);
@@ -0,0 +1,44 @@
+import itertools
+import os
+import sys
+import tempfile
+import pytest
+
+# The app reads its configuration at import time: point it at a throwaway SQLite file
+# before anything from app/ is imported.
+_data_dir = tempfile.mkdtemp(prefix="finance-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_data_dir, 'app.db')}"
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+os.environ["BCRYPT_ROUNDS"] = "4"
+os.environ["PASSWORD_HASH_WORKERS"] = "0"
+os.environ["MAIL_OUTBOX_ENABLED"] = "false"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from app.main import app
+from app.setup_db import setup_database
+
+_names = itertools.count()
+
+@pytest.fixture(scope="session")
+def client():
+    setup_database()
+    with TestClient(app) as test_client:
+        yield test_client
+
+@pytest.fixture
+def make_user(client):
+    """Register and log in a fresh user; returns (auth headers, user id)."""
+    def make(password: str = "password123"):
+        name = f"user{next(_names)}"
+        response = client.post("/users/", json={"username": name, "email": f"{name}@example.com", "password": password})
+        assert response.status_code == 200, response.text
+        token = client.post("/auth/token", data={"username": name, "password": password}).json()["access_token"]
+        return {"Authorization": f"Bearer {token}"}, response.json()["id"]
+    return make
+
+@pytest.fixture
+def data_dir():
+    return _data_dir
@@ -0,0 +1,10 @@
+from app import dependencies
+
+def test_no_admins_unless_configured(client, monkeypatch):
+    token = client.post("/auth/token", data={"username": "admin", "password": "admin123"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    assert dependencies.ADMIN_USERNAMES == set()
+    assert client.get("/admin/pool", headers=headers).status_code == 403
+
+    monkeypatch.setattr(dependencies, "ADMIN_USERNAMES", {"admin"})
+    assert client.get("/admin/pool", headers=headers).status_code == 200
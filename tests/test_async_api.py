@@ -0,0 +1,47 @@
+import os
+import subprocess
+import sys
+import textwrap
+import pytest
+
+pytest.importorskip("aiosqlite")
+
+# DB_ASYNC is read when app.database is imported, so the async routes run in a fresh
+# interpreter with their own SQLite file rather than in this session's app.
+SCRIPT = textwrap.dedent("""
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.routers import async_api
+    from app.setup_db import setup_database
+
+    # The async handlers are mounted first, so they are the ones that answer
+    first = next(route for route in app.router.routes if getattr(route, "path", None) == "/expenses/" and "POST" in route.methods)
+    assert first.endpoint is async_api.create_expense_async
+    setup_database()
+    with TestClient(app) as client:
+        assert client.post("/users/", json={"username": "async", "email": "async@example.com", "password": "password123"}).status_code == 200
+        token = client.post("/auth/token", data={"username": "async", "password": "password123"}).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        type_id = client.get("/types/expense", headers=headers).json()[0]["id"]
+
+        created = [client.post("/expenses/", json={"amount": amount, "type_id": type_id}, headers=headers) for amount in (10, 20, 30)]
+        assert all(response.status_code == 200 for response in created), [response.text for response in created]
+        ids = [response.json()["id"] for response in created]
+        assert client.post("/expenses/", json={"amount": 1, "type_id": 99999}, headers=headers).status_code == 400
+
+        for fast in ("false", "true"):
+            listed = client.get("/expenses/", params={"fast": fast}, headers=headers)
+            assert listed.status_code == 200, listed.text
+            assert sorted(row["id"] for row in listed.json()) == sorted(ids)
+
+        assert client.delete(f"/expenses/{ids[0]}", headers=headers).status_code == 200
+        assert sorted(row["id"] for row in client.get("/expenses/", headers=headers).json()) == sorted(ids[1:])
+        assert client.delete(f"/expenses/{ids[0]}", headers=headers).status_code == 404
+""")
+
+def test_async_routes_list_create_delete(data_dir):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, DB_ASYNC="true", DATABASE_URL=f"sqlite:///{os.path.join(data_dir, 'async.db')}")
+    env.pop("ASYNC_DATABASE_URL", None)
+    result = subprocess.run([sys.executable, "-c", SCRIPT], cwd=root, env=env, capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
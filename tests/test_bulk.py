@@ -0,0 +1,32 @@
+import pytest
+from sqlalchemy import event
+from app import crud
+from app.database import engine
+
+@pytest.mark.parametrize("returning", [True, False])
+def test_bulk_rows_are_indexed_under_their_own_ids(client, make_user, monkeypatch, returning):
+    # False exercises the multi-row INSERT + lastrowid path of dialects without executemany RETURNING (MySQL)
+    monkeypatch.setattr(engine.dialect, "insert_executemany_returning", returning)
+    monkeypatch.setattr(crud, "BULK_INSERT_CHUNK", 2)
+    headers, _ = make_user()
+    other, _ = make_user()
+    type_id = client.get("/types/expense", headers=headers).json()[0]["id"]
+    word = f"bulkword{int(returning)}"
+    client.post("/expenses/", json={"amount": 1, "type_id": type_id, "description": f"{word} other"}, headers=other)
+
+    inserts = []
+    listener = lambda conn, cursor, statement, parameters, context, executemany: inserts.append(statement) if statement.startswith("INSERT INTO expenses") else None
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        items = [{"amount": index + 1, "type_id": type_id, "description": f"{word} item{index}"} for index in range(5)]
+        result = client.post("/expenses/bulk", json=items, headers=headers).json()
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    assert result["created"] == 5
+    if not returning:
+        # One multi-row INSERT per chunk, never one per item
+        assert len(inserts) == 3
+
+    listed = {row["description"]: row["id"] for row in client.get("/expenses/", headers=headers).json()}
+    hits = client.get("/search/", params={"q": word}, headers=headers).json()
+    assert {(hit["id"], hit["text"]) for hit in hits} == {(row_id, description) for description, row_id in listed.items()}
@@ -0,0 +1,16 @@
+from app.catalog import TypeCatalog
+from app.database import SessionLocal
+
+def test_catalog_evicts_least_recently_used_users(client, make_user):
+    users = [make_user()[1] for _ in range(3)]
+    catalog = TypeCatalog(ttl=300, maxsize=3)
+    db = SessionLocal()
+    try:
+        catalog.ids(db, "expense", users[0])  # the defaults and users[0]
+        catalog.ids(db, "expense", users[1])
+        catalog.ids(db, "expense", users[2])
+        assert len(catalog) == 3
+        assert ("expense", users[0]) not in catalog._entries
+        assert ("expense", None) in catalog._entries
+    finally:
+        db.close()
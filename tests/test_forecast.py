@@ -0,0 +1,24 @@
+from datetime import datetime
+import pytest
+from app import forecast
+from app.database import SessionLocal
+
+def test_current_month_actuals_are_not_counted_twice(client, make_user):
+    headers, user_id = make_user()
+    type_id = client.get("/types/expense", headers=headers).json()[0]["id"]
+    # A flat 100 a month for the year before July 2024, and 60 already spent in July
+    dates = [datetime(2023, month, 10) for month in range(7, 13)] + [datetime(2024, month, 10) for month in range(1, 7)]
+    for date, amount in [(date, 100) for date in dates] + [(datetime(2024, 7, 5), 60)]:
+        response = client.post("/expenses/", json={"amount": amount, "type_id": type_id, "date": date.isoformat()}, headers=headers)
+        assert response.status_code == 200, response.text
+
+    db = SessionLocal()
+    try:
+        result = forecast.build_forecast(db, user_id, months=3, history_months=12, as_of=datetime(2024, 7, 15))
+    finally:
+        db.close()
+
+    assert result["months"] == ["2024-07", "2024-08", "2024-09"]
+    assert result["opening_balance"] == pytest.approx(-1260)
+    assert result["expense"] == pytest.approx([40, 100, 100])
+    assert result["balance"] == pytest.approx([-1300, -1400, -1500])
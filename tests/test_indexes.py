@@ -0,0 +1,38 @@
+from datetime import datetime
+import pytest
+from sqlalchemy import select, text
+from app import crud, models, rollups
+from app.database import engine
+from app.permissions import PermissionContext, permission_statement
+
+PERMS = PermissionContext(1, {2: "edit"})
+
+def _query_plan(statement) -> str:
+    compiled = statement.compile(engine, compile_kwargs={"literal_binds": True})
+    with engine.connect() as conn:
+        return "\n".join(row[3] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {compiled}")))
+
+@pytest.mark.parametrize("model, table", [(models.Income, "incomes"), (models.Expense, "expenses")])
+def test_transaction_list_uses_scope_date_indexes(client, model, table):
+    filters = crud.transaction_filters(model, type_id=1, start_date=datetime(2024, 1, 1), end_date=datetime(2024, 6, 30))
+    plan = _query_plan(crud.page_statement(model, PERMS, filters, 0, 50))
+    assert f"USING INDEX ix_{table}_user_deleted_date (user_id=? AND deleted_at=? AND date>? AND date<?)" in plan
+    assert f"USING INDEX ix_{table}_group_deleted_date (group_id=? AND deleted_at=? AND date>? AND date<?)" in plan
+
+def test_budget_list_and_allocation_use_scope_indexes(client):
+    plan = _query_plan(crud.page_statement(models.Budget, PERMS, [models.Budget.deleted_at.is_(None)], 0, 50))
+    assert "USING INDEX ix_budgets_user_deleted (user_id=? AND deleted_at=?)" in plan
+    assert "USING INDEX ix_budgets_group_deleted (group_id=? AND deleted_at=?)" in plan
+    assert "USING INDEX ix_budgets_user_deleted (user_id=? AND deleted_at=?)" in _query_plan(crud.budget_allocation_statement(1))
+
+def test_summary_totals_use_rollup_indexes(client):
+    assert "USING INDEX ix_monthly_rollups_user_kind_month" in _query_plan(rollups.totals_statement("expense", user_id=1))
+    assert "USING INDEX ix_monthly_rollups_group_kind_month" in _query_plan(rollups.totals_statement("income", group_id=2))
+    assert "USING INDEX ix_monthly_rollups_user_kind_month" in _query_plan(crud.budget_spend_statement(1, ["food"]))
+
+def test_permission_and_project_lookups_use_indexes(client):
+    assert "USING COVERING INDEX ix_user_group_user_group (user_id=? AND group_id=?)" in _query_plan(permission_statement(1))
+    plan = _query_plan(select(models.Project).where(crud.visible_to(models.Project, PERMS), models.Project.deleted_at.is_(None)))
+    assert "USING INDEX ix_projects_user_deleted" in plan and "USING INDEX ix_projects_group_deleted" in plan
+    plan = _query_plan(select(models.Task).where(models.Task.project_id == 1, models.Task.deleted_at.is_(None)))
+    assert "USING INDEX ix_tasks_project_deleted (project_id=? AND deleted_at=?)" in plan
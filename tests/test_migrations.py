@@ -0,0 +1,29 @@
+import os
+from sqlalchemy import create_engine, inspect, select, text
+from app import models
+from app.migrations import MIGRATIONS, run_migrations
+
+BASELINE_SCHEMA = os.path.join(os.path.dirname(__file__), "baseline_schema.sql")
+
+def test_upgrade_from_baseline_schema(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'baseline.db'}")
+    with open(BASELINE_SCHEMA) as file:
+        engine.raw_connection().driver_connection.executescript(file.read())
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO users (id, username, email, hashed_password, is_active) VALUES (1, 'old', 'old@example.com', 'x', 1)"))
+        conn.execute(text("INSERT INTO expense_types (id, name) VALUES (1, 'food')"))
+        conn.execute(text("INSERT INTO expenses (amount, type_id, description, date, user_id) VALUES (12.5, 1, 'lunch', '2024-01-05 12:00:00', 1)"))
+
+    run_migrations(engine)
+
+    with engine.connect() as conn:
+        applied = set(conn.execute(select(models.schema_migrations.c.version)).scalars())
+        assert applied == {version for version, _, _ in MIGRATIONS}
+        assert conn.execute(select(models.Expense.updated_at)).scalar() is not None
+        assert conn.execute(select(models.MonthlyRollup.total).where(models.MonthlyRollup.kind == "expense")).scalar() == 12.5
+        assert conn.exec_driver_sql("SELECT 1 FROM sqlite_master WHERE name = 'ux_monthly_rollups_key'").first() is not None
+    indexes = {index["name"] for index in inspect(engine).get_indexes("expenses")}
+    assert {"ix_expenses_user_deleted_date", "ix_expenses_group_deleted_date", "ix_expenses_updated_at"} <= indexes
+
+    # Running again is a no-op
+    run_migrations(engine)
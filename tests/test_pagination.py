@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta
+from sqlalchemy import text
+from app import crud, models
+from app.database import engine
+from app.permissions import PermissionContext
+
+def _query_plan(statement) -> str:
+    compiled = statement.compile(engine, compile_kwargs={"literal_binds": True})
+    with engine.connect() as conn:
+        return "\n".join(row[3] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {compiled}")))
+
+def test_pages_merge_personal_and_group_rows(client, make_user):
+    owner, owner_id = make_user()
+    member, member_id = make_user()
+    group_id = client.post("/groups/", json={"name": "household"}, headers=owner).json()["id"]
+    assert client.post(f"/groups/{group_id}/members/{member_id}", headers=owner).status_code == 200
+    type_id = client.get("/types/expense", headers=owner).json()[0]["id"]
+
+    day = datetime(2024, 3, 1)
+    created = []
+    for index, (headers, group) in enumerate([(owner, None)] * 5 + [(owner, group_id)] * 4 + [(member, group_id)] * 3 + [(member, None)] * 2):
+        # Every other pair shares a date, so the id tie-break is exercised across branches
+        payload = {"amount": 1 + index, "type_id": type_id, "date": (day + timedelta(days=index // 2)).isoformat(), "group_id": group}
+        response = client.post("/expenses/", json=payload, headers=headers)
+        assert response.status_code == 200, response.text
+        created.append(response.json())
+    visible = sorted((row for row in created if row["user_id"] == owner_id or row["group_id"] == group_id), key=lambda row: (row["date"], row["id"]), reverse=True)
+
+    for fast in ("false", "true"):
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 3, "fast": fast, **({"cursor": cursor} if cursor else {})}
+            response = client.get("/expenses/", params=params, headers=owner)
+            assert response.status_code == 200, response.text
+            seen.extend(row["id"] for row in response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+        assert seen == [row["id"] for row in visible]
+
+    offset_page = client.get("/expenses/", params={"skip": 4, "limit": 3}, headers=owner).json()
+    assert [row["id"] for row in offset_page] == [row["id"] for row in visible[4:7]]
+
+def test_each_scope_walks_its_own_index():
+    perms = PermissionContext(1, {2: "edit", 3: "view"})
+    cursor = crud.encode_cursor(datetime(2024, 1, 1), 10)
+    plan = _query_plan(crud.page_statement(models.Expense, perms, crud.transaction_filters(models.Expense), 0, 50, cursor))
+    assert "MULTI-INDEX OR" not in plan
+    assert plan.count("USING INDEX ix_expenses_user_deleted_date") == 1
+    assert plan.count("USING INDEX ix_expenses_group_deleted_date") == 2
+
+def test_null_dated_rows_page_last(client, make_user):
+    # Rows from before dates were always set can hold NULL; they sort after every dated row
+    owner, owner_id = make_user()
+    member, member_id = make_user()
+    group_id = client.post("/groups/", json={"name": "legacy"}, headers=owner).json()["id"]
+    assert client.post(f"/groups/{group_id}/members/{member_id}", headers=owner).status_code == 200
+    type_id = client.get("/types/expense", headers=owner).json()[0]["id"]
+    rows = []
+    for index, (headers, group) in enumerate([(owner, None), (member, group_id), (owner, None), (member, group_id), (owner, group_id)]):
+        payload = {"amount": 1 + index, "type_id": type_id, "date": datetime(2024, 5, 1 + index).isoformat(), "group_id": group}
+        rows.append(client.post("/expenses/", json=payload, headers=headers).json()["id"])
+    undated = rows[:2]
+    with engine.begin() as conn:
+        conn.execute(models.Expense.__table__.update().where(models.Expense.id.in_(undated)).values(date=None))
+    expected = sorted(rows[2:], reverse=True) + sorted(undated, reverse=True)
+
+    for limit, fast in [(1, "false"), (2, "true"), (3, "false")]:
+        seen, cursor = [], None
+        while True:
+            params = {"limit": limit, "fast": fast, **({"cursor": cursor} if cursor else {})}
+            response = client.get("/expenses/", params=params, headers=owner)
+            assert response.status_code == 200, response.text
+            seen.extend(row["id"] for row in response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+        assert seen == expected
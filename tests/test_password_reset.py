@@ -0,0 +1,70 @@
+import re
+import socket
+import pytest
+from sqlalchemy import select
+from app import mailer, models
+from app.database import SessionLocal
+
+controller_module = pytest.importorskip("aiosmtpd.controller")
+
+class Outbox:
+    """aiosmtpd handler that keeps every message it accepts."""
+
+    def __init__(self):
+        self.messages = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append((envelope.rcpt_tos, envelope.content.decode()))
+        return "250 OK"
+
+@pytest.fixture
+def smtp_server(monkeypatch):
+    outbox = Outbox()
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    controller = controller_module.Controller(outbox, hostname="127.0.0.1", port=port)
+    controller.start()
+    monkeypatch.setattr(mailer, "MAIL_SERVER", "127.0.0.1")
+    monkeypatch.setattr(mailer, "MAIL_PORT", port)
+    monkeypatch.setattr(mailer, "MAIL_TLS", False)
+    monkeypatch.setattr(mailer, "MAIL_SSL", False)
+    monkeypatch.setattr(mailer, "MAIL_USERNAME", None)
+    monkeypatch.setattr(mailer, "MAIL_FROM", "finance@example.com")
+    yield outbox
+    controller.stop()
+
+def _outbox_rows(recipient):
+    db = SessionLocal()
+    try:
+        return db.execute(select(models.EmailOutbox.status, models.EmailOutbox.attempts).where(models.EmailOutbox.recipient == recipient)).all()
+    finally:
+        db.close()
+
+def test_reset_email_is_claimed_and_sent_once(client, make_user, smtp_server):
+    headers, _ = make_user()
+    email = client.get("/users/me", headers=headers).json()["email"]
+    assert client.post("/auth/forget", json={"email": email}).status_code == 200
+    assert _outbox_rows(email) == [("pending", 0)]
+
+    first, second = mailer.OutboxSender(), mailer.OutboxSender()
+    # A second sender that polls while the first holds the claim finds nothing to send
+    db = SessionLocal()
+    try:
+        claimed = mailer.claim_batch(db)
+        assert [message.recipient for message in claimed] == [email]
+        assert not second.drain_once()
+        for message in claimed:
+            first._deliver(first._connection(), message)
+        db.commit()
+    finally:
+        db.close()
+        first._disconnect()
+
+    assert not second.drain_once()
+    assert _outbox_rows(email) == [("sent", 1)]
+    delivered = [content for recipients, content in smtp_server.messages if recipients == [email]]
+    assert len(delivered) == 1
+
+    token = re.search(r"reset your password: (\S+)", delivered[0]).group(1)
+    assert client.post("/auth/reset", json={"token": token, "new_password": "new-password-1"}).status_code == 200
@@ -0,0 +1,59 @@
+import asyncio
+import sys
+import pytest
+from fastapi import WebSocketDisconnect
+from app import push
+from app.permissions import PermissionContext
+from app.routers import push as push_router
+
+class FakeWebSocket:
+    """Says hello once and then hangs up; records what the server sends."""
+
+    def __init__(self, on_hello):
+        self.on_hello = on_hello
+        self.sent = []
+        self.received = 0
+
+    async def accept(self):
+        pass
+
+    async def receive_text(self):
+        self.received += 1
+        if self.received == 1:
+            self.on_hello()
+            return "hello"
+        await asyncio.sleep(0.05)
+        raise WebSocketDisconnect()
+
+    async def send_text(self, text):
+        self.sent.append(text)
+
+def test_websocket_keeps_event_that_arrives_with_a_client_message(monkeypatch):
+    subscriptions = []
+    subscribe = push.hub.subscribe
+    monkeypatch.setattr(push.hub, "subscribe", lambda channels: subscriptions.append(subscribe(channels)) or subscriptions[-1])
+    monkeypatch.setattr(push_router, "_authenticate", lambda token: PermissionContext(1, {}))
+    event = {"type": "created", "kind": "expenses", "id": 7}
+    # The event is queued while the client's message is being read, so both reads finish in the same wait
+    websocket = FakeWebSocket(lambda: subscriptions[0]._queue.put_nowait(event))
+
+    asyncio.run(push_router.websocket_events(websocket, token="token"))
+
+    assert push.encode(event) in websocket.sent
+
+def test_broker_failure_does_not_fail_committed_write(client, make_user, monkeypatch):
+    headers, _ = make_user()
+
+    def unavailable(message):
+        raise ConnectionError("broker down")
+
+    monkeypatch.setattr(push.hub.broker, "publish", unavailable)
+    type_id = client.get("/types/expense", headers=headers).json()[0]["id"]
+    response = client.post("/expenses/", json={"amount": 5, "type_id": type_id}, headers=headers)
+    assert response.status_code == 200, response.text
+    assert any(row["id"] == response.json()["id"] for row in client.get("/expenses/", headers=headers).json())
+
+def test_redis_broker_without_redis_fails_fast(monkeypatch):
+    monkeypatch.setitem(sys.modules, "redis", None)
+    with pytest.raises(RuntimeError, match="PUSH_BROKER=redis"):
+        push._make_broker("redis")
@@ -0,0 +1,55 @@
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from app import models, rollups
+from app.database import SessionLocal
+
+def _rows(db, user_id):
+    return db.execute(select(models.MonthlyRollup.total, models.MonthlyRollup.count).where(models.MonthlyRollup.user_id == user_id)).all()
+
+def test_deltas_for_one_key_share_a_row(client, make_user):
+    _, user_id = make_user()
+    db = SessionLocal()
+    try:
+        for _ in range(2):
+            rollups.add(db, "expense", user_id, None, None, 1, "2024-05", 10.0, 1)
+        assert _rows(db, user_id) == [(20.0, 2)]
+    finally:
+        db.rollback()
+        db.close()
+
+def test_key_with_null_parts_is_unique(client, make_user):
+    _, user_id = make_user()
+    db = SessionLocal()
+    try:
+        db.execute(rollups._insert("expense", user_id, None, None, None, None, 1.0, 1))
+        with pytest.raises(IntegrityError):
+            with db.begin_nested():
+                db.execute(rollups._insert("expense", user_id, None, None, None, None, 1.0, 1))
+    finally:
+        db.rollback()
+        db.close()
+
+def test_losing_the_insert_race_retries_the_update(client, make_user, monkeypatch):
+    _, user_id = make_user()
+    db = SessionLocal()
+    increment = rollups._increment
+    calls = []
+
+    def racing_increment(*key):
+        # The first UPDATE runs just before another writer inserts the key's row
+        calls.append(key)
+        if len(calls) == 1:
+            db.execute(rollups._insert(*key))
+            return increment(*key).where(models.MonthlyRollup.id.is_(None))
+        return increment(*key)
+
+    monkeypatch.setattr(rollups, "_increment", racing_increment)
+    try:
+        rollups.add(db, "income", user_id, None, None, 2, "2024-06", 5.0, 1)
+        assert len(calls) == 2
+        assert _rows(db, user_id) == [(10.0, 2)]
+        assert db.execute(select(func.count()).select_from(models.MonthlyRollup).where(models.MonthlyRollup.user_id == user_id)).scalar() == 1
+    finally:
+        db.rollback()
+        db.close()
@@ -0,0 +1,47 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from app.database import engine
+
+@contextmanager
+def count_queries():
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+def _summary_queries(client, headers, group_id):
+    with count_queries() as statements:
+        response = client.get("/analytics/summary", params={"group_id": group_id}, headers=headers)
+    assert response.status_code == 200, response.text
+    return len(statements), response.json()
+
+def _add_data(client, headers, group_id, expense_types, categories, count):
+    day = datetime(2024, 1, 1)
+    items = [
+        {"amount": 10, "type_id": expense_types[index % len(expense_types)], "date": (day + timedelta(days=index)).isoformat(), "group_id": group_id if index % 3 == 0 else None}
+        for index in range(count)
+    ]
+    assert client.post("/expenses/bulk", json=items, headers=headers).json()["created"] == count
+    for category_id in categories:
+        assert client.post("/budgets/", json={"category_id": category_id, "amount": 100}, headers=headers).status_code == 200
+
+def test_summary_query_count_does_not_grow_with_data(client, make_user):
+    headers, _ = make_user()
+    group_id = client.post("/groups/", json={"name": "summary"}, headers=headers).json()["id"]
+    expense_types = [row["id"] for row in client.get("/types/expense", headers=headers).json()]
+    categories = [row["id"] for row in client.get("/types/budget", headers=headers).json()]
+    _summary_queries(client, headers, group_id)  # warm the principal and catalog caches
+
+    _add_data(client, headers, group_id, expense_types[:1], categories[:1], 3)
+    small, _ = _summary_queries(client, headers, group_id)
+    _add_data(client, headers, group_id, expense_types, categories, 300)
+    large, summary = _summary_queries(client, headers, group_id)
+
+    assert large == small
+    # The user's own 303 expenses plus the group's 101, as the summary has always added them
+    assert summary["total_expense"] == 4040
+    assert len(summary["budget_status"]) == len(categories)